@@ -0,0 +1,92 @@
+"""Mide el arranque en frío de cada app y lo compara con el presupuesto.
+
+Cada app se ejecuta una vez en un proceso de Python nuevo (con AppTest, sin
+servidor) en una carpeta vacía o con una copia de ``--datos``. Se mide desde
+que arranca el proceso hasta que termina la primera ejecución del script, y
+se listan los módulos pesados (Altair, requests, openpyxl) que ha importado
+la vista inicial: sin datos no debería aparecer ninguno, con datos solo
+Altair si la vista dibuja una gráfica. Sale con código 1 si alguna app se
+pasa del presupuesto o falla.
+
+    python benchmarks/arranque.py --presupuesto 2.5 --datos /ruta/a/datos
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = [
+    'app_mejorado.py', 'pocket_diet_final_v3.py', 'pocket_diet_full_v3.py',
+    'pocket_diet_food_log_avanzado.py', 'pocket_diet_food_log_final.py',
+    'pocket_diet_food_log_mejorado_full.py', 'pocket_diet_food_log_todo.py'
+]
+# Segundos desde que arranca el proceso hasta que termina la primera ejecución
+PRESUPUESTO = 2.5
+PESADOS = ['altair', 'requests', 'openpyxl']
+
+_HIJO = '''
+import json, sys, time
+inicio = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+sys.path.insert(0, {raiz!r})
+streamlit_listo = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+fin = time.perf_counter()
+print(json.dumps({{
+    'streamlit': streamlit_listo - inicio,
+    'total': fin - inicio,
+    'error': [str(e.value) for e in at.exception][:1],
+    'pesados': [m for m in {pesados!r} if m in sys.modules]
+}}))
+'''
+
+
+def medir(app, datos=None):
+    """Tiempos y módulos pesados de la primera ejecución de ``app`` en un proceso nuevo."""
+    carpeta = tempfile.mkdtemp()
+    try:
+        if datos:
+            for nombre in os.listdir(datos):
+                origen = os.path.join(datos, nombre)
+                if os.path.isfile(origen):
+                    shutil.copy(origen, carpeta)
+        codigo = _HIJO.format(raiz=RAIZ, app=os.path.join(RAIZ, app), pesados=PESADOS)
+        salida = subprocess.run(
+            [sys.executable, '-c', codigo], cwd=carpeta, capture_output=True, text=True, check=True
+        ).stdout
+        return json.loads(salida.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('apps', nargs='*', default=APPS)
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO, help='segundos por app')
+    parser.add_argument('--datos', help='carpeta con CSV que se copian antes de arrancar')
+    parser.add_argument('--repeticiones', type=int, default=3, help='se queda con la mejor')
+    args = parser.parse_args()
+
+    fallos = 0
+    print(f"{'app':40} {'streamlit':>10} {'total':>8}  pesados")
+    for app in args.apps:
+        medidas = [medir(app, args.datos) for _ in range(args.repeticiones)]
+        mejor = min(medidas, key=lambda m: m['total'])
+        problemas = []
+        if mejor['total'] > args.presupuesto:
+            problemas.append(f"más de {args.presupuesto:.1f} s")
+        if mejor['error']:
+            problemas.append('error: ' + mejor['error'][0])
+        fallos += bool(problemas)
+        print(f"{app:40} {mejor['streamlit']:>9.2f}s {mejor['total']:>7.2f}s  "
+              f"{', '.join(mejor['pesados']) or '-'}{'  ✗ ' + '; '.join(problemas) if problemas else ''}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Compara el acceso antiguo a Open Food Facts con ClienteOFF contra el servidor falso.
+
+    python benchmarks/bench_cliente_off.py --latencia 0.2 --peticiones 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.off import ClienteOFF  # noqa: E402
+from servidor_off_falso import ManejadorOFF, arrancar  # noqa: E402
+
+
+def cronometrar(nombre, funcion):
+    ManejadorOFF.peticiones = 0
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    print(f'{nombre:<48} {segundos:8.3f} s  {ManejadorOFF.peticiones:4d} peticiones')
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latencia', type=float, default=0.2)
+    parser.add_argument('--peticiones', type=int, default=10)
+    parser.add_argument('--fallos', type=float, default=0.2)
+    args = parser.parse_args()
+    n = args.peticiones
+
+    servidor = arrancar(latencia=args.latencia)
+    url = f'http://127.0.0.1:{servidor.server_port}'
+    cliente = ClienteOFF(url)
+    codigos = [f'84100000000{i:02d}' for i in range(n)]
+    print(f'Latencia {args.latencia}s, {n} peticiones\n')
+
+    def sin_sesion():
+        tam = 0
+        for p in range(1, n + 1):
+            r = requests.get(f'{url}/cgi/search.pl?search_terms=leche&search_simple=1&action=process&json=1&page_size=5&page={p}')
+            tam += len(r.content)
+        return tam
+
+    def con_sesion():
+        return [cliente.buscar('leche', 5, p) for p in range(1, n + 1)]
+
+    tam = cronometrar('requests.get sin sesión, secuencial', sin_sesion)
+    cronometrar('ClienteOFF, secuencial', con_sesion)
+    cronometrar(f'ClienteOFF.buscar_paginas({n})', lambda: cliente.buscar_paginas('leche', n))
+    cronometrar(f'ClienteOFF.producto x{n}, secuencial', lambda: [cliente.producto(c) for c in codigos])
+    cronometrar(f'ClienteOFF.productos({n})', lambda: cliente.productos(codigos))
+
+    r = cliente.session.get(f'{url}/cgi/search.pl', params={'search_terms': 'leche', 'json': 1, 'page_size': 5, 'fields': 'code,product_name,nutriments'})
+    print(f'\nBytes por página: {tam // n} sin fields=, {len(r.content)} con fields=')
+
+    ManejadorOFF.fallos = args.fallos
+    paginas = cronometrar(f'buscar_paginas({n}) con {args.fallos:.0%} de 503', lambda: cliente.buscar_paginas('leche', n))
+    print(f'  páginas recuperadas: {sum(p is not None for p in paginas)}/{n}')
+
+    ManejadorOFF.fallos = 0.0
+    # Con el cliente por defecto: un timeout de lectura no se reintenta, así que no pasa de TIMEOUT[1]
+    ManejadorOFF.latencia = cliente.timeout[1] + 2
+    cronometrar(f'servidor colgado, cliente por defecto ({cliente.timeout[1]} s)', lambda: cliente.buscar('leche'))
+    servidor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
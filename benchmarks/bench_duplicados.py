@@ -0,0 +1,72 @@
+"""Mide la detección de casi duplicados sobre un catálogo sintético.
+
+Antes comprueba que se propone fusionar el ejemplo de siempre, 'Yogur griego
+(Hacendado)' con 'yogur griego natural (HACENDADO)', y sale con código 1 si no.
+
+    python benchmarks/bench_duplicados.py --alimentos 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.duplicados import proponer_fusiones  # noqa: E402
+
+PALABRAS = ['yogur', 'griego', 'natural', 'leche', 'pan', 'integral', 'arroz', 'pollo', 'pechuga', 'atún',
+            'aceite', 'queso', 'fresco', 'curado', 'pavo', 'jamón', 'avena', 'copos', 'galletas', 'chocolate',
+            'negro', 'desnatado', 'entero', 'tomate', 'frito', 'zumo', 'naranja', 'manzana', 'plátano', 'nueces']
+MARCAS = ['Hacendado', 'Pascual', 'Danone', 'Carrefour', 'Dia', 'Gullón', 'Calvo', 'Bimbo', 'Eroski', 'Lidl']
+
+
+def generar(alimentos, fraccion_duplicados, rng):
+    filas = []
+    originales = int(alimentos * (1 - fraccion_duplicados))
+    for i in range(originales):
+        nombre = ' '.join(rng.sample(PALABRAS, rng.randint(2, 4))) + f' {i}'
+        valores = [rng.uniform(20, 600), rng.uniform(0, 30), rng.uniform(0, 80), rng.uniform(0, 40)]
+        filas.append([nombre, rng.choice(MARCAS)] + valores)
+    # Variantes: mayúsculas, una palabra más y valores redondeados
+    for _ in range(alimentos - originales):
+        nombre, marca, *valores = rng.choice(filas[:originales])
+        variante = nombre.upper() if rng.random() < 0.5 else f'{nombre} {rng.choice(PALABRAS)}'
+        filas.append([variante, marca.upper()] + [round(v) for v in valores])
+    return pd.DataFrame(filas, columns=['Comida', 'Marca', 'Kcal_100g', 'Proteínas_100g', 'Carbs_100g', 'Grasas_100g'])
+
+
+def ejemplo_fusionado():
+    """True si el par de yogures (Jaccard 2/3, mismos valores) sale como grupo."""
+    df = pd.DataFrame({
+        'Comida': ['Yogur griego', 'yogur griego natural'],
+        'Marca': ['Hacendado', 'HACENDADO'],
+        'Kcal_100g': [122, 120], 'Proteínas_100g': [6, 6], 'Carbs_100g': [4, 4], 'Grasas_100g': [10, 10],
+        'Codigo': [None, None]
+    })
+    return sorted(map(sorted, proponer_fusiones(df))) == [[0, 1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alimentos', type=int, default=100000)
+    parser.add_argument('--duplicados', type=float, default=0.1, help='fracción de variantes')
+    args = parser.parse_args()
+    if not ejemplo_fusionado():
+        print("✗ no se propone fusionar 'Yogur griego (Hacendado)' con 'yogur griego natural (HACENDADO)'")
+        sys.exit(1)
+    df = generar(args.alimentos, args.duplicados, random.Random(1))
+    df['Codigo'] = None
+    inicio = time.perf_counter()
+    grupos = proponer_fusiones(df)
+    segundos = time.perf_counter() - inicio
+    esperados = args.alimentos - int(args.alimentos * (1 - args.duplicados))
+    encontrados = sum(len(g) - 1 for g in grupos)
+    print(f'{args.alimentos} alimentos: {segundos:.2f} s, {len(grupos)} grupos, '
+          f'{encontrados} duplicados encontrados de {esperados} generados')
+
+
+if __name__ == '__main__':
+    main()
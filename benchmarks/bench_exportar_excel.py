@@ -0,0 +1,66 @@
+"""Compara el guardado con ``to_excel`` síncrono frente al exportador en segundo plano.
+
+    python benchmarks/bench_exportar_excel.py --dias 3650 --guardados 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.exportar import ExportadorExcel, escribir_excel  # noqa: E402
+from pocket_diet.historico import HistoricoPesos  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dias', type=int, default=3650)
+    parser.add_argument('--guardados', type=int, default=10, help='guardados seguidos (una ráfaga de clics)')
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'Fecha': pd.date_range(end=pd.Timestamp.today().normalize(), periods=args.dias),
+        'Peso': 80 + rng.normal(0, 0.5, args.dias).cumsum() * 0.1,
+        'Kcal': rng.integers(1500, 3000, args.dias).astype(float)
+    })
+    historico = HistoricoPesos(os.path.join(carpeta, 'datos_peso.csv'))
+    historico.guardar(df)
+    ruta_excel = os.path.join(carpeta, 'datos_peso.xlsx')
+
+    inicio = time.perf_counter()
+    historico.cargar().to_excel(ruta_excel, index=False)
+    print(f'to_excel: {(time.perf_counter() - inicio) * 1000:.0f} ms')
+    inicio = time.perf_counter()
+    escribir_excel(historico.cargar(), ruta_excel)
+    print(f'openpyxl write-only: {(time.perf_counter() - inicio) * 1000:.0f} ms')
+
+    # Como la app: cada guardado reescribe solo el nivel caliente
+    caliente = historico.caliente()
+    inicio = time.perf_counter()
+    for _ in range(args.guardados):
+        historico.guardar(caliente)
+        historico.cargar().to_excel(ruta_excel, index=False)
+    print(f'{args.guardados} guardados con to_excel: {(time.perf_counter() - inicio) * 1000 / args.guardados:.0f} ms cada uno')
+
+    exportador = ExportadorExcel(historico, ruta_excel)
+    exportaciones = []
+    exportar = exportador.exportar
+    exportador.exportar = lambda: (exportaciones.append(1), exportar())
+    inicio = time.perf_counter()
+    for _ in range(args.guardados):
+        historico.guardar(caliente)
+        exportador.programar()
+    print(f'{args.guardados} guardados con exportador: {(time.perf_counter() - inicio) * 1000 / args.guardados:.0f} ms cada uno')
+    exportador.esperar()
+    print(f'Exportaciones en segundo plano: {len(exportaciones)}, Excel de {len(pd.read_excel(ruta_excel))} filas')
+
+
+if __name__ == '__main__':
+    main()
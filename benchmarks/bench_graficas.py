@@ -0,0 +1,49 @@
+"""Tamaño del JSON de las gráficas de peso con todas las filas frente a los datos reducidos.
+
+    python benchmarks/bench_graficas.py --dias 3650
+"""
+import argparse
+import os
+import sys
+import time
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.graficas import datos_grafica  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dias', type=int, default=3650)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        'Fecha': pd.date_range('2015-01-01', periods=args.dias),
+        'Peso': 85 + rng.normal(0, 0.3, args.dias).cumsum() * 0.2,
+        'Kcal': rng.integers(1500, 3200, args.dias).astype(float)
+    })
+    df['Media_movil'] = df['Peso'].rolling(window=7, min_periods=1).mean()
+
+    completa = alt.Chart(df).transform_fold(['Peso', 'Media_movil'], as_=['Variable', 'Valor']).mark_line().encode(
+        x='Fecha:T', y='Valor:Q', color='Variable:N'
+    )
+    inicio = time.perf_counter()
+    reducidos = datos_grafica(df, ['Peso', 'Media_movil'])
+    segundos = time.perf_counter() - inicio
+    reducida = alt.Chart(reducidos).mark_line().encode(x='Fecha:T', y='Valor:Q', color='Variable:N')
+    print(f'Todas las filas: {len(df)} filas, JSON de {len(completa.to_json()) / 1e3:.0f} kB')
+    print(f'Reducida (lttb): {len(reducidos)} puntos, JSON de {len(reducida.to_json()) / 1e3:.0f} kB, '
+          f'{segundos * 1000:.1f} ms')
+    inicio = time.perf_counter()
+    kcal = datos_grafica(df, ['Kcal'], metodo='minmax')
+    print(f'Kcal (minmax): {len(kcal)} puntos, máximo {kcal["Valor"].max():.0f} de {df["Kcal"].max():.0f}, '
+          f'{(time.perf_counter() - inicio) * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
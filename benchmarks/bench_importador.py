@@ -0,0 +1,66 @@
+"""Importa una exportación sintética estilo MyFitnessPal y mide tiempo y memoria en cada almacén.
+
+    python benchmarks/bench_importador.py --filas 500000 --almacen sqlite
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.almacen import AlmacenCSV, AlmacenSQLite  # noqa: E402
+from pocket_diet.importador import importar_exportacion  # noqa: E402
+
+ALIMENTOS = ['Greek Yogurt', 'Banana', 'Whole Wheat Bread', 'Chicken Breast', 'White Rice', 'Olive Oil',
+             'Oats', 'Eggs', 'Tuna', 'Apple', 'Almonds', 'Milk 2%', 'Cheddar Cheese', 'Pasta', 'Salmon']
+MARCAS = ['Generic', 'Kirkland', 'Great Value', 'Fage', 'Chobani', '']
+COMIDAS = ['Breakfast', 'Lunch', 'Dinner', 'Snacks']
+
+
+def generar(ruta, filas):
+    rng = random.Random(1)
+    primer_dia = date(2015, 1, 1)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write('Date,Meal,Food Name,Brand,Grams,Calories,Fat (g),Protein (g),Carbohydrates (g)\n')
+        for i in range(filas):
+            dia = primer_dia + timedelta(days=i // 12)
+            gramos = rng.randint(20, 400)
+            f.write(f'{dia.isoformat()},{rng.choice(COMIDAS)},{rng.choice(ALIMENTOS)},{rng.choice(MARCAS)},{gramos},'
+                    f'{gramos * rng.uniform(0.5, 4):.0f},{rng.uniform(0, 30):.1f},{rng.uniform(0, 40):.1f},'
+                    f'{rng.uniform(0, 80):.1f}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=500000)
+    parser.add_argument('--almacen', choices=['sqlite', 'csv'], default='sqlite')
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    exportacion = os.path.join(carpeta, 'export.csv')
+    generar(exportacion, args.filas)
+    print(f'Exportación sintética: {args.filas} filas, {os.path.getsize(exportacion) / 1e6:.1f} MB')
+
+    if args.almacen == 'sqlite':
+        almacen = AlmacenSQLite(os.path.join(carpeta, 'pocket_diet.db'))
+    else:
+        almacen = AlmacenCSV(os.path.join(carpeta, 'comidas.csv'))
+    memoria_previa = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    total = importar_exportacion(almacen, exportacion)
+    print(f'Importación ({args.almacen}): {time.perf_counter() - inicio:.1f} s, {total} comidas, '
+          f'memoria máxima +{(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memoria_previa) / 1024:.0f} MB')
+
+    inicio = time.perf_counter()
+    dias = almacen.totales(date.min, date.max)
+    print(f'Totales: {len(dias)} días, {dias["Entradas"].sum():.0f} entradas '
+          f'({(time.perf_counter() - inicio) * 1000:.0f} ms)')
+
+
+if __name__ == '__main__':
+    main()
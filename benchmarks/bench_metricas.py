@@ -0,0 +1,75 @@
+"""Coste de un tramo de ``metricas`` sin medir y midiendo, comparado con un bloque vacío.
+
+Sin el panel de tiempos ni exportación, ``with tramo(...)`` debe costar lo
+mismo que un par de llamadas a función: una ejecución de página tiene unas
+decenas de tramos, así que incluso midiendo el total se queda en microsegundos.
+También mide cuánto tarda en generarse el texto para Prometheus.
+
+    python benchmarks/bench_metricas.py --veces 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet import metricas  # noqa: E402
+from pocket_diet.metricas import iniciar_ejecucion, registro, terminar_ejecucion, tramo  # noqa: E402
+
+
+class _Vacio:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+def _por_tramo(veces, crear):
+    inicio = time.perf_counter()
+    for _ in range(veces):
+        with crear('agregado', 'bench'):
+            pass
+    return (time.perf_counter() - inicio) / veces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--veces', type=int, default=200000)
+    parser.add_argument('--tramos', type=int, default=30, help='tramos por ejecución de página')
+    args = parser.parse_args()
+
+    if metricas.EXPORTAR:
+        print('Aviso: hay exportación activa en el entorno, "sin medir" también mide')
+    vacio = _Vacio()
+    base = _por_tramo(args.veces, lambda categoria, nombre: vacio)
+    iniciar_ejecucion('bench', medir=False)
+    sin_medir = _por_tramo(args.veces, tramo)
+    terminar_ejecucion()
+    iniciar_ejecucion('bench', medir=True)
+    # Sin guardar la lista entera de tramos en memoria: una ejecución nueva cada ``--tramos``
+    inicio = time.perf_counter()
+    for i in range(args.veces):
+        if i % args.tramos == 0:
+            terminar_ejecucion()
+            iniciar_ejecucion('bench', medir=True)
+        with tramo('agregado', 'bench'):
+            pass
+    midiendo = (time.perf_counter() - inicio) / args.veces
+    terminar_ejecucion()
+
+    inicio = time.perf_counter()
+    texto = registro.texto()
+    exportar = time.perf_counter() - inicio
+
+    print(f'bloque vacío:      {base * 1e9:>7.0f} ns')
+    print(f'tramo sin medir:   {sin_medir * 1e9:>7.0f} ns  (+{(sin_medir - base) * 1e9:.0f} ns)')
+    print(f'tramo midiendo:    {midiendo * 1e9:>7.0f} ns  (+{(midiendo - base) * 1e9:.0f} ns)')
+    print(f'{args.tramos} tramos por ejecución: {args.tramos * (sin_medir - base) * 1e6:.1f} µs sin medir, '
+          f'{args.tramos * (midiendo - base) * 1e6:.1f} µs midiendo')
+    print(f'texto Prometheus:  {exportar * 1000:.2f} ms, {len(texto.splitlines())} líneas')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Importa un volcado sintético de Open Food Facts y mide la latencia de búsqueda en la copia local.
+
+    python benchmarks/bench_off_local.py --productos 500000 --formato jsonl
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.off_local import EspejoOFF  # noqa: E402
+
+PALABRAS = ['leche', 'yogur', 'plátano', 'pan', 'arroz', 'pollo', 'atún', 'queso', 'avena', 'galletas',
+            'chocolate', 'zumo', 'naranja', 'tomate', 'jamón', 'pavo', 'huevos', 'aceite', 'nueces', 'café']
+MARCAS = ['Hacendado', 'Pascual', 'Danone', 'Carrefour', 'Central Lechera', 'Gullón', 'Calvo', 'Dia']
+BUSQUEDAS = ['leche', 'platano', 'yogur danone', 'pan hacen', 'atun calvo', 'jam', 'queso semi', 'zzz']
+
+
+def generar(ruta, productos, formato):
+    rng = random.Random(1)
+    with gzip.open(ruta, 'wt', encoding='utf-8') as f:
+        if formato == 'csv':
+            f.write('code\tproduct_name\tbrands\tcategories\tenergy-kcal_100g\tproteins_100g\tcarbohydrates_100g\tfat_100g\n')
+        for i in range(productos):
+            nombre = ' '.join(rng.sample(PALABRAS, 2)) + f' {rng.choice(["semi", "entero", "light", "bio"])}'
+            valores = [rng.uniform(20, 600), rng.uniform(0, 30), rng.uniform(0, 80), rng.uniform(0, 40)]
+            codigo = f'{8400000000000 + i}'
+            if formato == 'csv':
+                f.write('\t'.join([codigo, nombre, rng.choice(MARCAS), 'x,' * 20] + [f'{v:.1f}' for v in valores]) + '\n')
+            else:
+                f.write(json.dumps({
+                    'code': codigo, 'product_name': nombre, 'brands': rng.choice(MARCAS),
+                    'categories_tags': ['x'] * 20,
+                    'nutriments': dict(zip(['energy-kcal_100g', 'proteins_100g', 'carbohydrates_100g', 'fat_100g'], valores))
+                }) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--productos', type=int, default=200000)
+    parser.add_argument('--formato', choices=['jsonl', 'csv'], default='jsonl')
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    volcado = os.path.join(carpeta, f'volcado.{args.formato}.gz')
+    generar(volcado, args.productos, args.formato)
+    print(f'Volcado sintético: {args.productos} productos, {os.path.getsize(volcado) / 1e6:.1f} MB comprimido')
+
+    espejo = EspejoOFF(os.path.join(carpeta, 'off_local.db'))
+    inicio = time.perf_counter()
+    espejo.importar(volcado)
+    print(f'Importación: {time.perf_counter() - inicio:.1f} s, '
+          f'memoria máxima {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB, '
+          f'{espejo.total()} productos, base de {os.path.getsize(espejo.ruta) / 1e6:.1f} MB')
+
+    for texto in BUSQUEDAS:
+        tiempos = []
+        for _ in range(20):
+            inicio = time.perf_counter()
+            hits = espejo.buscar(texto)
+            tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        print(f'  {texto!r:<16} mediana {tiempos[10] * 1000:6.2f} ms  peor {tiempos[-1] * 1000:6.2f} ms  '
+              f'{len(hits)} resultados  {hits[0]["product_name"] if hits else ""}')
+    inicio = time.perf_counter()
+    espejo.producto(f'{8400000000000 + args.productos // 2}')
+    print(f'Por código de barras: {(time.perf_counter() - inicio) * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Compara la serie de TDEE vectorizada con un bucle ventana a ventana sobre un histórico sintético.
+
+    python benchmarks/bench_tdee.py --dias 3650
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.tendencia import KCAL_POR_KG, VENTANA_TDEE, series_tendencia, tdee_movil  # noqa: E402
+
+
+def tdee_bucle(df, ventana=VENTANA_TDEE):
+    """La misma cuenta día a día, recorriendo cada ventana: O(n·ventana)."""
+    tendencia = series_tendencia(df)['Tendencia']
+    dias = pd.date_range(tendencia.index[0], tendencia.index[-1])
+    tendencia = tendencia.reindex(dias).interpolate(method='time')
+    kcal = df.set_index(pd.DatetimeIndex(df['Fecha']))['Kcal'].reindex(dias)
+    valores = []
+    for i in range(len(dias)):
+        inicio = max(i - ventana + 1, 0)
+        registradas = kcal.iloc[inicio:i + 1].dropna()
+        if registradas.empty:
+            valores.append(np.nan)
+            continue
+        cambio = (tendencia.iloc[i] - tendencia.iloc[inicio]) / (i - inicio) if i > inicio else 0.0
+        valores.append(registradas.mean() - KCAL_POR_KG * cambio)
+    return pd.Series(valores, index=dias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dias', type=int, default=3650)
+    parser.add_argument('--huecos', type=float, default=0.3, help='fracción de días sin registro')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    fechas = pd.date_range('2015-01-01', periods=args.dias)
+    fechas = fechas[rng.random(args.dias) >= args.huecos]
+    df = pd.DataFrame({
+        'Fecha': fechas,
+        'Peso': 85 - np.arange(len(fechas)) * 0.005 + rng.normal(0, 0.4, len(fechas)),
+        'Kcal': rng.integers(1800, 2800, len(fechas)).astype(float)
+    })
+
+    inicio = time.perf_counter()
+    vectorizada = tdee_movil(df)
+    print(f'tdee_movil: {(time.perf_counter() - inicio) * 1000:.1f} ms para {len(vectorizada)} días')
+    inicio = time.perf_counter()
+    bucle = tdee_bucle(df)
+    print(f'bucle por ventana: {(time.perf_counter() - inicio) * 1000:.1f} ms')
+    print(f'diferencia máxima: {np.nanmax(np.abs(vectorizada.to_numpy() - bucle.to_numpy())):.2e} kcal')
+
+
+if __name__ == '__main__':
+    main()
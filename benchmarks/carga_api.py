@@ -0,0 +1,175 @@
+"""Prueba de carga de la API HTTP: peticiones por segundo y latencias con una mezcla realista.
+
+Arranca ``python -m pocket_diet.api`` en un proceso aparte (fijado a un solo
+núcleo si el sistema lo permite) sobre datos de ``datos_sinteticos.py``:
+``--alimentos`` en el catálogo, ``--comidas`` en el último año y un año de
+pesos. Después abre ``--conexiones`` conexiones keep-alive que lanzan
+peticiones sin pausa durante ``--segundos``: sobre todo totales y búsquedas
+en el catálogo, y algunas altas de comidas y pesajes. Sale con código 1 si hay
+errores o si no se llega a ``--minimo`` peticiones por segundo.
+
+    python benchmarks/carga_api.py --conexiones 16 --segundos 10 --backend sqlite
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from datos_sinteticos import BASES, generar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOY = date.today()
+# (peso en la mezcla, nombre, función que da método, ruta y cuerpo)
+MEZCLA = [
+    (30, 'totales/dia', lambda rng, n: ('GET', f'/totales/dia?fecha={_dia(rng)}', None)),
+    (20, 'totales/semana', lambda rng, n: ('GET', f'/totales/semana?fecha={_dia(rng)}', None)),
+    (25, 'catalogo', lambda rng, n: ('GET', f'/catalogo?q={rng.choice(BASES)[:rng.randint(3, 5)]}', None)),
+    (10, 'tendencia', lambda rng, n: ('GET', '/tendencia', None)),
+    (10, 'POST comidas', lambda rng, n: ('POST', '/comidas', {
+        'Fecha': HOY.isoformat(), 'Tipo': 'Snack', 'Comida': f'Carga {n}', 'Gramos': 100,
+        'Kcal_100g': 250, 'Proteínas_100g': 10, 'Carbs_100g': 30, 'Grasas_100g': 8
+    })),
+    (5, 'PUT pesos', lambda rng, n: ('PUT', f'/pesos/{_dia(rng, 30)}', {
+        'Peso': round(rng.uniform(75, 80), 1), 'Kcal': rng.randint(1800, 2600)
+    })),
+]
+
+
+def _dia(rng, dias=90):
+    return (HOY - timedelta(days=rng.randrange(dias))).isoformat()
+
+
+def arrancar_servidor(carpeta, backend, hilos, nucleo):
+    entorno = dict(os.environ, POCKET_DIET_ALMACEN=backend)
+    if nucleo is not None and hasattr(os, 'sched_setaffinity'):
+        def fijar():
+            os.sched_setaffinity(0, {nucleo})
+    else:
+        fijar = None
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'pocket_diet.api', '--carpeta', carpeta, '--puerto', '0', '--hilos', str(hilos)],
+        cwd=RAIZ, env=entorno, stdout=subprocess.PIPE, text=True, preexec_fn=fijar
+    )
+    linea = proceso.stdout.readline()
+    if not linea.startswith('Escuchando'):
+        proceso.kill()
+        raise RuntimeError('El servidor no ha arrancado')
+    return proceso, int(linea.rsplit(':', 1)[1])
+
+
+def cpu_proceso(pid):
+    """Segundos de CPU (usuario + sistema) que lleva el proceso, o None fuera de Linux."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            campos = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    return (int(campos[11]) + int(campos[12])) / os.sysconf('SC_CLK_TCK')
+
+
+async def _peticion(reader, writer, metodo, ruta, datos):
+    cuerpo = b'' if datos is None else json.dumps(datos).encode('utf-8')
+    writer.write(
+        f'{metodo} {ruta} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(cuerpo)}\r\n\r\n'.encode('latin-1') + cuerpo
+    )
+    cabecera = await reader.readuntil(b'\r\n\r\n')
+    lineas = cabecera.decode('latin-1').split('\r\n')
+    estado = int(lineas[0].split(' ')[1])
+    largo = next(int(l.split(':', 1)[1]) for l in lineas if l.lower().startswith('content-length'))
+    await reader.readexactly(largo)
+    return estado
+
+
+async def _cliente(puerto, semilla, fin, medidas, errores, contador):
+    rng = random.Random(semilla)
+    pesos = [m[0] for m in MEZCLA]
+    reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+    try:
+        while time.perf_counter() < fin:
+            _, nombre, peticion = rng.choices(MEZCLA, pesos)[0]
+            contador[0] += 1
+            metodo, ruta, datos = peticion(rng, f'{semilla}-{contador[0]}')
+            inicio = time.perf_counter()
+            estado = await _peticion(reader, writer, metodo, ruta, datos)
+            medidas.setdefault(nombre, []).append(time.perf_counter() - inicio)
+            if estado >= 400:
+                errores.append(f'{metodo} {ruta}: {estado}')
+    finally:
+        writer.close()
+
+
+async def cargar(puerto, conexiones, segundos):
+    """{endpoint: [latencias]}, errores y segundos transcurridos."""
+    medidas, errores, contador = {}, [], [0]
+    inicio = time.perf_counter()
+    await asyncio.gather(*[
+        _cliente(puerto, i, inicio + segundos, medidas, errores, contador) for i in range(conexiones)
+    ])
+    return medidas, errores, time.perf_counter() - inicio
+
+
+def _linea(nombre, latencias, segundos):
+    ms = np.percentile(np.array(latencias) * 1000, [50, 95, 99])
+    return f'{nombre:16} {len(latencias):>7} {len(latencias) / segundos:>8.0f} {ms[0]:>7.1f} {ms[1]:>7.1f} {ms[2]:>7.1f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--conexiones', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--backend', choices=['sqlite', 'csv'], default='sqlite')
+    parser.add_argument('--hilos', type=int, default=4, help='hilos del servidor')
+    parser.add_argument('--alimentos', type=int, default=10000, help='alimentos en el catálogo')
+    parser.add_argument('--comidas', type=int, default=5000, help='comidas en el último año')
+    parser.add_argument('--nucleo', type=int, default=0, help='núcleo al que se fija el servidor (-1 para no fijarlo)')
+    parser.add_argument('--minimo', type=float, default=200, help='peticiones por segundo exigidas')
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    proceso = None
+    try:
+        generar(carpeta, dias=365, comidas=args.comidas, alimentos=args.alimentos, hasta=HOY)
+        proceso, puerto = arrancar_servidor(carpeta, args.backend, args.hilos, None if args.nucleo < 0 else args.nucleo)
+        # Una vuelta corta para calentar cachés (índice del catálogo, totales, estado de la tendencia)
+        asyncio.run(cargar(puerto, 2, 1))
+        cpu_previa = cpu_proceso(proceso.pid)
+        medidas, errores, segundos = asyncio.run(cargar(puerto, args.conexiones, args.segundos))
+        cpu = None if cpu_previa is None else cpu_proceso(proceso.pid) - cpu_previa
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    todas = [t for latencias in medidas.values() for t in latencias]
+    print(f'{args.backend}, {args.conexiones} conexiones, {segundos:.1f} s')
+    print(f"{'endpoint':16} {'total':>7} {'pet/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for nombre in sorted(medidas):
+        print(_linea(nombre, medidas[nombre], segundos))
+    print(_linea('todas', todas, segundos))
+    if cpu:
+        # Con cliente y servidor en la misma máquina, lo que aguantaría el servidor con un núcleo para él
+        print(f'CPU del servidor: {cpu / len(todas) * 1000:.2f} ms por petición, '
+              f'~{len(todas) / cpu:.0f} pet/s por núcleo')
+    problemas = []
+    if errores:
+        problemas.append(f'{len(errores)} errores, p. ej. {errores[0]}')
+    if len(todas) / segundos < args.minimo:
+        problemas.append(f'menos de {args.minimo:.0f} pet/s')
+    for problema in problemas:
+        print(f'  ✗ {problema}')
+    sys.exit(1 if problemas else 0)
+
+
+if __name__ == '__main__':
+    main()
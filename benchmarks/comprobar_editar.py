@@ -0,0 +1,115 @@
+"""Comprueba que editar y eliminar actúan sobre la comida elegida aunque haya otra idéntica ese día.
+
+Crea un diario con dos comidas iguales (mismo nombre y marca) en el día de
+hoy, abre el food log con el AppTest de Streamlit, elige la primera y la
+edita; después elige otra vez la primera y la elimina. En los dos casos la
+segunda tiene que quedar intacta. Sale con código 1 si no.
+
+    python benchmarks/comprobar_editar.py --backend csv
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, 'pocket_diet_food_log_final.py')
+
+
+def _diario(carpeta):
+    hoy = date.today().isoformat()
+    pd.DataFrame({
+        'ID': [0, 1, 2],
+        'Fecha': [hoy, hoy, hoy],
+        'Tipo': ['Desayuno', 'Desayuno', 'Comida'],
+        'Comida': ['Yogur griego', 'Yogur griego', 'Arroz'],
+        'Marca': ['Hacendado', 'Hacendado', ''],
+        'Gramos': [125, 125, 200],
+        'Kcal': [150, 150, 260],
+        'Proteínas': [7, 7, 5],
+        'Carbs': [5, 5, 56],
+        'Grasas': [12, 12, 1]
+    }).to_csv(os.path.join(carpeta, 'comidas.csv'), index=False)
+
+
+def _elegir_primera(at):
+    selector = next(s for s in at.selectbox if s.label == 'Selecciona comida para editar/eliminar')
+    iguales = [i for i in selector.options if i.startswith('Yogur griego')]
+    if len(set(iguales)) != 2:
+        return None, f'etiquetas repetidas en el selector: {iguales}'
+    # Las opciones van en el orden del día: la primera de las dos es la de menor ID
+    return selector.select_index(selector.options.index(iguales[0])).run(), None
+
+
+def _boton(at, texto):
+    return next(b for b in at.button if b.label == texto).click().run()
+
+
+def _comidas(almacen):
+    return almacen.dia(date.today()).sort_index()
+
+
+def comprobar(backend):
+    """Lista de problemas encontrados (vacía si todo va bien)."""
+    from streamlit.testing.v1 import AppTest
+
+    from pocket_diet.almacen import abrir_almacen
+
+    carpeta = tempfile.mkdtemp()
+    previa = os.getcwd()
+    os.environ['POCKET_DIET_ALMACEN'] = backend
+    os.chdir(carpeta)
+    try:
+        _diario(carpeta)
+        at = AppTest.from_file(APP, default_timeout=60).run()
+        antes = _comidas(abrir_almacen('comidas.csv', 'catalogo_comidas.csv'))
+        primera, segunda = antes.index[antes['Comida'] == 'Yogur griego'][:2]
+
+        at, problema = _elegir_primera(at)
+        if problema:
+            return [problema]
+        at.text_input(key='edit_nombre').input('Yogur griego editado').run()
+        at = _boton(at, 'Guardar cambios')
+        despues = _comidas(abrir_almacen('comidas.csv', 'catalogo_comidas.csv'))
+        problemas = []
+        if despues.loc[primera, 'Comida'] != 'Yogur griego editado' or despues.loc[segunda, 'Comida'] != 'Yogur griego':
+            problemas.append(f'editar: se cambió la comida equivocada ({list(despues["Comida"])})')
+
+        # Se devuelve el nombre para tener otra vez dos iguales y se elimina la primera
+        abrir_almacen('comidas.csv', 'catalogo_comidas.csv').actualizar(primera, {'Comida': 'Yogur griego'})
+        at, problema = _elegir_primera(AppTest.from_file(APP, default_timeout=60).run())
+        if problema:
+            return problemas + [problema]
+        _boton(at, 'Eliminar comida')
+        despues = _comidas(abrir_almacen('comidas.csv', 'catalogo_comidas.csv'))
+        if primera in despues.index or segunda not in despues.index:
+            problemas.append(f'eliminar: quedan los IDs {list(despues.index)}, se eligió {primera}')
+        return problemas
+    finally:
+        os.chdir(previa)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['csv', 'sqlite'], action='append',
+                        help='almacén a comprobar (se puede repetir; por defecto los dos)')
+    args = parser.parse_args()
+    sys.path.insert(0, RAIZ)
+
+    fallos = 0
+    for backend in args.backend or ['csv', 'sqlite']:
+        problemas = comprobar(backend)
+        print(f"{backend:7} {'✓' if not problemas else '✗'}")
+        for problema in problemas:
+            print(f'  ✗ {problema}')
+        fallos += len(problemas)
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Genera una carpeta de datos sintéticos con el formato de las apps, siempre la misma para la misma semilla.
+
+Escribe datos_peso.csv (un pesaje al día, con algún hueco), comidas.csv (con
+su columna ID, como queda tras compactar el diario) y catalogo_comidas.csv.
+Con los mismos parámetros, semilla y ``--hasta`` los archivos salen iguales
+byte a byte, así que las medidas de dos commits se hacen sobre los mismos
+datos. Por defecto ``--hasta`` es hoy, para que los últimos meses caigan en
+el nivel caliente del histórico igual que con datos reales.
+
+    python benchmarks/datos_sinteticos.py /tmp/datos --dias 3650 --comidas 200000 --alimentos 100000
+"""
+import argparse
+import hashlib
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+DIAS = 3650
+COMIDAS = 200000
+ALIMENTOS = 100000
+BASES = ['Arroz', 'Pollo', 'Avena', 'Yogur', 'Plátano', 'Huevo', 'Atún', 'Pan', 'Leche', 'Manzana', 'Lentejas',
+         'Pasta', 'Queso', 'Almendras', 'Salmón', 'Pavo', 'Garbanzos', 'Tomate', 'Patata', 'Aceite', 'Nueces',
+         'Galletas', 'Cereales', 'Chocolate', 'Ternera', 'Merluza', 'Espinacas', 'Naranja', 'Kéfir', 'Tofu']
+VARIANTES = ['natural', 'integral', 'light', 'griego', 'cocido', 'crudo', 'a la plancha', 'en conserva',
+             'desnatado', 'sin azúcar', 'ecológico', 'tostado', 'al horno', 'con sal', 'fresco', 'congelado']
+MARCAS = ['', 'Hacendado', 'Carrefour', 'Danone', 'Calvo', 'Gallo', 'Pascual', 'Central Lechera', 'Kellogg',
+          'Bimbo', 'Dia', 'Eroski', 'Alcampo', 'Nestlé', 'Puleva', 'Isabel', 'Helios', 'La Masía']
+TIPOS = ['Desayuno', 'Comida', 'Cena', 'Snack']
+ARCHIVOS = ['datos_peso.csv', 'comidas.csv', 'catalogo_comidas.csv']
+
+
+def generar(carpeta, dias=DIAS, comidas=COMIDAS, alimentos=ALIMENTOS, semilla=1, hasta=None):
+    """Escribe los tres CSV en ``carpeta`` y devuelve la fecha final usada."""
+    rng = np.random.default_rng(semilla)
+    hasta = pd.Timestamp(hasta or date.today()).normalize()
+    fechas = pd.date_range(end=hasta, periods=dias)
+    os.makedirs(carpeta, exist_ok=True)
+
+    # Catálogo: nombres repetibles con un número para que (Comida, Marca) no se repita
+    base = rng.integers(0, len(BASES), alimentos)
+    variante = rng.integers(0, len(VARIANTES), alimentos)
+    marca = rng.integers(0, len(MARCAS), alimentos)
+    codigos = (8400000000000 + rng.permutation(alimentos)).astype(str).astype(object)
+    # Uno de cada cinco sin código de barras, como los añadidos a mano
+    codigos[rng.random(alimentos) < 0.2] = None
+    catalogo = pd.DataFrame({
+        'Comida': [f'{BASES[b]} {VARIANTES[v]} {i}' for i, (b, v) in enumerate(zip(base, variante))],
+        'Marca': np.array(MARCAS, dtype=object)[marca],
+        'Kcal_100g': rng.integers(10, 900, alimentos),
+        'Proteínas_100g': rng.integers(0, 40, alimentos),
+        'Carbs_100g': rng.integers(0, 90, alimentos),
+        'Grasas_100g': rng.integers(0, 60, alimentos),
+        'Codigo': codigos
+    })
+    catalogo.to_csv(os.path.join(carpeta, 'catalogo_comidas.csv'), index=False)
+
+    # Comidas: alimentos del catálogo con sus kcal y macros por gramos, ordenadas por fecha
+    dia = np.sort(rng.integers(0, dias, comidas))
+    elegido = rng.integers(0, alimentos, comidas)
+    gramos = rng.integers(10, 400, comidas)
+    df_comidas = pd.DataFrame({
+        'ID': np.arange(comidas),
+        'Fecha': fechas[dia].strftime('%Y-%m-%d'),
+        'Tipo': np.array(TIPOS, dtype=object)[rng.integers(0, len(TIPOS), comidas)],
+        'Comida': catalogo['Comida'].to_numpy()[elegido],
+        'Marca': catalogo['Marca'].to_numpy()[elegido],
+        'Gramos': gramos
+    })
+    for macro in ['Kcal', 'Proteínas', 'Carbs', 'Grasas']:
+        df_comidas[macro] = np.round(catalogo[f'{macro}_100g'].to_numpy()[elegido] * gramos / 100, 1)
+    df_comidas.to_csv(os.path.join(carpeta, 'comidas.csv'), index=False)
+
+    # Pesos: una tendencia que baja y sube despacio con ruido diario; un 5 % de días sin pesarse
+    tendencia = 90 + np.cumsum(rng.normal(-0.004, 0.05, dias))
+    pesos = pd.DataFrame({
+        'Fecha': fechas,
+        'Peso': np.round(tendencia + rng.normal(0, 0.4, dias), 1),
+        'Kcal': rng.integers(1600, 3000, dias).astype(float)
+    })[rng.random(dias) >= 0.05]
+    pesos.to_csv(os.path.join(carpeta, 'datos_peso.csv'), index=False)
+    return hasta.date()
+
+
+def huella(carpeta):
+    """SHA-256 de los tres CSV, para comprobar que dos medidas usaron los mismos datos."""
+    sha = hashlib.sha256()
+    for nombre in ARCHIVOS:
+        with open(os.path.join(carpeta, nombre), 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloque)
+    return sha.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('carpeta')
+    parser.add_argument('--dias', type=int, default=DIAS, help='días de pesos (y de comidas)')
+    parser.add_argument('--comidas', type=int, default=COMIDAS)
+    parser.add_argument('--alimentos', type=int, default=ALIMENTOS)
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--hasta', help='última fecha AAAA-MM-DD (hoy por defecto)')
+    args = parser.parse_args()
+
+    hasta = generar(args.carpeta, args.dias, args.comidas, args.alimentos, args.semilla, args.hasta)
+    for nombre in ARCHIVOS:
+        ruta = os.path.join(args.carpeta, nombre)
+        print(f'{nombre:22} {os.path.getsize(ruta) / 1e6:>7.1f} MB')
+    print(f'hasta {hasta}, huella {huella(args.carpeta)[:16]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Prueba de estrés: N procesos con varios hilos escriben a la vez y no se pierde nada.
+
+Cada proceso abre su propio almacén (como un servidor de Streamlit) y lanza
+``--hilos`` hilos (como sesiones) que añaden comidas, editan una de cada
+cinco, guardan alimentos en el catálogo y registran pesos en fechas
+distintas. El diario del CSV se compacta cada pocos cambios para que las
+compactaciones coincidan con escrituras de otros procesos. Con ``--matar``
+uno de los procesos se mata a mitad; sus filas pueden faltar, pero los
+archivos tienen que seguir leyéndose y las de los demás tienen que estar
+todas. Sale con código 1 si falta o sobra algo.
+
+    python benchmarks/estres_escrituras.py --procesos 8 --hilos 4 --escrituras 50 --matar
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_diet.almacen import AlmacenCSV, AlmacenSQLite  # noqa: E402
+from pocket_diet.historico import HistoricoPesos  # noqa: E402
+
+FECHA_BASE = pd.Timestamp('2020-01-01')
+
+
+def _abrir(backend, carpeta):
+    if backend == 'csv':
+        almacen = AlmacenCSV(os.path.join(carpeta, 'comidas.csv'), os.path.join(carpeta, 'catalogo_comidas.csv'))
+        # Compactar a menudo para que choque con las escrituras de los demás
+        almacen.diario.umbral = 20
+        return almacen
+    return AlmacenSQLite(os.path.join(carpeta, 'pocket_diet.db'))
+
+
+def _escritor(backend, carpeta, proceso, hilos, escrituras, dias_por_proceso):
+    almacen = _abrir(backend, carpeta)
+    historico = HistoricoPesos(os.path.join(carpeta, 'datos_peso.csv'))
+
+    def sesion(hilo):
+        for j in range(escrituras):
+            nombre = f'p{proceso}-h{hilo}-{j}'
+            fila = almacen.insertar(pd.DataFrame({
+                'Fecha': [FECHA_BASE.date()], 'Tipo': ['Comida'], 'Comida': [nombre], 'Marca': ['estres'],
+                'Gramos': [100], 'Kcal': [j], 'Proteínas': [1], 'Carbs': [1], 'Grasas': [1]
+            }))
+            if j % 5 == 0:
+                almacen.actualizar(fila.index[0], {'Kcal': -1})
+            if j % 10 == 0:
+                almacen.guardar_en_catalogo(pd.DataFrame({
+                    'Comida': [nombre], 'Marca': ['estres'], 'Kcal_100g': [j], 'Proteínas_100g': [1],
+                    'Carbs_100g': [1], 'Grasas_100g': [1]
+                }))
+            dia = proceso * dias_por_proceso + hilo * escrituras + j
+            historico.registrar(FECHA_BASE + pd.Timedelta(days=dia), 70 + j / 100, 2000)
+
+    hilos_sesion = [threading.Thread(target=sesion, args=(h,)) for h in range(hilos)]
+    for hilo in hilos_sesion:
+        hilo.start()
+    for hilo in hilos_sesion:
+        hilo.join()
+
+
+def comprobar(backend, carpeta, procesos, hilos, escrituras, muerto=None):
+    """Lista de problemas encontrados al releer todo desde cero (vacía si está bien)."""
+    almacen = _abrir(backend, carpeta)
+    comidas = almacen.rango(FECHA_BASE.date(), FECHA_BASE.date())
+    catalogo = almacen.catalogo()
+    pesos = HistoricoPesos(os.path.join(carpeta, 'datos_peso.csv')).cargar()
+    problemas = []
+    if comidas.index.has_duplicates:
+        problemas.append('IDs de comida repetidos')
+    for nombre, df, esperadas in [
+        ('comidas', comidas['Comida'], escrituras),
+        ('catálogo', catalogo['Comida'], len(range(0, escrituras, 10))),
+    ]:
+        por_proceso = df.str.extract(r'^p(\d+)-', expand=False).astype(float).value_counts()
+        for proceso in range(procesos):
+            encontradas = int(por_proceso.get(proceso, 0))
+            if proceso == muerto:
+                if encontradas > hilos * esperadas:
+                    problemas.append(f'{nombre}: el proceso matado tiene {encontradas} filas, más de las posibles')
+            elif encontradas != hilos * esperadas:
+                problemas.append(f'{nombre}: proceso {proceso} tiene {encontradas} de {hilos * esperadas}')
+        if df.duplicated().any():
+            problemas.append(f'{nombre}: filas duplicadas')
+    partes = comidas['Comida'].str.extract(r'^p(\d+)-.*-(\d+)$').astype(int)
+    # El proceso matado puede haber muerto entre añadir una comida y editarla
+    editadas = comidas[(partes[1] % 5 == 0) & (partes[0] != muerto)]
+    if (editadas['Kcal'] != -1).any():
+        problemas.append(f"{int((editadas['Kcal'] != -1).sum())} ediciones perdidas")
+    vivos = procesos - (muerto is not None)
+    if len(pesos) < vivos * hilos * escrituras or pesos['Fecha'].duplicated().any():
+        problemas.append(f'pesos: {len(pesos)} registros, se esperaban al menos {vivos * hilos * escrituras} sin repetir')
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--procesos', type=int, default=8)
+    parser.add_argument('--hilos', type=int, default=4, help='sesiones por proceso')
+    parser.add_argument('--escrituras', type=int, default=50, help='comidas por sesión')
+    parser.add_argument('--backend', choices=['csv', 'sqlite', 'ambos'], default='ambos')
+    parser.add_argument('--matar', action='store_true', help='mata el proceso 0 a mitad de sus escrituras')
+    args = parser.parse_args()
+
+    contexto = multiprocessing.get_context('spawn')
+    fallos = 0
+    for backend in (['csv', 'sqlite'] if args.backend == 'ambos' else [args.backend]):
+        carpeta = tempfile.mkdtemp()
+        dias_por_proceso = args.hilos * args.escrituras
+        trabajos = [
+            contexto.Process(target=_escritor, args=(backend, carpeta, p, args.hilos, args.escrituras, dias_por_proceso))
+            for p in range(args.procesos)
+        ]
+        inicio = time.perf_counter()
+        for trabajo in trabajos:
+            trabajo.start()
+        muerto = None
+        if args.matar:
+            # Cuando el proceso 0 ya ha escrito algo, para que muera con escrituras en curso
+            ruta = os.path.join(carpeta, 'comidas.csv.diario' if backend == 'csv' else 'pocket_diet.db')
+            while not os.path.exists(ruta) and trabajos[0].is_alive():
+                time.sleep(0.01)
+            time.sleep(0.5)
+            trabajos[0].kill()
+            muerto = 0
+        for trabajo in trabajos:
+            trabajo.join()
+        segundos = time.perf_counter() - inicio
+        problemas = comprobar(backend, carpeta, args.procesos, args.hilos, args.escrituras, muerto)
+        total = args.procesos * args.hilos * args.escrituras
+        print(f'{backend}: {args.procesos} procesos x {args.hilos} hilos, {total} comidas en {segundos:.1f} s '
+              f'({total / segundos:.0f}/s){" [proceso 0 matado]" if muerto is not None else ""}')
+        for problema in problemas:
+            print(f'  ✗ {problema}')
+        if not problemas:
+            print('  ✓ no se ha perdido ninguna fila')
+        fallos += bool(problemas)
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == '__main__':
+    main()
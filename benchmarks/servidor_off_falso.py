@@ -0,0 +1,107 @@
+"""Servidor local que imita la API de Open Food Facts, con latencia y fallos inyectados.
+
+    python benchmarks/servidor_off_falso.py --puerto 8765 --latencia 0.2 --fallos 0.1
+
+y después OFF_URL=http://127.0.0.1:8765 para que la app lo use.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def _producto(codigo, nombre):
+    return {
+        'code': codigo,
+        'product_name': nombre,
+        'brands': 'Marca de prueba',
+        'categories': 'relleno, ' * 50,
+        'ingredients_text': 'relleno ' * 200,
+        'nutriments': {
+            'energy-kcal_100g': 100 + int(codigo[-2:]),
+            'proteins_100g': 5.0,
+            'carbohydrates_100g': 12.5,
+            'fat_100g': 3.2,
+            'salt_100g': 0.1,
+            'sugars_100g': 4.0
+        }
+    }
+
+
+def _recortar(producto, campos):
+    if not campos:
+        return producto
+    return {c: producto[c] for c in campos.split(',') if c in producto}
+
+
+class ManejadorOFF(BaseHTTPRequestHandler):
+    latencia = 0.0
+    fallos = 0.0
+    peticiones = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with ManejadorOFF.lock:
+            ManejadorOFF.peticiones += 1
+        time.sleep(self.latencia)
+        if random.random() < self.fallos:
+            self._responder(503, {'error': 'sobrecarga'})
+            return
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        campos = params.get('fields')
+        if url.path.startswith('/api/v2/product/'):
+            codigo = url.path.rsplit('/', 1)[-1].split('.')[0]
+            if not codigo.isdigit():
+                self._responder(404, {'status': 0})
+                return
+            self._responder(200, {'status': 1, 'code': codigo, 'product': _recortar(_producto(codigo, f'Producto {codigo}'), campos)})
+        elif url.path == '/cgi/search.pl':
+            termino = params.get('search_terms', '')
+            pagina = int(params.get('page', 1))
+            tam = int(params.get('page_size', 5))
+            productos = [
+                _recortar(_producto(f'84{pagina:05d}{i:06d}', f'{termino} {pagina}-{i}'), campos)
+                for i in range(tam)
+            ]
+            self._responder(200, {'count': tam * 10, 'page': pagina, 'products': productos})
+        else:
+            self._responder(404, {})
+
+    def _responder(self, estado, datos):
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(estado)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def arrancar(puerto=0, latencia=0.0, fallos=0.0):
+    """Arranca el servidor en un hilo y lo devuelve; la URL es http://127.0.0.1:<server_port>."""
+    ManejadorOFF.latencia = latencia
+    ManejadorOFF.fallos = fallos
+    servidor = ThreadingHTTPServer(('127.0.0.1', puerto), ManejadorOFF)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--latencia', type=float, default=0.2, help='segundos por respuesta')
+    parser.add_argument('--fallos', type=float, default=0.0, help='fracción de respuestas 503')
+    args = parser.parse_args()
+    servidor = arrancar(args.puerto, args.latencia, args.fallos)
+    print(f'Servidor OFF falso en http://127.0.0.1:{servidor.server_port}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
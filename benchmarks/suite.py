@@ -0,0 +1,354 @@
+"""Mide todos los caminos calientes de las apps sobre datos sintéticos y guarda los tiempos en JSON.
+
+Genera (o copia de ``--datos``) una carpeta con ``datos_sinteticos.py``, 10
+años de pesos, 200 000 comidas y 100 000 alimentos por defecto, y cronometra
+cada escenario ``--repeticiones`` veces con la preparación fuera de la
+medida: carga de CSV con sus fechas, filtrado del día, «Totales últimos 7
+días», búsqueda en el catálogo, guardado en el catálogo con su deduplicado,
+el bloque de tendencia/TDEE/resúmenes del registro de peso y la preparación
+de los datos de las gráficas. Los escenarios con almacén se miden con CSV y
+con SQLite.
+
+Con ``--salida`` se escribe un JSON con la mediana, el mínimo y todos los
+tiempos de cada escenario, más el commit, las versiones y la huella de los
+datos. ``--comparar`` lee otro JSON igual y sale con código 1 si el mínimo
+de algún escenario (lo menos sensible al ruido de la máquina) es más de
+``--tolerancia`` veces el de entonces:
+
+    python benchmarks/suite.py --salida base.json
+    python benchmarks/suite.py --comparar base.json --salida nuevo.json
+    python benchmarks/suite.py --escala 0.1 --solo catalogo
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datos_sinteticos import ALIMENTOS, ARCHIVOS, COMIDAS, DIAS, generar, huella  # noqa: E402
+from pocket_diet.almacen import AlmacenCSV, AlmacenSQLite  # noqa: E402
+from pocket_diet.buscador import IndiceCatalogo  # noqa: E402
+from pocket_diet.diario import DiarioComidas  # noqa: E402
+from pocket_diet.esquema import leer_catalogo  # noqa: E402
+from pocket_diet.graficas import datos_grafica  # noqa: E402
+from pocket_diet.historico import HistoricoPesos  # noqa: E402
+from pocket_diet.resumenes import ResumenesPeso, comparativa  # noqa: E402
+from pocket_diet.tendencia import VENTANA_TDEE, TendenciaPeso, tdee_movil  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOLERANCIA = 1.25
+BUSQUEDAS = ['arroz', 'yogur griego', 'pollo plancha', 'hacendado leche', 'almendras tostado', 'platano',
+             'galetas', 'salmon', 'kefir natural', 'atun en conserva']
+
+# nombre -> función(datos) que prepara el escenario y devuelve la función a cronometrar (recibe la repetición)
+ESCENARIOS = {}
+
+
+def escenario(nombre):
+    def registrar(funcion):
+        ESCENARIOS[nombre] = funcion
+        return funcion
+    return registrar
+
+
+class Datos:
+    """La carpeta de trabajo y lo que comparten los escenarios, creado la primera vez que se pide."""
+
+    def __init__(self, carpeta, hasta):
+        self.carpeta = carpeta
+        self.hasta = hasta
+        self._almacenes = {}
+        self._historico = None
+
+    def ruta(self, nombre):
+        return os.path.join(self.carpeta, nombre)
+
+    def fechas(self, n, dias=365):
+        """``n`` fechas repartidas en el último año, las mismas en cada ejecución."""
+        return [self.hasta - timedelta(days=int(d)) for d in np.linspace(0, dias - 1, n)]
+
+    def almacen(self, backend):
+        """Almacén ya cargado; las escrituras van sobre una copia propia de los archivos."""
+        if backend not in self._almacenes:
+            carpeta = os.path.join(self.carpeta, backend)
+            os.makedirs(carpeta)
+            for nombre in ['comidas.csv', 'catalogo_comidas.csv']:
+                shutil.copy(self.ruta(nombre), carpeta)
+            comidas, catalogo = os.path.join(carpeta, 'comidas.csv'), os.path.join(carpeta, 'catalogo_comidas.csv')
+            if backend == 'csv':
+                almacen = AlmacenCSV(comidas, catalogo)
+            else:
+                almacen = AlmacenSQLite(os.path.join(carpeta, 'pocket_diet.db'))
+                almacen.importar_csv(comidas, catalogo)
+            almacen.dia(self.hasta)
+            almacen.buscar_catalogo('arroz')
+            self._almacenes[backend] = almacen
+        return self._almacenes[backend]
+
+    def historico(self):
+        """Histórico ya migrado por niveles, como lo deja la app al abrirlo por primera vez."""
+        if self._historico is None:
+            self._historico = HistoricoPesos(self.ruta('datos_peso.csv'))
+            self._historico.archivar_antiguos()
+        return self._historico
+
+
+# ---------- CARGA ----------
+@escenario('carga/comidas_csv')
+def _carga_comidas(datos):
+    """comidas.csv entero con su diario y las fechas parseadas (DiarioComidas.cargar)."""
+    return lambda i: DiarioComidas(datos.ruta('comidas.csv')).cargar()
+
+
+@escenario('carga/catalogo_csv')
+def _carga_catalogo(datos):
+    return lambda i: leer_catalogo(datos.ruta('catalogo_comidas.csv'))
+
+
+@escenario('carga/pesos_completo')
+def _carga_pesos(datos):
+    """Todo el histórico de peso (nivel caliente + meses archivados) con un objeto recién creado."""
+    datos.historico()
+    return lambda i: HistoricoPesos(datos.ruta('datos_peso.csv')).cargar()
+
+
+@escenario('carga/pesos_caliente')
+def _carga_pesos_caliente(datos):
+    """Solo el nivel caliente, lo que lee la pestaña de introducir datos."""
+    datos.historico()
+    return lambda i: HistoricoPesos(datos.ruta('datos_peso.csv')).caliente()
+
+
+# ---------- DÍA Y SEMANA ----------
+def _dia(backend):
+    def preparar(datos):
+        almacen = datos.almacen(backend)
+        fechas = datos.fechas(50)
+        return lambda i: almacen.dia(fechas[i % len(fechas)])
+    return preparar
+
+
+def _semana(backend):
+    def preparar(datos):
+        """Lo que calcula el panel «Totales últimos 7 días»."""
+        almacen = datos.almacen(backend)
+        fechas = datos.fechas(50)
+
+        def medir(i):
+            fecha = fechas[i % len(fechas)]
+            return almacen.totales(fecha - timedelta(days=6), fecha)[['Kcal', 'Proteínas', 'Carbs', 'Grasas']].mean()
+        return medir
+    return preparar
+
+
+# ---------- CATÁLOGO ----------
+def _buscar(backend):
+    def preparar(datos):
+        almacen = datos.almacen(backend)
+        return lambda i: almacen.buscar_catalogo(BUSQUEDAS[i % len(BUSQUEDAS)])
+    return preparar
+
+
+def _guardar(backend):
+    def preparar(datos):
+        """Un alimento nuevo y otro que ya está (se actualiza en lugar de duplicarse), de una vez."""
+        almacen = datos.almacen(backend)
+        existente = almacen.catalogo().iloc[0]
+
+        def medir(i):
+            return almacen.guardar_en_catalogo(pd.DataFrame({
+                'Comida': [f'Nuevo {backend} {i}', existente['Comida']],
+                'Marca': ['Suite', existente['Marca']],
+                'Kcal_100g': [100 + i, 200 + i],
+                'Proteínas_100g': [5, 6],
+                'Carbs_100g': [10, 11],
+                'Grasas_100g': [1, 2],
+                'Codigo': [None, existente['Codigo']]
+            }))
+        return medir
+    return preparar
+
+
+for _backend in ['csv', 'sqlite']:
+    escenario(f'dia/{_backend}')(_dia(_backend))
+    escenario(f'semana/{_backend}')(_semana(_backend))
+    escenario(f'catalogo/buscar_{_backend}')(_buscar(_backend))
+    escenario(f'catalogo/guardar_{_backend}')(_guardar(_backend))
+
+
+@escenario('catalogo/indice')
+def _indice(datos):
+    """Índice de búsqueda del catálogo completo, lo que cuesta la primera búsqueda."""
+    catalogo = leer_catalogo(datos.ruta('catalogo_comidas.csv'))
+    return lambda i: IndiceCatalogo(catalogo)
+
+
+# ---------- PESO ----------
+@escenario('peso/tendencia')
+def _tendencia(datos):
+    """Recalcular la tendencia y el TDEE con todo el histórico (TendenciaPeso.recalcular)."""
+    tendencia = TendenciaPeso(datos.historico(), datos.ruta('tendencia_suite.json'))
+    return lambda i: tendencia.recalcular()
+
+
+@escenario('peso/resumenes')
+def _resumenes(datos):
+    """Resúmenes semanales y mensuales desde cero (ResumenesPeso.recalcular)."""
+    resumenes = ResumenesPeso(datos.historico(), datos.ruta('resumenes_suite.json'))
+    return lambda i: resumenes.recalcular()
+
+
+@escenario('peso/bloque_resumen')
+def _bloque_resumen(datos):
+    """La pestaña de resumen con todo el histórico como rango: carga, filtro, media móvil, TDEE y comparativa."""
+    historico = datos.historico()
+    tendencia = TendenciaPeso(historico, datos.ruta('tendencia_bloque.json'))
+    resumenes = ResumenesPeso(historico, datos.ruta('resumenes_bloque.json'))
+    tendencia.estado()
+    desde, hasta, _ = historico.limites()
+
+    def medir(i):
+        df = historico.cargar(desde=desde - pd.Timedelta(days=VENTANA_TDEE))
+        df_rango = df[df['Fecha'].between(desde, hasta)].copy()
+        tendencia.estado()
+        comparativa(resumenes.tabla('mensual', desde, hasta), 'mensual')
+        df_rango['Media_movil'] = df_rango['Peso'].rolling(window=7, min_periods=1).mean()
+        df_rango['TDEE'] = tdee_movil(df).reindex(df_rango['Fecha']).round(0).to_numpy()
+        return df_rango
+    return medir
+
+
+def _serie_grafica(datos):
+    df = datos.historico().cargar()
+    df['Media_movil'] = df['Peso'].rolling(window=7, min_periods=1).mean()
+    df['TDEE'] = tdee_movil(df).reindex(df['Fecha']).round(0).to_numpy()
+    return df
+
+
+@escenario('graficas/peso')
+def _grafica_peso(datos):
+    df = _serie_grafica(datos)
+    return lambda i: datos_grafica(df, ['Peso', 'Media_movil'])
+
+
+@escenario('graficas/kcal')
+def _grafica_kcal(datos):
+    df = _serie_grafica(datos)
+    return lambda i: datos_grafica(df, ['Kcal', 'TDEE'], metodo={'Kcal': 'minmax'})
+
+
+# ---------- EJECUCIÓN ----------
+def medir(funcion, repeticiones):
+    """Milisegundos de cada repetición tras una vuelta de calentamiento."""
+    funcion(-1)
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(base, actual, tolerancia):
+    """Imprime la comparación escenario a escenario; devuelve los que empeoran más de ``tolerancia``."""
+    if base['datos']['huella'] != actual['datos']['huella']:
+        print('aviso: los datos no son los mismos (otros parámetros o fecha final); la comparación es orientativa')
+    print(f"\n{'escenario':28} {'mín base':>10} {'mín ahora':>10} {'ratio':>7}")
+    peores = []
+    for nombre, medida in actual['escenarios'].items():
+        anterior = base['escenarios'].get(nombre)
+        if anterior is None:
+            continue
+        ratio = medida['min_ms'] / max(anterior['min_ms'], 1e-6)
+        peor = ratio > tolerancia
+        peores += [nombre] if peor else []
+        print(f"{nombre:28} {anterior['min_ms']:>10.2f} {medida['min_ms']:>10.2f} {ratio:>6.2f}x"
+              f"{'  ✗' if peor else ''}")
+    return peores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--datos', help='carpeta de datos_sinteticos.py ya generada (se copia)')
+    parser.add_argument('--escala', type=float, default=1.0, help='multiplica el tamaño de los datos generados')
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--hasta', help='última fecha de los datos generados (hoy por defecto)')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--solo', nargs='*', default=[], help='escenarios cuyo nombre contenga alguno de estos textos')
+    parser.add_argument('--salida', help='JSON donde guardar los resultados')
+    parser.add_argument('--comparar', help='JSON de una ejecución anterior')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA, help='ratio máximo frente a --comparar')
+    args = parser.parse_args()
+
+    carpeta = tempfile.mkdtemp()
+    try:
+        if args.datos:
+            for nombre in ARCHIVOS:
+                shutil.copy(os.path.join(args.datos, nombre), carpeta)
+            hasta = pd.read_csv(os.path.join(carpeta, 'datos_peso.csv'), usecols=['Fecha'])['Fecha'].max()
+            hasta = pd.Timestamp(hasta).date()
+            tamanos = None
+        else:
+            tamanos = {
+                'dias': max(int(DIAS * args.escala), 60), 'comidas': int(COMIDAS * args.escala),
+                'alimentos': int(ALIMENTOS * args.escala), 'semilla': args.semilla
+            }
+            hasta = generar(carpeta, hasta=args.hasta, **tamanos)
+        datos = Datos(carpeta, hasta)
+        resultado = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'maquina': platform.machine(),
+            'datos': {'generados': tamanos, 'hasta': hasta.isoformat(), 'huella': huella(carpeta)},
+            'repeticiones': args.repeticiones,
+            'escenarios': {}
+        }
+
+        print(f"{'escenario':28} {'mediana ms':>11} {'mín ms':>9}")
+        for nombre, preparar in ESCENARIOS.items():
+            if args.solo and not any(texto in nombre for texto in args.solo):
+                continue
+            tiempos = medir(preparar(datos), args.repeticiones)
+            resultado['escenarios'][nombre] = {
+                'descripcion': (preparar.__doc__ or '').strip(),
+                'mediana_ms': float(np.median(tiempos)),
+                'min_ms': min(tiempos),
+                'tiempos_ms': tiempos
+            }
+            print(f'{nombre:28} {np.median(tiempos):>11.2f} {min(tiempos):>9.2f}')
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=1)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            peores = comparar(json.load(f), resultado, args.tolerancia)
+        sys.exit(1 if peores else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Código compartido por las apps de Pocket Diet."""
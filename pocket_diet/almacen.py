@@ -0,0 +1,549 @@
+"""Almacenes intercambiables para el registro de comidas y el catálogo.
+
+``AlmacenCSV`` mantiene el formato de siempre (comidas.csv con su diario y
+catalogo_comidas.csv). ``AlmacenSQLite`` guarda todo en una base de datos con
+índice por fecha y tipo, de modo que la vista del día, la semana y las
+ediciones solo leen las filas que necesitan. La primera vez que se abre la
+base de datos se importan los CSV existentes en una sola transacción.
+
+Con varias sesiones o procesos escribiendo a la vez, ``AlmacenCSV`` hace cada
+cambio con el archivo bloqueado y después de releerlo si su firma cambió, así
+que los cambios de los demás se conservan. SQLite ya serializa las
+escrituras; cada conexión espera hasta ``ESPERA_SQLITE`` segundos a que la
+base quede libre.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+
+from .archivos import bloqueo_archivo, escribir_atomico, firma_archivo
+from .buscador import IndiceCatalogo
+from .catalogo import VALORES_100G, preparar_catalogo
+from .diario import DiarioComidas
+from .estadisticas import EstadisticasMacros
+from .esquema import COLUMNAS_CATALOGO, COLUMNAS_COMIDAS, TIPOS_COMIDA, a_nativo, leer_catalogo
+from .totales import COLUMNAS_TIPO, COLUMNAS_TOTALES, MACROS, sumar_totales, totales_por_dia
+
+DB_FILE = 'pocket_diet.db'
+ESPERA_SQLITE = 30
+
+
+def _con_fechas(df):
+    df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce').dt.date
+    return df
+
+
+class AlmacenComidas:
+    """Interfaz común. Cada comida se identifica por un ID único y estable, el índice del DataFrame."""
+
+    def dia(self, fecha):
+        return self.rango(fecha, fecha)
+
+    def rango(self, inicio, fin):
+        raise NotImplementedError
+
+    def totales(self, inicio, fin):
+        """Totales diarios precalculados entre dos fechas, una fila por día con comidas."""
+        raise NotImplementedError
+
+    def total_dia(self, fecha):
+        df = self.totales(fecha, fecha)
+        if df.empty:
+            return pd.Series(0.0, index=COLUMNAS_TOTALES)
+        return df.iloc[0]
+
+    def version(self):
+        """Valor que cambia cada vez que cambian las comidas."""
+        raise NotImplementedError
+
+    def estadisticas(self):
+        """Estadísticas por rango sobre todo el histórico; se reconstruyen solo si hubo cambios."""
+        version = self.version()
+        if self.cache_estadisticas[0] != version:
+            self.cache_estadisticas = (version, EstadisticasMacros(self.totales(date.min, date.max)))
+        return self.cache_estadisticas[1]
+
+    def insertar(self, nuevas):
+        """Guarda las filas y las devuelve con el identificador asignado como índice."""
+        raise NotImplementedError
+
+    def actualizar(self, id_fila, valores):
+        raise NotImplementedError
+
+    def eliminar(self, id_fila):
+        raise NotImplementedError
+
+    def importar_comidas(self, bloques):
+        """Añade las comidas de todos los bloques (DataFrames) en una sola escritura. Devuelve cuántas se añadieron."""
+        raise NotImplementedError
+
+    def catalogo(self):
+        raise NotImplementedError
+
+    def guardar_en_catalogo(self, nuevos):
+        """Añade alimentos al catálogo o, si ya hay uno con el mismo nombre y marca, actualiza sus valores.
+
+        Todas las filas se escriben de una vez. Devuelve (añadidos, actualizados).
+        """
+        with self._bloqueo_catalogo():
+            nuevos = preparar_catalogo(nuevos)
+            version_previa = self._version_catalogo()
+            claves = self._indice_catalogo().claves
+            ids = pd.Series([claves.get(c) for c in nuevos['Clave']], index=nuevos.index, dtype='float')
+            existentes = ids.notna()
+            actualizados = nuevos[existentes].drop(columns='Clave').set_axis(ids[existentes].astype('int64'))
+            anadidos = self._escribir_catalogo(actualizados, nuevos[~existentes].drop(columns='Clave'))
+            self._indexar_catalogo(version_previa, pd.concat([actualizados, anadidos]))
+            return len(anadidos), len(actualizados)
+
+    def eliminar_catalogo(self, ids):
+        raise NotImplementedError
+
+    def _escribir_catalogo(self, actualizados, anadidos):
+        """Actualiza por índice los valores no vacíos de ``actualizados`` y añade ``anadidos``.
+
+        Devuelve ``anadidos`` con el índice que les corresponde en el catálogo.
+        """
+        raise NotImplementedError
+
+    def _version_catalogo(self):
+        """Valor que cambia cada vez que cambia el catálogo."""
+        raise NotImplementedError
+
+    def _bloqueo_catalogo(self):
+        """Exclusión para leer el catálogo y escribir en él sin perder cambios de otras sesiones."""
+        return self.lock
+
+    def _indice_catalogo(self):
+        version = self._version_catalogo()
+        # Sin archivo de catálogo la versión es None, igual que la de la caché vacía
+        if self.cache_indice[1] is None or self.cache_indice[0] != version:
+            self.cache_indice = (version, IndiceCatalogo(self.catalogo()))
+        return self.cache_indice[1]
+
+    def buscar_catalogo(self, texto, limite=10):
+        """Alimentos del catálogo que mejor casan con el texto (nombre o marca), de mejor a peor."""
+        with self.lock:
+            claves = self._indice_catalogo().buscar(texto, limite)
+            return self.catalogo().loc[claves]
+
+    def buscar_codigo(self, codigo):
+        """Fila del catálogo con ese código de barras, o None."""
+        with self.lock:
+            clave = self._indice_catalogo().buscar_codigo(codigo)
+            return None if clave is None else self.catalogo().loc[clave]
+
+    def _indexar_catalogo(self, version_previa, filas):
+        """Añade al índice los alimentos recién guardados si estaba al día; si no, se reconstruirá al buscar."""
+        version, indice = self.cache_indice
+        if version is not None and version == version_previa:
+            for clave, fila in zip(filas.index, filas.itertuples(index=False)):
+                indice.agregar(clave, fila.Comida, fila.Marca, fila.Codigo)
+            self.cache_indice = (self._version_catalogo(), indice)
+
+
+# ---------- CSV ----------
+class AlmacenCSV(AlmacenComidas):
+    """Mantiene las comidas en memoria y solo vuelve a leer el disco si otro proceso cambió los archivos."""
+
+    def __init__(self, ruta_comidas, ruta_catalogo=None):
+        self.diario = DiarioComidas(ruta_comidas)
+        self.ruta_catalogo = ruta_catalogo
+        self.lock = threading.RLock()
+        self.df = None
+        self.df_totales = None
+        self.firmas = None
+        self.cache_catalogo = (None, None)
+        self.cache_indice = (None, None)
+        self.cache_estadisticas = (None, None)
+
+    def _firmas_actuales(self):
+        return firma_archivo(self.diario.ruta_csv), firma_archivo(self.diario.ruta_diario)
+
+    def _refrescar(self):
+        firmas = self._firmas_actuales()
+        if self.df is None or firmas != self.firmas:
+            self.df = self.diario.cargar()
+            self.df_totales = totales_por_dia(self.df)
+            self.firmas = self._firmas_actuales()
+
+    def version(self):
+        with self.lock:
+            self._refrescar()
+            return self.firmas
+
+    def rango(self, inicio, fin):
+        with self.lock:
+            self._refrescar()
+            return self.df[(self.df['Fecha'] >= inicio) & (self.df['Fecha'] <= fin)]
+
+    def totales(self, inicio, fin):
+        with self.lock:
+            self._refrescar()
+            fechas = self.df_totales.index
+            return self.df_totales[(fechas >= inicio) & (fechas <= fin)].copy()
+
+    @contextmanager
+    def _escribiendo(self):
+        # Con el archivo bloqueado y releído si otro proceso lo cambió, los IDs
+        # y los totales parten de lo último que hay en disco
+        with self.lock, self.diario.bloqueo():
+            self._refrescar()
+            yield
+
+    def insertar(self, nuevas):
+        with self._escribiendo():
+            nuevas = self.diario.insertar(nuevas)
+            self.df = pd.concat([self.df, nuevas])
+            self.df_totales = sumar_totales(self.df_totales, totales_por_dia(self.df.loc[nuevas.index]))
+            self.firmas = self._firmas_actuales()
+            return nuevas
+
+    def actualizar(self, id_fila, valores):
+        with self._escribiendo():
+            if id_fila not in self.df.index:
+                # Otra sesión la borró; como en SQLite, no hay nada que actualizar
+                return
+            self.diario.actualizar(id_fila, valores)
+            antes = totales_por_dia(self.df.loc[[id_fila]])
+            self.df.loc[id_fila, list(valores)] = list(valores.values())
+            self.df_totales = sumar_totales(self.df_totales, antes, -1)
+            self.df_totales = sumar_totales(self.df_totales, totales_por_dia(self.df.loc[[id_fila]]))
+            self.firmas = self._firmas_actuales()
+
+    def eliminar(self, id_fila):
+        with self._escribiendo():
+            if id_fila not in self.df.index:
+                return
+            self.diario.eliminar(id_fila)
+            self.df_totales = sumar_totales(self.df_totales, totales_por_dia(self.df.loc[[id_fila]]), -1)
+            self.df = self.df.drop(id_fila)
+            self.firmas = self._firmas_actuales()
+
+    def importar_comidas(self, bloques):
+        with self.lock, self.diario.bloqueo():
+            total = self.diario.importar(bloques)
+            self.df = None
+            return total
+
+    def catalogo(self):
+        with self.lock:
+            firma = firma_archivo(self.ruta_catalogo)
+            if firma is None:
+                return pd.DataFrame(columns=COLUMNAS_CATALOGO)
+            if self.cache_catalogo[0] != firma:
+                self.cache_catalogo = (firma, leer_catalogo(self.ruta_catalogo))
+            return self.cache_catalogo[1].copy()
+
+    def _escribir_catalogo(self, actualizados, anadidos):
+        df_catalogo = self.catalogo()
+        if not actualizados.empty:
+            columnas = VALORES_100G + ['Codigo']
+            filas = actualizados.index
+            df_catalogo.loc[filas, columnas] = actualizados[columnas].combine_first(df_catalogo.loc[filas, columnas])
+        anadidos = anadidos.set_axis(range(len(df_catalogo), len(df_catalogo) + len(anadidos)))
+        df_catalogo = pd.concat([df_catalogo, anadidos])
+        escribir_atomico(self.ruta_catalogo, lambda f: df_catalogo.to_csv(f, index=False))
+        self.cache_catalogo = (firma_archivo(self.ruta_catalogo), df_catalogo)
+        return anadidos
+
+    def eliminar_catalogo(self, ids):
+        with self._bloqueo_catalogo():
+            # El índice del catálogo CSV es la posición de la fila, así que se renumera
+            df_catalogo = self.catalogo().drop(index=list(ids)).reset_index(drop=True)
+            escribir_atomico(self.ruta_catalogo, lambda f: df_catalogo.to_csv(f, index=False))
+            self.cache_catalogo = (firma_archivo(self.ruta_catalogo), df_catalogo)
+
+    def _version_catalogo(self):
+        return firma_archivo(self.ruta_catalogo)
+
+    @contextmanager
+    def _bloqueo_catalogo(self):
+        # catalogo() relee el CSV si su firma cambió, así que se parte de la última versión
+        with self.lock, bloqueo_archivo(self.ruta_catalogo):
+            yield
+
+
+# ---------- SQLITE ----------
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS comidas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    "Fecha" TEXT,
+    "Tipo" TEXT NOT NULL DEFAULT '',
+    "Comida" TEXT,
+    "Marca" TEXT,
+    "Gramos" REAL,
+    "Kcal" REAL,
+    "Proteínas" REAL,
+    "Carbs" REAL,
+    "Grasas" REAL
+);
+CREATE INDEX IF NOT EXISTS idx_comidas_fecha_tipo ON comidas ("Fecha", "Tipo");
+CREATE TABLE IF NOT EXISTS catalogo (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    "Comida" TEXT,
+    "Marca" TEXT,
+    "Kcal_100g" REAL,
+    "Proteínas_100g" REAL,
+    "Carbs_100g" REAL,
+    "Grasas_100g" REAL,
+    "Codigo" TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+
+def _sql_totales():
+    """Tabla totales_diarios y los triggers que la mantienen al cambiar comidas."""
+    columnas = ',\n    '.join(f'"{c}" REAL NOT NULL DEFAULT 0' for c in COLUMNAS_TOTALES)
+
+    def sumas(fila, signo):
+        partes = [f'"{m}" = "{m}" {signo} IFNULL({fila}."{m}", 0)' for m in MACROS]
+        partes.append(f'"Entradas" = "Entradas" {signo} 1')
+        partes += [
+            f'"{c}" = "{c}" {signo} CASE WHEN {fila}."Tipo" = \'{t}\' THEN IFNULL({fila}."Kcal", 0) ELSE 0 END'
+            for t, c in zip(TIPOS_COMIDA, COLUMNAS_TIPO)
+        ]
+        return ', '.join(partes)
+
+    sumar = f"""
+        INSERT OR IGNORE INTO totales_diarios ("Fecha") VALUES (NEW."Fecha");
+        UPDATE totales_diarios SET {sumas('NEW', '+')} WHERE "Fecha" = NEW."Fecha";"""
+    restar = f"""
+        UPDATE totales_diarios SET {sumas('OLD', '-')} WHERE "Fecha" = OLD."Fecha";
+        DELETE FROM totales_diarios WHERE "Fecha" = OLD."Fecha" AND "Entradas" <= 0;"""
+    tabla = f"""
+CREATE TABLE IF NOT EXISTS totales_diarios (
+    "Fecha" TEXT NOT NULL PRIMARY KEY,
+    {columnas}
+)"""
+    return tabla, [
+        f"""CREATE TRIGGER IF NOT EXISTS totales_al_insertar AFTER INSERT ON comidas
+WHEN NEW."Fecha" IS NOT NULL BEGIN {sumar}
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS totales_al_borrar AFTER DELETE ON comidas
+WHEN OLD."Fecha" IS NOT NULL BEGIN {restar}
+END""",
+        f"""CREATE TRIGGER IF NOT EXISTS totales_al_editar AFTER UPDATE ON comidas
+BEGIN {restar}{sumar}
+END""",
+    ]
+
+
+TRIGGERS_TOTALES = ['totales_al_insertar', 'totales_al_borrar', 'totales_al_editar']
+
+
+def _sql_calcular_totales(condicion='1'):
+    """Inserta en totales_diarios la suma desde cero de los días de comidas que cumplen la condición."""
+    return f'''INSERT INTO totales_diarios ("Fecha", {_columnas_sql(COLUMNAS_TOTALES)})
+        SELECT "Fecha", {', '.join(f'IFNULL(SUM("{m}"), 0)' for m in MACROS)}, COUNT(*),
+        {', '.join(f"""IFNULL(SUM(CASE WHEN "Tipo" = '{t}' THEN "Kcal" END), 0)""" for t in TIPOS_COMIDA)}
+        FROM comidas WHERE "Fecha" IS NOT NULL AND {condicion} GROUP BY "Fecha"'''
+
+
+def _columnas_sql(columnas):
+    return ', '.join(f'"{c}"' for c in columnas)
+
+
+def _sql_insertar(tabla, columnas):
+    return f'INSERT INTO {tabla} ({_columnas_sql(columnas)}) VALUES ({", ".join("?" * len(columnas))})'
+
+
+class AlmacenSQLite(AlmacenComidas):
+    def __init__(self, ruta_db=DB_FILE):
+        self.ruta_db = ruta_db
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(ruta_db, timeout=ESPERA_SQLITE, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(ESQUEMA_SQLITE)
+        self._migrar_catalogo()
+        self._crear_totales()
+        # El catálogo y las estadísticas se guardan en memoria hasta que alguien
+        # escribe en la base. data_version solo cambia con escrituras de otras
+        # conexiones, por eso se cuentan también las propias.
+        self.escrituras = 0
+        self.escrituras_catalogo = 0
+        self.cache_catalogo = (None, None)
+        self.cache_indice = (None, None)
+        self.cache_estadisticas = (None, None)
+
+    def _migrar_catalogo(self):
+        with self.lock, self.conn:
+            columnas = {fila[1] for fila in self.conn.execute('PRAGMA table_info(catalogo)')}
+            if 'Codigo' not in columnas:
+                self.conn.execute('ALTER TABLE catalogo ADD COLUMN "Codigo" TEXT')
+
+    def _crear_totales(self):
+        with self.lock, self.conn:
+            existia = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'totales_diarios'"
+            ).fetchone()
+            tabla, triggers = _sql_totales()
+            self.conn.execute(tabla)
+            for trigger in triggers:
+                self.conn.execute(trigger)
+            if not existia:
+                # Bases creadas antes de existir la tabla: se calcula una vez desde cero
+                self.conn.execute(_sql_calcular_totales())
+
+    def version(self):
+        with self.lock:
+            return self.conn.execute('PRAGMA data_version').fetchone()[0], self.escrituras
+
+    def _consulta(self, sql, params=()):
+        with self.lock:
+            return pd.read_sql_query(sql, self.conn, params=params, index_col='id')
+
+    def rango(self, inicio, fin):
+        df = self._consulta(
+            f'SELECT id, {_columnas_sql(COLUMNAS_COMIDAS)} FROM comidas WHERE "Fecha" BETWEEN ? AND ? ORDER BY id',
+            (inicio.isoformat(), fin.isoformat()),
+        )
+        return _con_fechas(df)
+
+    def totales(self, inicio, fin):
+        with self.lock:
+            df = pd.read_sql_query(
+                f'SELECT "Fecha", {_columnas_sql(COLUMNAS_TOTALES)} FROM totales_diarios WHERE "Fecha" BETWEEN ? AND ? ORDER BY "Fecha"',
+                self.conn, params=(inicio.isoformat(), fin.isoformat()),
+            )
+        # Son unas pocas filas en formato ISO: más rápido que pasar por to_datetime
+        df['Fecha'] = [date.fromisoformat(f) for f in df['Fecha']]
+        return df.set_index('Fecha')
+
+    def _filas(self, df, columnas):
+        presentes = [c for c in columnas if c in df.columns]
+        filas = [[a_nativo(v) for v in fila] for fila in df[presentes].itertuples(index=False)]
+        return presentes, filas
+
+    def insertar(self, nuevas):
+        columnas, filas = self._filas(nuevas, COLUMNAS_COMIDAS)
+        sql = _sql_insertar('comidas', columnas)
+        ids = []
+        with self.lock, self.conn:
+            for fila in filas:
+                ids.append(self.conn.execute(sql, fila).lastrowid)
+            self.escrituras += 1
+        nuevas = nuevas.copy()
+        nuevas.index = ids
+        return nuevas
+
+    def actualizar(self, id_fila, valores):
+        valores = {c: a_nativo(v) for c, v in valores.items() if c in COLUMNAS_COMIDAS}
+        asignaciones = ', '.join(f'"{c}" = ?' for c in valores)
+        with self.lock, self.conn:
+            self.conn.execute(f'UPDATE comidas SET {asignaciones} WHERE id = ?', [*valores.values(), int(id_fila)])
+            self.escrituras += 1
+
+    def eliminar(self, id_fila):
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM comidas WHERE id = ?', (int(id_fila),))
+            self.escrituras += 1
+
+    def importar_comidas(self, bloques):
+        sql = _sql_insertar('comidas', COLUMNAS_COMIDAS)
+        total = 0
+        primera, ultima = None, None
+        with self.lock, self.conn:
+            # Sin triggers fila a fila: los totales de los días importados se recalculan al final.
+            # Todo va en la misma transacción, así que un error deja los triggers como estaban.
+            self.conn.execute('BEGIN')
+            for trigger in TRIGGERS_TOTALES:
+                self.conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            for bloque in bloques:
+                filas = bloque[COLUMNAS_COMIDAS].astype(object)
+                filas = filas.where(filas.notna(), None).itertuples(index=False, name=None)
+                total += self.conn.executemany(sql, filas).rowcount
+                fechas = bloque['Fecha'].dropna()
+                if len(fechas):
+                    primera = min(filter(None, [primera, fechas.min()]))
+                    ultima = max(filter(None, [ultima, fechas.max()]))
+            if primera is not None:
+                self.conn.execute('DELETE FROM totales_diarios WHERE "Fecha" BETWEEN ? AND ?', (primera, ultima))
+                self.conn.execute(_sql_calcular_totales('"Fecha" BETWEEN ? AND ?'), (primera, ultima))
+            for trigger in _sql_totales()[1]:
+                self.conn.execute(trigger)
+            self.escrituras += 1
+        return total
+
+    def catalogo(self):
+        with self.lock:
+            version = self._version_catalogo()
+            if self.cache_catalogo[0] != version:
+                df = pd.read_sql_query(
+                    f'SELECT id, {_columnas_sql(COLUMNAS_CATALOGO)} FROM catalogo ORDER BY id', self.conn, index_col='id'
+                )
+                self.cache_catalogo = (version, df)
+            return self.cache_catalogo[1].copy()
+
+    def _escribir_catalogo(self, actualizados, anadidos):
+        columnas = VALORES_100G + ['Codigo']
+        asignaciones = ', '.join(f'"{c}" = COALESCE(?, "{c}")' for c in columnas)
+        cambios = [
+            [a_nativo(v) for v in fila] + [int(id_fila)]
+            for id_fila, fila in zip(actualizados.index, actualizados[columnas].itertuples(index=False))
+        ]
+        columnas_nuevas, filas = self._filas(anadidos, COLUMNAS_CATALOGO)
+        sql = _sql_insertar('catalogo', columnas_nuevas)
+        with self.conn:
+            self.conn.executemany(f'UPDATE catalogo SET {asignaciones} WHERE id = ?', cambios)
+            ids = [self.conn.execute(sql, fila).lastrowid for fila in filas]
+        self.escrituras += 1
+        self.escrituras_catalogo += 1
+        return anadidos.set_axis(ids)
+
+    def eliminar_catalogo(self, ids):
+        with self.lock, self.conn:
+            self.conn.executemany('DELETE FROM catalogo WHERE id = ?', [(int(i),) for i in ids])
+            self.escrituras += 1
+            self.escrituras_catalogo += 1
+
+    def _version_catalogo(self):
+        # Las comidas propias no cuentan: solo escrituras externas o del catálogo
+        with self.lock:
+            return self.conn.execute('PRAGMA data_version').fetchone()[0], self.escrituras_catalogo
+
+    @contextmanager
+    def _bloqueo_catalogo(self):
+        # BEGIN IMMEDIATE reserva la escritura antes de buscar las claves: otro
+        # proceso no puede añadir el mismo alimento entre la búsqueda y el INSERT
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            yield
+
+    def _insertar_varias(self, tabla, df, columnas):
+        columnas, filas = self._filas(df, columnas)
+        self.conn.executemany(_sql_insertar(tabla, columnas), filas)
+
+    # ---------- IMPORTAR DESDE CSV ----------
+    def importar_csv(self, ruta_comidas=None, ruta_catalogo=None):
+        """Copia comidas.csv (con su diario) y catalogo_comidas.csv la primera vez que se abre la base."""
+        with self.lock, self.conn:
+            # Si dos procesos abren la base nueva a la vez, el segundo espera y ve la marca del primero
+            self.conn.execute('BEGIN IMMEDIATE')
+            importados = {fila[0] for fila in self.conn.execute('SELECT clave FROM meta')}
+            if ruta_comidas and 'importado:comidas' not in importados:
+                if os.path.exists(ruta_comidas):
+                    df = DiarioComidas(ruta_comidas).cargar()
+                    df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce').dt.strftime('%Y-%m-%d')
+                    # Se conservan los ID del CSV para que sigan identificando las mismas comidas
+                    self._insertar_varias('comidas', df.reset_index(names='id'), ['id'] + COLUMNAS_COMIDAS)
+                self.conn.execute("INSERT INTO meta VALUES ('importado:comidas', ?)", (ruta_comidas,))
+            if ruta_catalogo and 'importado:catalogo' not in importados:
+                if os.path.exists(ruta_catalogo):
+                    self._insertar_varias('catalogo', leer_catalogo(ruta_catalogo), COLUMNAS_CATALOGO)
+                    self.escrituras_catalogo += 1
+                self.conn.execute("INSERT INTO meta VALUES ('importado:catalogo', ?)", (ruta_catalogo,))
+
+
+def abrir_almacen(ruta_comidas, ruta_catalogo=None, ruta_db=DB_FILE):
+    """Abre el almacén configurado en POCKET_DIET_ALMACEN ('sqlite' por defecto o 'csv')."""
+    if os.environ.get('POCKET_DIET_ALMACEN', 'sqlite') == 'csv':
+        return AlmacenCSV(ruta_comidas, ruta_catalogo)
+    almacen = AlmacenSQLite(ruta_db)
+    almacen.importar_csv(ruta_comidas, ruta_catalogo)
+    return almacen
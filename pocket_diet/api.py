@@ -0,0 +1,346 @@
+"""API HTTP con JSON sobre el registro de comidas, el catálogo y el peso.
+
+Para los clientes que no son la app (móvil, automatizaciones): las mismas
+operaciones que las pantallas de Streamlit, con los mismos almacenes y las
+mismas clases del peso, pero sin volver a ejecutar un script por petición.
+El servidor es asyncio de la biblioteca estándar, HTTP/1.1 con keep-alive.
+Los almacenes son síncronos, así que cada petición se resuelve en un pool
+pequeño de hilos; como ya son seguros entre hilos y procesos, la API y las
+apps pueden trabajar a la vez sobre la misma carpeta.
+
+    python -m pocket_diet.api --carpeta /ruta/a/datos --puerto 8000
+
+    POST /comidas                {"Fecha": "2024-05-01", "Tipo": "Comida", "Comida": "Arroz", "Gramos": 150,
+                                  "Kcal_100g": 350, "Proteínas_100g": 7, "Carbs_100g": 78, "Grasas_100g": 1}
+    GET  /comidas?fecha=2024-05-01
+    GET  /totales/dia?fecha=2024-05-01
+    GET  /totales/semana?fecha=2024-05-01
+    GET  /catalogo?q=arroz&limite=10
+    PUT  /pesos/2024-05-01       {"Peso": 80.1, "Kcal": 2100}
+    GET  /tendencia
+
+Sin ``fecha`` se usa hoy. En ``POST /comidas`` los valores por 100 g que
+falten se toman del alimento del catálogo con ese ``Codigo``; con
+``"Guardar_catalogo": true`` el alimento se guarda además en el catálogo.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from .almacen import DB_FILE, abrir_almacen
+from .catalogo import VALORES_100G
+from .esquema import TIPOS_COMIDA, a_nativo, macros_consumidas
+from .exportar import ExportadorExcel
+from .historico import HistoricoPesos
+from .resumenes import ResumenesPeso
+from .tendencia import TendenciaPeso
+
+COMIDAS_FILE = 'comidas.csv'
+CATALOGO_FILE = 'catalogo_comidas.csv'
+PESOS_FILE = 'datos_peso.csv'
+EXCEL_FILE = 'datos_peso.xlsx'
+PUERTO = 8000
+HILOS = 4
+MAX_CUERPO = 64 * 1024
+LIMITE_CATALOGO = 50
+MOTIVOS = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 500: 'Internal Server Error'
+}
+
+
+class ErrorAPI(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _fecha(texto):
+    if texto is None:
+        return date.today()
+    try:
+        return date.fromisoformat(texto)
+    except (TypeError, ValueError):
+        raise ErrorAPI(400, f'Fecha no válida: {texto!r} (AAAA-MM-DD)')
+
+
+def _numero(datos, campo, obligatorio=True):
+    valor = datos.get(campo)
+    if valor is None and not obligatorio:
+        return None
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise ErrorAPI(400, f'{campo} tiene que ser un número')
+    if valor < 0:
+        raise ErrorAPI(400, f'{campo} no puede ser negativo')
+    return float(valor)
+
+
+def _fila(serie):
+    return {columna: a_nativo(valor) for columna, valor in serie.items()}
+
+
+def _filas(df, id_como='ID'):
+    columnas = list(df.columns)
+    return [
+        {id_como: a_nativo(indice), **{c: a_nativo(v) for c, v in zip(columnas, fila)}}
+        for indice, fila in zip(df.index, df.itertuples(index=False))
+    ]
+
+
+# ---------- OPERACIONES ----------
+class ServicioPocketDiet:
+    """Las operaciones de las pantallas sobre los archivos de ``carpeta``, con los nombres de siempre."""
+
+    def __init__(self, carpeta):
+        def ruta(nombre):
+            return os.path.join(carpeta, nombre)
+
+        self.almacen = abrir_almacen(ruta(COMIDAS_FILE), ruta(CATALOGO_FILE), ruta(DB_FILE))
+        self.historico = HistoricoPesos(ruta(PESOS_FILE))
+        self.tendencia = TendenciaPeso(self.historico)
+        self.resumenes = ResumenesPeso(self.historico)
+        self.exportador = ExportadorExcel(self.historico, ruta(EXCEL_FILE))
+
+    def anadir_comida(self, params, datos):
+        """Como el formulario de alta: valores por 100 g y gramos -> kcal y macros consumidas."""
+        nombre = datos.get('Comida')
+        if not isinstance(nombre, str) or not nombre.strip():
+            raise ErrorAPI(400, 'Falta el nombre de la comida (Comida)')
+        tipo = datos.get('Tipo')
+        if tipo is not None and tipo not in TIPOS_COMIDA:
+            raise ErrorAPI(400, f"Tipo tiene que ser uno de {', '.join(TIPOS_COMIDA)}")
+        gramos = _numero(datos, 'Gramos')
+        if gramos == 0:
+            raise ErrorAPI(400, 'Gramos tiene que ser mayor que cero')
+        alimento = {}
+        if datos.get('Codigo'):
+            encontrado = self.almacen.buscar_codigo(str(datos['Codigo']))
+            if encontrado is not None:
+                alimento = encontrado.to_dict()
+        por_100g = {}
+        for columna in VALORES_100G:
+            valor = _numero(datos, columna, obligatorio=False)
+            if valor is None:
+                valor = alimento.get(columna)
+                if valor is None or pd.isna(valor):
+                    raise ErrorAPI(400, f'Falta {columna} y no hay alimento en el catálogo con ese código')
+            por_100g[columna] = float(valor)
+        marca = datos.get('Marca') or alimento.get('Marca') or ''
+
+        nueva = {'Fecha': [_fecha(datos.get('Fecha'))]}
+        if tipo is not None:
+            nueva['Tipo'] = [tipo]
+        nueva.update({'Comida': [nombre], 'Marca': [marca], 'Gramos': [gramos]})
+        nueva.update({m: [valor] for m, valor in macros_consumidas(por_100g, gramos).items()})
+        fila = self.almacen.insertar(pd.DataFrame(nueva))
+        if datos.get('Guardar_catalogo'):
+            self.almacen.guardar_en_catalogo(pd.DataFrame({
+                'Comida': [nombre], 'Marca': [marca], **{c: [v] for c, v in por_100g.items()},
+                'Codigo': [datos.get('Codigo')]
+            }))
+        return 201, _filas(fila)[0]
+
+    def comidas_dia(self, params, datos):
+        return 200, _filas(self.almacen.dia(_fecha(params.get('fecha'))))
+
+    def totales_dia(self, params, datos):
+        fecha = _fecha(params.get('fecha'))
+        return 200, {'Fecha': fecha.isoformat(), **_fila(self.almacen.total_dia(fecha))}
+
+    def totales_semana(self, params, datos):
+        """Los mismos «Totales últimos 7 días» del food log: cada día con comidas y la media por día."""
+        fecha = _fecha(params.get('fecha'))
+        inicio = fecha - timedelta(days=6)
+        df = self.almacen.totales(inicio, fecha)
+        return 200, {
+            'Desde': inicio.isoformat(),
+            'Hasta': fecha.isoformat(),
+            'Promedio': None if df.empty else _fila(df.mean()),
+            'Dias': _filas(df, 'Fecha')
+        }
+
+    def buscar_catalogo(self, params, datos):
+        try:
+            limite = min(int(params.get('limite', 10)), LIMITE_CATALOGO)
+        except ValueError:
+            raise ErrorAPI(400, 'limite tiene que ser un entero')
+        texto = params.get('q', '')
+        if not texto.strip():
+            raise ErrorAPI(400, 'Falta el texto a buscar (q)')
+        return 200, _filas(self.almacen.buscar_catalogo(texto, limite))
+
+    def registrar_peso(self, params, datos, fecha):
+        """Como el botón Guardar del registro de peso: sobrescribe el día si ya existía."""
+        fecha = pd.Timestamp(_fecha(fecha))
+        peso = _numero(datos, 'Peso')
+        kcal = _numero(datos, 'Kcal', obligatorio=False)
+        kcal = float('nan') if kcal is None else kcal
+        existia = self.historico.existe(fecha)
+        versiones = self.historico.registrar(fecha, peso, kcal)
+        self.tendencia.registrar(fecha, peso, kcal, versiones)
+        self.resumenes.registrar(fecha, versiones)
+        self.exportador.programar()
+        return (200 if existia else 201), {'Fecha': fecha.date().isoformat(), 'Peso': peso, 'Kcal': a_nativo(kcal)}
+
+    def estado_tendencia(self, params, datos):
+        estado = self.tendencia.estado()
+        return 200, {
+            'Fecha': estado.get('fecha'),
+            'Tendencia': estado.get('Tendencia'),
+            'TDEE': estado.get('TDEE')
+        }
+
+
+# (método, ruta) -> operación del servicio; los grupos de la ruta se pasan como argumentos
+RUTAS = [
+    ('POST', re.compile(r'/comidas'), 'anadir_comida'),
+    ('GET', re.compile(r'/comidas'), 'comidas_dia'),
+    ('GET', re.compile(r'/totales/dia'), 'totales_dia'),
+    ('GET', re.compile(r'/totales/semana'), 'totales_semana'),
+    ('GET', re.compile(r'/catalogo'), 'buscar_catalogo'),
+    ('PUT', re.compile(r'/pesos/([^/]+)'), 'registrar_peso'),
+    ('GET', re.compile(r'/tendencia'), 'estado_tendencia'),
+]
+
+
+# ---------- SERVIDOR ----------
+def _respuesta(estado, datos, cerrar=False):
+    cuerpo = json.dumps(datos, ensure_ascii=False, default=a_nativo).encode('utf-8')
+    cabecera = (
+        f'HTTP/1.1 {estado} {MOTIVOS.get(estado, "")}\r\n'
+        'Content-Type: application/json; charset=utf-8\r\n'
+        f'Content-Length: {len(cuerpo)}\r\n'
+        f'Connection: {"close" if cerrar else "keep-alive"}\r\n\r\n'
+    )
+    return cabecera.encode('latin-1') + cuerpo
+
+
+class ServidorAPI:
+    def __init__(self, servicio, hilos=HILOS):
+        self.servicio = servicio
+        self.pool = ThreadPoolExecutor(hilos, thread_name_prefix='api')
+        # Conexión abierta -> su tarea, para cerrarlas al parar
+        self.conexiones = {}
+
+    def resolver(self, metodo, destino, cuerpo):
+        """(estado, datos) de una petición; se ejecuta en el pool de hilos."""
+        url = urlsplit(destino)
+        params = dict(parse_qsl(url.query))
+        metodos = []
+        for metodo_ruta, patron, operacion in RUTAS:
+            encaje = patron.fullmatch(url.path.rstrip('/') or '/')
+            if encaje is None:
+                continue
+            if metodo_ruta != metodo:
+                metodos.append(metodo_ruta)
+                continue
+            try:
+                datos = json.loads(cuerpo) if cuerpo else {}
+            except ValueError as e:
+                return 400, {'error': f'JSON no válido: {e}'}
+            if not isinstance(datos, dict):
+                return 400, {'error': 'El cuerpo tiene que ser un objeto JSON'}
+            try:
+                return getattr(self.servicio, operacion)(params, datos, *encaje.groups())
+            except ErrorAPI as e:
+                return e.estado, {'error': str(e)}
+            except ValueError as e:
+                return 400, {'error': str(e)}
+        if metodos:
+            return 405, {'error': f"Método no permitido; usa {', '.join(metodos)}"}
+        return 404, {'error': f'No existe {url.path}'}
+
+    async def atender(self, reader, writer):
+        """Una conexión: peticiones una tras otra mientras el cliente la mantenga abierta."""
+        loop = asyncio.get_running_loop()
+        self.conexiones[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    cabecera = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    writer.write(_respuesta(413, {'error': 'Cabeceras demasiado grandes'}, cerrar=True))
+                    return
+                linea, *lineas = cabecera.decode('latin-1').rstrip('\r\n').split('\r\n')
+                campos = {}
+                for campo in lineas:
+                    nombre, _, valor = campo.partition(':')
+                    campos[nombre.strip().lower()] = valor.strip()
+                try:
+                    metodo, destino, version = linea.split(' ')
+                    largo = int(campos.get('content-length', 0))
+                except ValueError:
+                    writer.write(_respuesta(400, {'error': 'Petición mal formada'}, cerrar=True))
+                    return
+                if largo > MAX_CUERPO:
+                    writer.write(_respuesta(413, {'error': 'Cuerpo demasiado grande'}, cerrar=True))
+                    return
+                try:
+                    cuerpo = await reader.readexactly(largo) if largo else b''
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                try:
+                    estado, datos = await loop.run_in_executor(self.pool, self.resolver, metodo, destino, cuerpo)
+                except Exception as e:
+                    estado, datos = 500, {'error': f'{type(e).__name__}: {e}'}
+                conexion = campos.get('connection', '').lower()
+                cerrar = conexion == 'close' or (version == 'HTTP/1.0' and conexion != 'keep-alive')
+                writer.write(_respuesta(estado, datos, cerrar))
+                await writer.drain()
+                if cerrar:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            del self.conexiones[writer]
+            writer.close()
+
+    async def servir(self, host='127.0.0.1', puerto=PUERTO, listo=None):
+        """Atiende hasta recibir SIGINT o SIGTERM; las operaciones en curso terminan antes de salir."""
+        loop = asyncio.get_running_loop()
+        parar = asyncio.Event()
+        for senal in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(senal, lambda *_: loop.call_soon_threadsafe(parar.set))
+        servidor = await asyncio.start_server(self.atender, host, puerto)
+        async with servidor:
+            if listo:
+                listo(servidor.sockets[0].getsockname()[1])
+            await parar.wait()
+        # Cerrar el socket hace que cada conexión salga al esperar la siguiente petición
+        for writer in list(self.conexiones):
+            writer.transport.close()
+        await asyncio.gather(*self.conexiones.values(), return_exceptions=True)
+        self.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--carpeta', default='.', help='carpeta con comidas.csv, datos_peso.csv...')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=PUERTO, help='0 para uno libre')
+    parser.add_argument('--hilos', type=int, default=HILOS)
+    args = parser.parse_args()
+
+    servicio = ServicioPocketDiet(args.carpeta)
+    servidor = ServidorAPI(servicio, args.hilos)
+    try:
+        asyncio.run(servidor.servir(
+            args.host, args.puerto, listo=lambda p: print(f'Escuchando en http://{args.host}:{p}', flush=True)
+        ))
+    finally:
+        # Que no se quede sin escribir el Excel del último pesaje
+        servicio.exportador.esperar()
+
+
+if __name__ == '__main__':
+    main()
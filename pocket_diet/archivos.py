@@ -0,0 +1,119 @@
+"""Utilidades para los archivos de datos.
+
+Varias sesiones (y varios procesos, p. ej. la app y un importador) escriben
+en los mismos archivos. Toda escritura va dentro de ``bloqueo_archivo``, que
+es exclusivo entre hilos y entre procesos, y vuelve a leer lo que haya en
+disco antes de aplicar su cambio: si la firma del archivo no es la que tenía
+en memoria, otro escribió antes y se parte de su versión en lugar de pisarla.
+Los archivos completos se reescriben con ``escribir_atomico`` (temporal en la
+misma carpeta + ``os.replace``), así que un corte a mitad de escritura deja
+el archivo anterior intacto.
+"""
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def firma_archivo(ruta):
+    """(mtime, tamaño, inodo) del archivo, o None si no existe. Cambia con cada escritura.
+
+    El inodo distingue dos reemplazos atómicos seguidos aunque caigan en el mismo tick del reloj
+    del sistema de archivos y tengan el mismo tamaño.
+    """
+    try:
+        info = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return info.st_mtime_ns, info.st_size, info.st_ino
+
+
+# ruta -> [RLock del proceso, profundidad, archivo .lock abierto]
+_bloqueos = {}
+_lock_bloqueos = threading.Lock()
+
+
+def _bloquear(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            # LK_LOCK se rinde tras unos 10 s; se sigue esperando
+            pass
+
+
+def _desbloquear(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def bloqueo_archivo(ruta):
+    """Acceso exclusivo a ``ruta`` entre hilos y procesos (con ``ruta.lock`` al lado). Reentrante en el mismo hilo."""
+    ruta = os.path.abspath(ruta)
+    with _lock_bloqueos:
+        estado = _bloqueos.setdefault(ruta, [threading.RLock(), 0, None])
+    with estado[0]:
+        if estado[1] == 0:
+            f = open(ruta + '.lock', 'a+b')
+            try:
+                _bloquear(f)
+            except BaseException:
+                f.close()
+                raise
+            estado[2] = f
+        estado[1] += 1
+        try:
+            yield
+        finally:
+            estado[1] -= 1
+            if estado[1] == 0:
+                f, estado[2] = estado[2], None
+                _desbloquear(f)
+                f.close()
+
+
+def escribir_atomico(ruta, escribir, binario=False):
+    """Llama a ``escribir(f)`` sobre un temporal junto a ``ruta`` y lo pone en su sitio de una vez.
+
+    Si ``escribir`` falla el temporal se borra y ``ruta`` no cambia.
+    """
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    fd, temporal = tempfile.mkstemp(dir=carpeta, prefix=os.path.basename(ruta) + '.', suffix='.tmp')
+    try:
+        if binario:
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding='utf-8', newline='')
+        with f:
+            escribir(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crea el archivo solo legible por el dueño; se conservan los permisos del anterior
+        try:
+            modo = stat.S_IMODE(os.stat(ruta).st_mode)
+        except FileNotFoundError:
+            modo = 0o644
+        os.chmod(temporal, modo)
+        os.replace(temporal, ruta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,178 @@
+"""Índice de búsqueda del catálogo de favoritos.
+
+Los textos se normalizan (minúsculas y sin tildes, 'Plátano' -> 'platano') y
+se parten en palabras. Cada palabra de la consulta se compara con las del
+índice de tres formas, de mejor a peor puntuación: igual, como prefijo
+(búsqueda binaria sobre la lista ordenada de palabras) y con erratas
+(distancia de edición pequeña, probando solo palabras que comparten algún
+trigrama). Un alimento aparece si todas las palabras de la consulta casan con
+su nombre o su marca; el nombre puntúa más que la marca.
+
+El mismo índice guarda diccionarios código de barras -> alimento y
+(nombre, marca) normalizados -> alimento para resolver un código escaneado o
+saber si un alimento ya está guardado sin recorrer el catálogo.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+PUNTOS_EXACTA = 1.0
+PUNTOS_PREFIJO = 0.8
+PUNTOS_ERRATA = 0.6
+PESO_MARCA = 0.6
+
+
+_DIACRITICOS = re.compile('[\u0300-\u036f]')
+
+
+def normalizar(texto):
+    return _DIACRITICOS.sub('', unicodedata.normalize('NFKD', str(texto).lower()))
+
+
+_PALABRA = re.compile(r'\w+')
+
+
+def palabras(texto):
+    return _PALABRA.findall(normalizar(texto))
+
+
+def clave_catalogo(comida, marca):
+    """(nombre, marca) normalizados; la clave con la que se reconoce un alimento del catálogo."""
+    def texto(valor):
+        return ' '.join(palabras(valor)) if isinstance(valor, str) else ''
+    return texto(comida), texto(marca)
+
+
+def normalizar_codigo(codigo):
+    """Solo los dígitos del código; un UPC-A de 12 cifras se pasa a EAN-13 con un 0 delante."""
+    if not isinstance(codigo, str):
+        return ''
+    codigo = re.sub(r'\D', '', codigo)
+    return '0' + codigo if len(codigo) == 12 else codigo
+
+
+def _trigramas(palabra):
+    palabra = f'  {palabra} '
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+def _max_erratas(palabra):
+    return 0 if len(palabra) < 4 else 1 if len(palabra) < 8 else 2
+
+
+def distancia(a, b, maximo):
+    """Distancia de Levenshtein, cortando en cuanto supera ``maximo``."""
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior = actual
+    return anterior[-1]
+
+
+class IndiceCatalogo:
+    def __init__(self, df_catalogo=None):
+        # palabra -> {clave del alimento: peso del campo (1 nombre, PESO_MARCA marca)}
+        self.invertido = defaultdict(dict)
+        self.por_trigrama = defaultdict(set)
+        self.ordenadas = []
+        self.longitud_nombre = {}
+        self.codigos = {}
+        # clave del alimento -> su código, para soltar el anterior si cambia
+        self.codigo_de = {}
+        self.claves = {}
+        if df_catalogo is not None:
+            codigos = df_catalogo['Codigo'] if 'Codigo' in df_catalogo else [None] * len(df_catalogo)
+            for clave, comida, marca, codigo in zip(df_catalogo.index, df_catalogo['Comida'], df_catalogo['Marca'], codigos):
+                self._indexar(clave, comida, marca, codigo)
+            # El vocabulario se ordena una vez al final en lugar de insertar cada palabra nueva en su sitio
+            self.ordenadas = sorted(self.invertido)
+
+    def __len__(self):
+        return len(self.longitud_nombre)
+
+    def agregar(self, clave, comida, marca, codigo=None):
+        """Indexa un alimento; ``clave`` es lo que devolverá ``buscar`` (el índice del catálogo)."""
+        for palabra in self._indexar(clave, comida, marca, codigo):
+            self.ordenadas.insert(bisect_left(self.ordenadas, palabra), palabra)
+
+    def _indexar(self, clave, comida, marca, codigo):
+        """Todo lo de ``agregar`` salvo el vocabulario ordenado; devuelve las palabras nuevas."""
+        codigo = normalizar_codigo(codigo)
+        anterior = self.codigo_de.pop(clave, None)
+        if anterior and self.codigos.get(anterior) == clave:
+            del self.codigos[anterior]
+        if codigo:
+            self.codigos[codigo] = clave
+            self.codigo_de[clave] = codigo
+        nombre = palabras(comida) if isinstance(comida, str) else []
+        en_marca = palabras(marca) if isinstance(marca, str) else []
+        # Lo mismo que clave_catalogo(comida, marca) sin volver a normalizar los textos
+        self.claves[' '.join(nombre), ' '.join(en_marca)] = clave
+        self.longitud_nombre[clave] = len(nombre)
+        campos = [(p, PESO_MARCA) for p in en_marca]
+        campos += [(p, 1.0) for p in nombre]
+        nuevas = []
+        for palabra, peso in campos:
+            if palabra not in self.invertido:
+                nuevas.append(palabra)
+                for trigrama in _trigramas(palabra):
+                    self.por_trigrama[trigrama].add(palabra)
+            documentos = self.invertido[palabra]
+            documentos[clave] = max(documentos.get(clave, 0), peso)
+        return nuevas
+
+    def _coincidencias(self, termino):
+        """{palabra del índice: puntos} para una palabra de la consulta."""
+        encontradas = {}
+        i = bisect_left(self.ordenadas, termino)
+        while i < len(self.ordenadas) and self.ordenadas[i].startswith(termino):
+            palabra = self.ordenadas[i]
+            encontradas[palabra] = PUNTOS_EXACTA if palabra == termino else PUNTOS_PREFIJO
+            i += 1
+        maximo = _max_erratas(termino)
+        if maximo:
+            candidatas = set()
+            for trigrama in _trigramas(termino):
+                candidatas |= self.por_trigrama.get(trigrama, set())
+            for palabra in candidatas - encontradas.keys():
+                d = distancia(termino, palabra, maximo)
+                if d <= maximo:
+                    encontradas[palabra] = PUNTOS_ERRATA / d
+                elif len(palabra) > len(termino) and min(
+                    distancia(termino, palabra[:n], maximo) for n in range(len(termino) - 1, len(termino) + 2)
+                ) <= maximo:
+                    # prefijo con errata: 'platno' -> 'platanos'
+                    encontradas[palabra] = PUNTOS_ERRATA / 2
+        return encontradas
+
+    def buscar(self, texto, limite=10):
+        """Claves de los ``limite`` alimentos que mejor casan con el texto, de mejor a peor."""
+        terminos = palabras(texto)
+        if not terminos:
+            return []
+        puntos = None
+        for termino in terminos:
+            por_documento = {}
+            for palabra, valor in self._coincidencias(termino).items():
+                for clave, peso in self.invertido[palabra].items():
+                    por_documento[clave] = max(por_documento.get(clave, 0), valor * peso)
+            if puntos is None:
+                puntos = por_documento
+            else:
+                puntos = {c: p + por_documento[c] for c, p in puntos.items() if c in por_documento}
+            if not puntos:
+                return []
+        # A igualdad de puntos, primero los nombres más cortos (más parecidos a la consulta)
+        orden = sorted(puntos, key=lambda c: (-puntos[c], self.longitud_nombre[c]))
+        return orden[:limite]
+
+    def buscar_codigo(self, codigo):
+        """Clave del alimento con ese código de barras, o None."""
+        return self.codigos.get(normalizar_codigo(codigo))
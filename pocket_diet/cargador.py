@@ -0,0 +1,133 @@
+"""Carga de datos compartida entre reruns y sesiones de Streamlit.
+
+Cada interacción vuelve a ejecutar el script entero, pero los CSV solo se
+leen y se parsean cuando cambian: la clave de la caché incluye la firma
+(mtime, tamaño) del archivo, así que en un rerun normal basta con un
+``os.stat``. Después de escribir un archivo conviene llamar a ``invalidar``
+por si el sistema de archivos no distingue dos escrituras seguidas.
+"""
+import os
+
+import pandas as pd
+import streamlit as st
+
+from .almacen import DB_FILE, abrir_almacen
+from .archivos import firma_archivo
+from .exportar import ExportadorExcel
+from .graficas import MAX_PUNTOS, datos_grafica
+from .historico import HistoricoPesos
+from .off_cache import CACHE_FILE, CacheOFF
+from .off_local import ESPEJO_FILE, EspejoOFF
+from .resumenes import ResumenesPeso
+from .tendencia import TendenciaPeso
+
+_versiones = {}
+
+
+def invalidar(ruta):
+    ruta = os.path.abspath(ruta)
+    _versiones[ruta] = _versiones.get(ruta, 0) + 1
+
+
+def _clave(ruta):
+    return firma_archivo(ruta), _versiones.get(ruta, 0)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _leer_csv(ruta, clave, columnas):
+    if clave[0] is None:
+        return pd.DataFrame(columns=list(columnas))
+    return pd.read_csv(ruta)
+
+
+def cargar_csv(ruta, columnas):
+    """Lee un CSV sin transformar; si no existe devuelve un DataFrame vacío con esas columnas."""
+    ruta = os.path.abspath(ruta)
+    return _leer_csv(ruta, _clave(ruta), tuple(columnas))
+
+
+@st.cache_resource(show_spinner=False)
+def _almacen(ruta_comidas, ruta_catalogo, ruta_db):
+    return abrir_almacen(ruta_comidas, ruta_catalogo, ruta_db)
+
+
+def abrir_almacen_compartido(ruta_comidas, ruta_catalogo=None, ruta_db=DB_FILE):
+    """Un único almacén por proceso, compartido por todas las sesiones."""
+    def absoluta(ruta):
+        return os.path.abspath(ruta) if ruta else ruta
+    return _almacen(absoluta(ruta_comidas), absoluta(ruta_catalogo), absoluta(ruta_db))
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _datos_grafica(clave, _df, columnas, max_puntos, metodo):
+    return datos_grafica(_df, list(columnas), max_puntos, dict(metodo))
+
+
+def datos_grafica_cacheados(clave, df, columnas, max_puntos=MAX_PUNTOS, metodo=()):
+    """``graficas.datos_grafica`` cacheado por ``clave`` (p. ej. gráfica, rango y versión de los datos).
+
+    El DataFrame no se usa para la clave: quien llama garantiza que la clave cambia si cambian los datos.
+    """
+    return _datos_grafica(clave, df, tuple(columnas), max_puntos, tuple(dict(metodo).items()))
+
+
+@st.cache_resource(show_spinner=False)
+def _historico(ruta_csv):
+    historico = HistoricoPesos(ruta_csv)
+    historico.archivar_antiguos()
+    return historico
+
+
+def historico_compartido(ruta_csv):
+    """Histórico de peso por niveles, compartido por todas las sesiones."""
+    return _historico(os.path.abspath(ruta_csv))
+
+
+@st.cache_resource(show_spinner=False)
+def _tendencia(ruta_csv):
+    return TendenciaPeso(_historico(ruta_csv))
+
+
+def tendencia_compartida(ruta_csv):
+    """Peso tendencia y TDEE guardados del histórico de ``ruta_csv``, uno por proceso."""
+    return _tendencia(os.path.abspath(ruta_csv))
+
+
+@st.cache_resource(show_spinner=False)
+def _resumenes(ruta_csv):
+    return ResumenesPeso(_historico(ruta_csv))
+
+
+def resumenes_compartidos(ruta_csv):
+    """Resúmenes semanales y mensuales guardados del histórico de ``ruta_csv``, uno por proceso."""
+    return _resumenes(os.path.abspath(ruta_csv))
+
+
+@st.cache_resource(show_spinner=False)
+def _exportador_excel(ruta_csv, ruta_excel):
+    return ExportadorExcel(_historico(ruta_csv), ruta_excel)
+
+
+def exportador_excel_compartido(ruta_csv, ruta_excel):
+    """Exportador a Excel en segundo plano del histórico de ``ruta_csv``, uno por proceso."""
+    return _exportador_excel(os.path.abspath(ruta_csv), os.path.abspath(ruta_excel))
+
+
+@st.cache_resource(show_spinner=False)
+def _cache_off(ruta):
+    return CacheOFF(ruta)
+
+
+def cache_off_compartida(ruta=CACHE_FILE):
+    """Caché de Open Food Facts común a todas las sesiones."""
+    return _cache_off(os.path.abspath(ruta))
+
+
+@st.cache_resource(show_spinner=False)
+def _espejo_off(ruta):
+    return EspejoOFF(ruta)
+
+
+def espejo_off_compartido(ruta=ESPEJO_FILE):
+    """Copia local de Open Food Facts (vacía si todavía no se ha importado ningún volcado)."""
+    return _espejo_off(os.path.abspath(ruta))
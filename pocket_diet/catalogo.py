@@ -0,0 +1,67 @@
+"""Altas e importación masiva del catálogo de favoritos.
+
+Un alimento del catálogo se identifica por su nombre y su marca normalizados
+(sin mayúsculas, tildes ni espacios de más), así que 'Yogur Griego' de
+'Hacendado' y 'yogur  griego' de 'HACENDADO' son el mismo. Guardar uno que ya
+existe actualiza sus valores por 100 g en lugar de duplicarlo. Los almacenes
+mantienen un diccionario clave -> fila para comprobarlo en O(1).
+
+    python -m pocket_diet.catalogo alimentos.csv
+"""
+import argparse
+import json
+
+import pandas as pd
+
+from .buscador import clave_catalogo
+from .esquema import COLUMNAS_CATALOGO
+
+VALORES_100G = ['Kcal_100g', 'Proteínas_100g', 'Carbs_100g', 'Grasas_100g']
+
+
+def preparar_catalogo(df):
+    """Deja las filas con las columnas del catálogo, valores numéricos y sin claves repetidas (gana la última).
+
+    Añade la columna 'Clave'. Las filas sin nombre se descartan.
+    """
+    df = df.reindex(columns=COLUMNAS_CATALOGO)
+    df[VALORES_100G] = df[VALORES_100G].apply(pd.to_numeric, errors='coerce')
+    df['Marca'] = df['Marca'].fillna('').astype(str)
+    df['Codigo'] = df['Codigo'].astype('string').str.replace(r'\.0$', '', regex=True).astype(object)
+    df['Codigo'] = df['Codigo'].where(df['Codigo'].notna(), None)
+    df['Clave'] = [clave_catalogo(c, m) for c, m in zip(df['Comida'], df['Marca'])]
+    df = df[df['Clave'].str[0] != '']
+    return df.drop_duplicates('Clave', keep='last').reset_index(drop=True)
+
+
+def leer_archivo_catalogo(ruta):
+    """Lee alimentos de un CSV, una lista JSON o un JSON por línea, con las columnas del catálogo."""
+    if ruta.endswith('.csv'):
+        return pd.read_csv(ruta, dtype={'Codigo': str})
+    with open(ruta, encoding='utf-8') as f:
+        primer = f.read(1)
+        while primer.isspace():
+            primer = f.read(1)
+        f.seek(0)
+        if primer == '[':
+            return pd.DataFrame(json.load(f))
+        return pd.read_json(f, lines=True, dtype={'Codigo': str})
+
+
+def importar_catalogo(almacen, ruta):
+    """Guarda en el catálogo todos los alimentos del archivo de una vez. Devuelve (añadidos, actualizados)."""
+    return almacen.guardar_en_catalogo(leer_archivo_catalogo(ruta))
+
+
+if __name__ == '__main__':
+    from .almacen import DB_FILE, abrir_almacen
+
+    parser = argparse.ArgumentParser(description='Importa alimentos (CSV o JSON) al catálogo de favoritos.')
+    parser.add_argument('archivo')
+    parser.add_argument('--comidas', default='comidas.csv')
+    parser.add_argument('--catalogo', default='catalogo_comidas.csv')
+    parser.add_argument('--db', default=DB_FILE)
+    args = parser.parse_args()
+    almacen = abrir_almacen(args.comidas, args.catalogo, args.db)
+    anadidos, actualizados = importar_catalogo(almacen, args.archivo)
+    print(f'{anadidos} alimentos añadidos, {actualizados} actualizados')
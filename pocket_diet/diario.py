@@ -0,0 +1,223 @@
+"""Diario de cambios append-only para comidas.csv.
+
+Cada alta, edición o borrado se añade como una línea JSON al final de
+``comidas.csv.diario`` en lugar de reescribir el CSV completo. Al cargar se
+lee el CSV (la instantánea) y se reaplican los cambios del diario en orden.
+Cuando el diario crece más de una cuarta parte de la instantánea se compacta:
+se reescribe el CSV con el estado actual y se vacía el diario, así que el
+coste amortizado de cada cambio es constante.
+
+Cargar, escribir y compactar se hacen con ``bloqueo_archivo`` sobre
+comidas.csv, así que otro proceso nunca ve una compactación a medias. Cada
+grupo de cambios se escribe con una sola llamada y una línea final sin salto
+de línea (un corte a mitad de escritura) se ignora al leer.
+
+Cada comida tiene un identificador único y permanente (columna ``ID`` del
+CSV, índice del DataFrame) que no cambia al compactar. Los CSV antiguos sin
+esa columna usan la posición de la fila, que se guarda como ID en la
+siguiente compactación.
+"""
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from .archivos import bloqueo_archivo
+from .esquema import COLUMNAS_COMIDAS, a_nativo
+
+# Nunca se compacta con menos cambios que estos, aunque el CSV sea pequeño
+UMBRAL_COMPACTACION = 500
+
+
+class DiarioComidas:
+    def __init__(self, ruta_csv, umbral=UMBRAL_COMPACTACION):
+        self.ruta_csv = ruta_csv
+        self.ruta_diario = ruta_csv + '.diario'
+        self.ruta_tmp = ruta_csv + '.tmp'
+        self.ruta_diario_viejo = ruta_csv + '.diario.viejo'
+        self.umbral = umbral
+        self.filas_instantanea = 0
+        self.cambios = 0
+        self.siguiente_id = 0
+
+    # ---------- LECTURA ----------
+    def _leer_cambios(self, ruta):
+        try:
+            with open(ruta, encoding='utf-8') as f:
+                lineas = f.readlines()
+        except FileNotFoundError:
+            return []
+        if lineas and not lineas[-1].endswith('\n'):
+            # Escritura interrumpida: ese último cambio no llegó a guardarse
+            lineas.pop()
+        return [json.loads(linea) for linea in lineas if linea.strip()]
+
+    def _recuperar_compactacion(self):
+        # Una compactación se interrumpió. Si el CSV temporal sigue ahí, la
+        # instantánea vieja no llegó a sustituirse y hay que conservar sus cambios.
+        if not os.path.exists(self.ruta_diario_viejo):
+            return
+        if os.path.exists(self.ruta_tmp):
+            pendientes = self._leer_cambios(self.ruta_diario)
+            os.replace(self.ruta_diario_viejo, self.ruta_diario)
+            with open(self.ruta_diario, 'a', encoding='utf-8') as f:
+                for cambio in pendientes:
+                    f.write(json.dumps(cambio, ensure_ascii=False) + '\n')
+            os.remove(self.ruta_tmp)
+        else:
+            os.remove(self.ruta_diario_viejo)
+
+    def _leer_instantanea(self):
+        try:
+            df = pd.read_csv(self.ruta_csv)
+        except FileNotFoundError:
+            return pd.DataFrame(columns=COLUMNAS_COMIDAS)
+        if 'ID' not in df.columns:
+            return df
+        ids = pd.to_numeric(df.pop('ID'), errors='coerce')
+        if ids.isna().any():
+            # Filas añadidas a mano sin ID: se numeran a continuación del mayor
+            siguiente = int(ids.max()) + 1 if ids.notna().any() else 0
+            ids[ids.isna()] = range(siguiente, siguiente + int(ids.isna().sum()))
+        df.index = pd.Index(ids.astype('int64'), name=None)
+        return df
+
+    def cargar(self):
+        """Devuelve todas las comidas con el ID de cada una como índice."""
+        with bloqueo_archivo(self.ruta_csv):
+            return self._cargar()
+
+    def _cargar(self):
+        self._recuperar_compactacion()
+        df = self._leer_instantanea()
+        self.filas_instantanea = len(df)
+        mayor_id = int(df.index.max()) if len(df) else -1
+
+        cambios = self._leer_cambios(self.ruta_diario)
+        self.cambios = len(cambios)
+
+        nuevas = {}
+        actualizaciones = {}
+        borradas = set()
+        for cambio in cambios:
+            id_fila = cambio['id']
+            if cambio['op'] == 'insertar':
+                nuevas[id_fila] = cambio['fila']
+            elif cambio['op'] == 'actualizar':
+                if id_fila in nuevas:
+                    nuevas[id_fila].update(cambio['fila'])
+                else:
+                    actualizaciones.setdefault(id_fila, {}).update(cambio['fila'])
+            elif cambio['op'] == 'eliminar':
+                if nuevas.pop(id_fila, None) is None:
+                    borradas.add(id_fila)
+                    actualizaciones.pop(id_fila, None)
+
+        for id_fila, valores in actualizaciones.items():
+            if id_fila in df.index:
+                for columna, valor in valores.items():
+                    df.loc[id_fila, columna] = valor
+        if borradas:
+            df = df.drop(index=[i for i in borradas if i in df.index])
+        if nuevas:
+            df = pd.concat([df, pd.DataFrame.from_dict(nuevas, orient='index')])
+
+        for columna in COLUMNAS_COMIDAS:
+            if columna not in df.columns:
+                df[columna] = pd.NA
+        df['Tipo'] = df['Tipo'].fillna('')
+        df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce').dt.date
+
+        ids = [mayor_id] + [c['id'] for c in cambios]
+        self.siguiente_id = max(ids) + 1
+        return df
+
+    # ---------- ESCRITURA ----------
+    def bloqueo(self):
+        """Exclusión entre procesos para una lectura seguida de cambios (ver ``AlmacenCSV``)."""
+        return bloqueo_archivo(self.ruta_csv)
+
+    def _quitar_linea_cortada(self):
+        """Borra del diario una última línea a medias para que el siguiente cambio no se pegue a ella."""
+        try:
+            f = open(self.ruta_diario, 'rb+')
+        except FileNotFoundError:
+            return
+        with f:
+            tamano = f.seek(0, os.SEEK_END)
+            if tamano == 0:
+                return
+            f.seek(tamano - 1)
+            if f.read(1) != b'\n':
+                f.seek(0)
+                f.truncate(f.read().rfind(b'\n') + 1)
+
+    def _registrar(self, registros):
+        with self.bloqueo():
+            self._quitar_linea_cortada()
+            with open(self.ruta_diario, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(registro, ensure_ascii=False) + '\n' for registro in registros))
+            self.cambios += len(registros)
+            if self.cambios > max(self.umbral, self.filas_instantanea // 4):
+                self.compactar()
+
+    def insertar(self, nuevas):
+        """Añade filas al diario y las devuelve con el identificador asignado."""
+        nuevas = nuevas.copy()
+        nuevas.index = range(self.siguiente_id, self.siguiente_id + len(nuevas))
+        self.siguiente_id += len(nuevas)
+        registros = [
+            {'op': 'insertar', 'id': id_fila, 'fila': {c: a_nativo(v) for c, v in fila.items()}}
+            for id_fila, fila in nuevas.iterrows()
+        ]
+        self._registrar(registros)
+        return nuevas
+
+    def actualizar(self, id_fila, valores):
+        valores = {c: a_nativo(v) for c, v in valores.items()}
+        self._registrar([{'op': 'actualizar', 'id': int(id_fila), 'fila': valores}])
+
+    def eliminar(self, id_fila):
+        self._registrar([{'op': 'eliminar', 'id': int(id_fila)}])
+
+    def importar(self, bloques):
+        """Añade muchas filas sin pasar por el diario: compacta y anexa los bloques a una copia del CSV.
+
+        La copia sustituye al CSV solo al terminar, así que una importación
+        interrumpida no deja filas a medias. Devuelve cuántas filas se añadieron.
+        """
+        with self.bloqueo():
+            return self._importar(bloques)
+
+    def _importar(self, bloques):
+        self.compactar()
+        columnas = list(pd.read_csv(self.ruta_csv, nrows=0).columns[1:])
+        shutil.copyfile(self.ruta_csv, self.ruta_tmp)
+        total = 0
+        with open(self.ruta_tmp, 'a', encoding='utf-8', newline='') as f:
+            for bloque in bloques:
+                bloque = bloque.reindex(columns=columnas)
+                bloque.index = range(self.siguiente_id, self.siguiente_id + len(bloque))
+                bloque.to_csv(f, header=False)
+                self.siguiente_id += len(bloque)
+                total += len(bloque)
+        os.replace(self.ruta_tmp, self.ruta_csv)
+        self.filas_instantanea += total
+        return total
+
+    def compactar(self):
+        """Reescribe comidas.csv con el estado actual y vacía el diario."""
+        with self.bloqueo():
+            self._compactar()
+
+    def _compactar(self):
+        df = self._cargar()
+        df.to_csv(self.ruta_tmp, index_label='ID')
+        if os.path.exists(self.ruta_diario):
+            os.replace(self.ruta_diario, self.ruta_diario_viejo)
+        os.replace(self.ruta_tmp, self.ruta_csv)
+        if os.path.exists(self.ruta_diario_viejo):
+            os.remove(self.ruta_diario_viejo)
+        self.filas_instantanea = len(df)
+        self.cambios = 0
@@ -0,0 +1,199 @@
+"""Detección y fusión de alimentos casi duplicados en el catálogo.
+
+Comparar todos los pares no escala, así que se hace en tres pasos:
+
+1. Firma MinHash de las palabras normalizadas del nombre de cada alimento
+   (``NUM_PERMUTACIONES`` hashes, calculados con numpy para todo el catálogo).
+2. LSH: la firma se parte en bandas y solo son candidatos los alimentos de la
+   misma marca que coinciden en alguna banda entera. Las cubetas enormes (una
+   palabra que aparece en miles de nombres) no aportan nada y se saltan.
+3. Cada candidato se confirma si la similitud de Jaccard estimada por las
+   firmas llega a ``UMBRAL_JACCARD`` y los valores por 100 g no se separan más
+   de ``TOLERANCIA_MACROS`` (relativa, más ``HOLGURA_MACROS`` de margen).
+
+Los pares confirmados se agrupan y de cada grupo se queda un alimento: el que
+tiene código de barras, luego el más registrado en comidas y luego el primero.
+Al fusionar, las comidas que apuntaban a los duplicados pasan a usar su
+nombre y marca, y los duplicados se borran del catálogo.
+
+    python -m pocket_diet.duplicados            # solo muestra las propuestas
+    python -m pocket_diet.duplicados --aplicar
+"""
+import argparse
+import zlib
+from collections import Counter
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from .buscador import clave_catalogo, normalizar_codigo, palabras
+from .catalogo import VALORES_100G
+
+NUM_PERMUTACIONES = 36
+FILAS_POR_BANDA = 3
+UMBRAL_JACCARD = 0.5
+TOLERANCIA_MACROS = 0.1
+HOLGURA_MACROS = 1.0
+MAX_CUBETA = 100
+
+
+def _firmas(conjuntos, num_permutaciones=NUM_PERMUTACIONES, semilla=1):
+    """Matriz (alimentos x permutaciones) con el MinHash de cada conjunto de palabras."""
+    filas, hashes = [], []
+    for i, tokens in enumerate(conjuntos):
+        for token in tokens or {''}:
+            filas.append(i)
+            hashes.append(zlib.crc32(token.encode('utf-8')))
+    filas = np.asarray(filas)
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    inicios = np.flatnonzero(np.r_[True, filas[1:] != filas[:-1]])
+    rng = np.random.default_rng(semilla)
+    # Multiplicar-sumar-desplazar: multiplicadores impares de 64 bits y los 32 bits altos del resultado.
+    # Con a y b pequeños módulo un primo grande las permutaciones saldrían casi lineales en h y correlacionadas
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_permutaciones, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_permutaciones, dtype=np.uint64, endpoint=True)
+    firmas = np.empty((len(conjuntos), num_permutaciones), dtype=np.uint64)
+    for k in range(num_permutaciones):
+        # El desbordamiento de 64 bits es el módulo 2^64 del esquema
+        permutados = (a[k] * hashes + b[k]) >> np.uint64(32)
+        firmas[:, k] = np.minimum.reduceat(permutados, inicios)
+    return firmas
+
+
+def _candidatos(firmas, marcas, filas_por_banda=FILAS_POR_BANDA, max_cubeta=MAX_CUBETA):
+    """Pares (i, j) con i < j que comparten marca y alguna banda completa de la firma."""
+    marca_id = pd.factorize(pd.Series(marcas, dtype=object))[0].astype(np.uint64)
+    n = len(firmas)
+    pares = []
+    for inicio in range(0, firmas.shape[1], filas_por_banda):
+        # Marca y valores de la banda mezclados en un solo entero (el desbordamiento es intencionado);
+        # una colisión solo añade un candidato que luego no se confirma
+        clave = marca_id
+        for k in range(inicio, inicio + filas_por_banda):
+            clave = clave * np.uint64(0x9E3779B97F4A7C15) + firmas[:, k]
+        cubeta, unicos = pd.factorize(clave)
+        tamanos = np.bincount(cubeta, minlength=len(unicos))
+        indices = np.flatnonzero((tamanos[cubeta] >= 2) & (tamanos[cubeta] <= max_cubeta))
+        if len(indices) == 0:
+            continue
+        # Ordenados por cubeta, los pares de una misma cubeta están a distancia 1, 2, ... en el array
+        orden = indices[np.argsort(cubeta[indices], kind='stable')]
+        cubetas = cubeta[orden]
+        for distancia in range(1, int(tamanos[cubetas].max())):
+            mismas = cubetas[distancia:] == cubetas[:-distancia]
+            a, b = orden[:-distancia][mismas], orden[distancia:][mismas]
+            pares.append(np.minimum(a, b).astype(np.int64) * n + np.maximum(a, b))
+    if not pares:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    pares = np.sort(np.concatenate(pares))
+    pares = pares[np.r_[True, pares[1:] != pares[:-1]]]
+    return pares // n, pares % n
+
+
+def _raiz(padres, i):
+    while padres[i] != i:
+        padres[i] = padres[padres[i]]
+        i = padres[i]
+    return i
+
+
+def proponer_fusiones(df_catalogo, usos=None, umbral=UMBRAL_JACCARD, tolerancia=TOLERANCIA_MACROS):
+    """Grupos de casi duplicados como listas de índices del catálogo, con el que se conserva primero.
+
+    ``usos`` es opcional: {(nombre, marca) normalizados: veces registrado en comidas}.
+    """
+    if len(df_catalogo) < 2:
+        return []
+    nombres = [palabras(c) if isinstance(c, str) else [] for c in df_catalogo['Comida']]
+    marcas = [' '.join(palabras(m)) if isinstance(m, str) else '' for m in df_catalogo['Marca']]
+    claves = [(' '.join(nombre), marca) for nombre, marca in zip(nombres, marcas)]
+    firmas = _firmas([set(nombre) for nombre in nombres])
+    i, j = _candidatos(firmas, marcas)
+    if len(i) == 0:
+        return []
+
+    similitud = (firmas[i] == firmas[j]).mean(axis=1)
+    valores = df_catalogo[VALORES_100G].apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype='float')
+    # Relativa, con un margen de una unidad para valores pequeños redondeados (0.4 g frente a 0 g)
+    margen = tolerancia * np.maximum(valores[i], valores[j]) + HOLGURA_MACROS
+    confirmados = (similitud >= umbral) & (np.abs(valores[i] - valores[j]) <= margen).all(axis=1)
+
+    padres = list(range(len(df_catalogo)))
+    for a, b in zip(i[confirmados].tolist(), j[confirmados].tolist()):
+        ra, rb = _raiz(padres, a), _raiz(padres, b)
+        if ra != rb:
+            padres[max(ra, rb)] = min(ra, rb)
+    grupos = {}
+    for posicion in sorted(set(i[confirmados].tolist()) | set(j[confirmados].tolist())):
+        grupos.setdefault(_raiz(padres, posicion), []).append(posicion)
+
+    usos = usos or {}
+    codigos = [bool(normalizar_codigo(c)) for c in df_catalogo.get('Codigo', [None] * len(claves))]
+    etiquetas = df_catalogo.index
+    propuestas = []
+    for posiciones in grupos.values():
+        posiciones.sort(key=lambda p: (not codigos[p], -usos.get(claves[p], 0), p))
+        propuestas.append([etiquetas[p] for p in posiciones])
+    return propuestas
+
+
+def usos_en_comidas(df_comidas):
+    return Counter(clave_catalogo(c, m) for c, m in zip(df_comidas['Comida'], df_comidas['Marca']))
+
+
+def aplicar_fusiones(almacen, grupos):
+    """Reapunta las comidas de cada duplicado al alimento conservado y borra los duplicados.
+
+    Devuelve (alimentos borrados, comidas actualizadas).
+    """
+    df_catalogo = almacen.catalogo()
+    destino = {}
+    borrar = []
+    for grupo in grupos:
+        conservado = df_catalogo.loc[grupo[0]]
+        for duplicado in grupo[1:]:
+            fila = df_catalogo.loc[duplicado]
+            destino[clave_catalogo(fila['Comida'], fila['Marca'])] = conservado
+            borrar.append(duplicado)
+        if not normalizar_codigo(conservado.get('Codigo')):
+            # El conservado hereda el código de barras de algún duplicado para que siga encontrándose al escanear
+            codigo = next((c for c in df_catalogo.loc[grupo[1:], 'Codigo'] if normalizar_codigo(c)), None)
+            if codigo:
+                almacen.guardar_en_catalogo(conservado.to_frame().T.assign(Codigo=codigo))
+
+    comidas = almacen.rango(date.min, date.max)
+    actualizadas = 0
+    for id_fila, comida, marca in zip(comidas.index, comidas['Comida'], comidas['Marca']):
+        conservado = destino.get(clave_catalogo(comida, marca))
+        if conservado is not None and (comida, marca) != (conservado['Comida'], conservado['Marca']):
+            almacen.actualizar(id_fila, {'Comida': conservado['Comida'], 'Marca': conservado['Marca']})
+            actualizadas += 1
+    almacen.eliminar_catalogo(borrar)
+    return len(borrar), actualizadas
+
+
+if __name__ == '__main__':
+    from .almacen import DB_FILE, abrir_almacen
+
+    parser = argparse.ArgumentParser(description='Busca alimentos casi duplicados en el catálogo y los fusiona.')
+    parser.add_argument('--comidas', default='comidas.csv')
+    parser.add_argument('--catalogo', default='catalogo_comidas.csv')
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--umbral', type=float, default=UMBRAL_JACCARD, help='similitud mínima de los nombres')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_MACROS, help='diferencia relativa máxima por 100 g')
+    parser.add_argument('--aplicar', action='store_true', help='fusiona en lugar de solo mostrar')
+    args = parser.parse_args()
+
+    almacen = abrir_almacen(args.comidas, args.catalogo, args.db)
+    df_catalogo = almacen.catalogo()
+    grupos = proponer_fusiones(
+        df_catalogo, usos_en_comidas(almacen.rango(date.min, date.max)), args.umbral, args.tolerancia
+    )
+    for grupo in grupos:
+        nombres = [f"{df_catalogo.loc[k, 'Comida']} ({df_catalogo.loc[k, 'Marca']})" for k in grupo]
+        print(f'{nombres[0]}  <-  ' + ' | '.join(nombres[1:]))
+    print(f'{len(grupos)} grupos, {sum(len(g) - 1 for g in grupos)} duplicados')
+    if args.aplicar and grupos:
+        borrados, actualizadas = aplicar_fusiones(almacen, grupos)
+        print(f'{borrados} alimentos fusionados, {actualizadas} comidas actualizadas')
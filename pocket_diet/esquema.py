@@ -0,0 +1,32 @@
+"""Columnas y constantes comunes a los CSV de Pocket Diet."""
+
+import pandas as pd
+
+COLUMNAS_COMIDAS = ['Fecha', 'Tipo', 'Comida', 'Marca', 'Gramos', 'Kcal', 'Proteínas', 'Carbs', 'Grasas']
+COLUMNAS_CATALOGO = ['Comida', 'Marca', 'Kcal_100g', 'Proteínas_100g', 'Carbs_100g', 'Grasas_100g', 'Codigo']
+TIPOS_COMIDA = ['Desayuno', 'Comida', 'Cena', 'Snack']
+MACROS = ['Kcal', 'Proteínas', 'Carbs', 'Grasas']
+
+
+def a_nativo(valor):
+    """Convierte un valor de pandas/numpy a un tipo que entiendan json y sqlite3."""
+    if pd.isna(valor):
+        return None
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    if hasattr(valor, 'item'):
+        return valor.item()
+    return valor
+
+
+def macros_consumidas(por_100g, gramos):
+    """Kcal y macros de ``gramos`` de un alimento a partir de sus valores por 100 g (Kcal_100g...)."""
+    return {m: por_100g[f'{m}_100g'] * gramos / 100 for m in MACROS}
+
+
+def leer_catalogo(ruta):
+    """Lee catalogo_comidas.csv; los códigos de barras como texto para no perder ceros a la izquierda."""
+    df = pd.read_csv(ruta, dtype={'Codigo': str})
+    if 'Codigo' not in df.columns:
+        df['Codigo'] = None
+    return df
@@ -0,0 +1,68 @@
+"""Estadísticas de kcal y macros en cualquier rango de fechas.
+
+Se construye sobre los totales diarios: se rellenan los días sin comidas con
+ceros y se guardan las sumas acumuladas de cada columna (más el número de
+días con registros). Con eso la suma o la media de cualquier rango es una
+resta, O(1), y la serie completa de medias móviles es una sola operación
+vectorizada sobre todo el histórico.
+"""
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from .totales import MACROS
+
+
+class EstadisticasMacros:
+    def __init__(self, df_totales):
+        self.columnas = MACROS + ['Dias']
+        self.cache_medias = {}
+        if df_totales.empty:
+            self.inicio = None
+            self.fechas = pd.Index([])
+            self.acumulado = np.zeros((1, len(self.columnas)))
+            return
+        inicio, fin = min(df_totales.index), max(df_totales.index)
+        self.inicio = inicio
+        self.fechas = pd.Index(pd.date_range(inicio, fin).date, name='Fecha')
+        diario = df_totales.reindex(self.fechas, fill_value=0)
+        valores = diario[MACROS].to_numpy(dtype='float')
+        dias = (diario['Entradas'].to_numpy() > 0).astype('float')[:, None]
+        # Fila 0 a ceros para que la suma de [i, j] sea acumulado[j + 1] - acumulado[i]
+        self.acumulado = np.vstack([np.zeros(len(self.columnas)), np.cumsum(np.hstack([valores, dias]), axis=0)])
+
+    def _posicion(self, fecha):
+        if self.inicio is None:
+            return 0
+        return min(max((fecha - self.inicio).days, 0), len(self.fechas))
+
+    def suma(self, inicio, fin):
+        """Sumas de kcal y macros entre dos fechas (incluidas) y días con registros ('Dias')."""
+        i = self._posicion(inicio)
+        j = self._posicion(fin + timedelta(days=1))
+        return pd.Series(self.acumulado[max(j, i)] - self.acumulado[i], index=self.columnas)
+
+    def promedio(self, inicio, fin):
+        """Media diaria contando solo los días con comidas registradas, como 'Totales últimos 7 días'."""
+        suma = self.suma(inicio, fin)
+        if suma['Dias'] == 0:
+            return pd.Series(np.nan, index=MACROS)
+        return suma[MACROS] / suma['Dias']
+
+    def medias_moviles(self, ventanas=(7, 14, 28)):
+        """Serie diaria de medias móviles para cada ventana, columnas como 'Kcal_7d'."""
+        ventanas = tuple(ventanas)
+        if ventanas in self.cache_medias:
+            return self.cache_medias[ventanas]
+        series = {}
+        for ventana in ventanas:
+            fin = self.acumulado[1:]
+            comienzo = self.acumulado[np.maximum(np.arange(1, len(self.acumulado)) - ventana, 0)]
+            sumas = fin - comienzo
+            with np.errstate(invalid='ignore', divide='ignore'):
+                medias = sumas[:, :-1] / sumas[:, -1:]
+            for k, macro in enumerate(MACROS):
+                series[f'{macro}_{ventana}d'] = medias[:, k]
+        self.cache_medias[ventanas] = pd.DataFrame(series, index=self.fechas)
+        return self.cache_medias[ventanas]
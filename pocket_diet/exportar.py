@@ -0,0 +1,97 @@
+"""Exportación del histórico de peso a Excel fuera del camino de guardado.
+
+Guardar un peso solo escribe datos_peso.csv y avisa a ``ExportadorExcel``,
+que regenera datos_peso.xlsx en un hilo aparte cuando pasan ``DEMORA``
+segundos sin más guardados: una ráfaga de clics produce una sola
+exportación. El libro se escribe con openpyxl en modo write-only (filas en
+streaming, sin mantener las celdas en memoria) a un archivo temporal que
+luego sustituye al anterior, así que nunca queda un Excel a medias.
+
+``contenido`` genera el mismo libro en memoria para el botón de descarga.
+openpyxl se importa al escribir el primer libro, no al arrancar la app.
+"""
+import io
+import threading
+import time
+
+from .archivos import escribir_atomico
+
+DEMORA = 2.0
+MIME_EXCEL = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def escribir_excel(df, destino):
+    """Escribe el DataFrame en una hoja; ``destino`` es una ruta o un archivo binario."""
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(list(df.columns))
+    valores = df.astype(object).where(df.notna(), None)
+    for fila in valores.itertuples(index=False, name=None):
+        hoja.append(fila)
+    libro.save(destino)
+
+
+class ExportadorExcel:
+    def __init__(self, historico, ruta_excel, demora=DEMORA):
+        self.historico = historico
+        self.ruta_excel = ruta_excel
+        self.demora = demora
+        self.lock = threading.Lock()
+        self.hilo = None
+        self.pendiente = False
+        self.ultima_peticion = 0.0
+        # Último error al exportar (p. ej. el Excel está abierto en Windows o el disco lleno), para avisar en la app
+        self.error = None
+
+    def programar(self):
+        """Pide una exportación; se hará cuando pasen ``demora`` segundos sin más peticiones."""
+        with self.lock:
+            self.ultima_peticion = time.monotonic()
+            self.pendiente = True
+            if self.hilo is None:
+                self.hilo = threading.Thread(target=self._trabajar, name='exportar-excel', daemon=True)
+                self.hilo.start()
+
+    def _trabajar(self):
+        try:
+            while True:
+                with self.lock:
+                    if not self.pendiente:
+                        self.hilo = None
+                        return
+                    espera = self.ultima_peticion + self.demora - time.monotonic()
+                    if espera <= 0:
+                        self.pendiente = False
+                if espera > 0:
+                    time.sleep(espera)
+                else:
+                    self.exportar()
+        finally:
+            # Si el hilo muere por lo que sea, el siguiente ``programar`` tiene que poder arrancar otro
+            with self.lock:
+                if self.hilo is threading.current_thread():
+                    self.hilo = None
+
+    def exportar(self):
+        """Escribe el Excel ya, con todo el histórico."""
+        try:
+            df = self.historico.cargar()
+            escribir_atomico(self.ruta_excel, lambda f: escribir_excel(df, f), binario=True)
+            self.error = None
+        except Exception as e:
+            # En el hilo no hay nadie que la recoja: se guarda para que la app avise y se sigue
+            self.error = e
+
+    def esperar(self, timeout=None):
+        """Espera a que termine la exportación en curso (si la hay)."""
+        hilo = self.hilo
+        if hilo is not None:
+            hilo.join(timeout)
+
+    def contenido(self):
+        """El libro completo en bytes, para ``st.download_button``."""
+        salida = io.BytesIO()
+        escribir_excel(self.historico.cargar(), salida)
+        return salida.getvalue()
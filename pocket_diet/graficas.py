@@ -0,0 +1,79 @@
+"""Reducción de puntos para las gráficas de Altair.
+
+Altair mete todas las filas en el JSON de la gráfica, así que con años de
+datos diarios el envío y el dibujo crecen sin límite. Aquí se preparan los
+datos en formato largo (Fecha, Variable, Valor), ya plegados para no usar
+``transform_fold`` en el navegador, y con como mucho ``MAX_PUNTOS`` por
+gráfica. Por debajo del límite van todos los puntos tal cual; por encima se
+elige por serie:
+
+* ``'lttb'`` (Largest-Triangle-Three-Buckets): un punto por cubeta, el que
+  forma el triángulo más grande con sus vecinos. Conserva la forma de líneas
+  suaves como el peso y su media móvil.
+* ``'minmax'``: el mínimo y el máximo de cada cubeta. Conserva los picos de
+  series que saltan mucho de un día a otro, como las kcal.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_PUNTOS = 1000
+
+
+def _dias(fechas):
+    return pd.DatetimeIndex(fechas).asi8 / 86_400e9
+
+
+def lttb(x, y, puntos):
+    """Posiciones de los ``puntos`` que conservan mejor la forma de la línea (x, y)."""
+    n = len(x)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+    # El primero y el último se quedan siempre; el resto se reparte en puntos - 2 cubetas
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(int)
+    elegidos = np.empty(puntos, dtype=int)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        siguiente = slice(bordes[i + 1], bordes[i + 2] if i + 2 < len(bordes) else n)
+        media_x, media_y = x[siguiente].mean(), y[siguiente].mean()
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = anterior
+    return elegidos
+
+
+def minmax(y, puntos):
+    """Posiciones del mínimo y el máximo de cada una de ``puntos // 2`` cubetas, en orden."""
+    n = len(y)
+    if puntos >= n or puntos < 2:
+        return np.arange(n)
+    cubeta = np.arange(n) * (puntos // 2) // n
+    orden = np.lexsort((y, cubeta))
+    cubetas_ordenadas = cubeta[orden]
+    primeros = np.flatnonzero(np.r_[True, cubetas_ordenadas[1:] != cubetas_ordenadas[:-1]])
+    ultimos = np.r_[primeros[1:] - 1, n - 1]
+    return np.unique(np.r_[orden[primeros], orden[ultimos]])
+
+
+def datos_grafica(df, columnas, max_puntos=MAX_PUNTOS, metodo='lttb'):
+    """Columnas de ``df`` en formato largo (Fecha, Variable, Valor) con como mucho ``max_puntos`` filas.
+
+    ``metodo`` es 'lttb', 'minmax' o un diccionario columna -> método.
+    """
+    por_serie = max(max_puntos // max(len(columnas), 1), 3)
+    partes = []
+    for columna in columnas:
+        serie = df[['Fecha', columna]].dropna()
+        x, y = _dias(serie['Fecha']), serie[columna].to_numpy(dtype='float')
+        elegido = metodo.get(columna, 'lttb') if isinstance(metodo, dict) else metodo
+        posiciones = lttb(x, y, por_serie) if elegido == 'lttb' else minmax(y, por_serie)
+        partes.append(pd.DataFrame({
+            'Fecha': serie['Fecha'].to_numpy()[posiciones],
+            'Variable': columna,
+            'Valor': y[posiciones]
+        }))
+    return pd.concat(partes, ignore_index=True)
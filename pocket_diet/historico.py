@@ -0,0 +1,182 @@
+"""Histórico de peso en dos niveles: caliente y archivado.
+
+datos_peso.csv guarda solo los últimos ``DIAS_CALIENTES`` días (redondeado al
+inicio de mes). Los meses anteriores se archivan en
+``datos_peso_archivo/AAAA-MM.parquet`` comprimidos con zstd, y un pequeño
+``indice.json`` recuerda qué fechas y cuántas filas tiene cada mes. Arrancar
+la app y registrar un peso solo lee el nivel caliente; los meses archivados
+se leen cuando el rango seleccionado llega hasta ellos.
+
+Las escrituras van con ``bloqueo_archivo`` sobre datos_peso.csv y cada
+archivo se reemplaza entero de forma atómica. ``registrar`` relee el nivel
+caliente dentro del bloqueo, así que dos sesiones que guardan a la vez suman
+sus pesos en lugar de pisarse.
+"""
+import json
+import os
+import threading
+
+import pandas as pd
+
+from .archivos import bloqueo_archivo, escribir_atomico, firma_archivo
+
+DIAS_CALIENTES = 90
+
+
+def pesos_vacio():
+    return pd.DataFrame({
+        'Fecha': pd.Series(dtype='datetime64[ns]'),
+        'Peso': pd.Series(dtype='float'),
+        'Kcal': pd.Series(dtype='float')
+    })
+
+
+def _leer_csv_pesos(ruta):
+    df = pd.read_csv(ruta)
+    df['Fecha'] = pd.to_datetime(df['Fecha'], errors='coerce')
+    return df[df['Fecha'].notnull()]
+
+
+def _leer_json(ruta):
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _mes(fecha):
+    return pd.Timestamp(fecha).strftime('%Y-%m')
+
+
+class HistoricoPesos:
+    def __init__(self, ruta_csv, dias_calientes=DIAS_CALIENTES):
+        self.ruta_csv = ruta_csv
+        self.carpeta = os.path.splitext(ruta_csv)[0] + '_archivo'
+        self.ruta_indice = os.path.join(self.carpeta, 'indice.json')
+        self.dias_calientes = dias_calientes
+        self.lock = threading.RLock()
+        # ruta -> (firma, contenido); se vuelve a leer si el archivo cambia
+        self.cache = {}
+
+    def _leer(self, ruta, lector):
+        firma = firma_archivo(ruta)
+        if firma is None:
+            return None
+        en_cache = self.cache.get(ruta)
+        if en_cache is None or en_cache[0] != firma:
+            en_cache = (firma, lector(ruta))
+            self.cache[ruta] = en_cache
+        return en_cache[1]
+
+    def _ruta_mes(self, mes):
+        return os.path.join(self.carpeta, f'{mes}.parquet')
+
+    def _mes_archivado(self, mes):
+        return self._leer(self._ruta_mes(mes), pd.read_parquet)
+
+    # ---------- LECTURA ----------
+    def caliente(self):
+        with self.lock:
+            df = self._leer(self.ruta_csv, _leer_csv_pesos)
+            return pesos_vacio() if df is None else df.copy()
+
+    def indice(self):
+        with self.lock:
+            return self._leer(self.ruta_indice, _leer_json) or {}
+
+    def limites(self):
+        """(fecha mínima, fecha máxima, número de registros) sin leer los meses archivados."""
+        with self.lock:
+            df = self.caliente()
+            indice = self.indice()
+            fechas = [pd.Timestamp(m['desde']) for m in indice.values()]
+            fechas += [pd.Timestamp(m['hasta']) for m in indice.values()]
+            if not df.empty:
+                fechas += [df['Fecha'].min(), df['Fecha'].max()]
+            filas = len(df) + sum(m['filas'] for m in indice.values())
+            if not fechas:
+                return None, None, 0
+            return min(fechas), max(fechas), filas
+
+    def cargar(self, desde=None):
+        """Nivel caliente más los meses archivados a partir de ``desde`` (todos si es None)."""
+        with self.lock:
+            partes = [
+                self._mes_archivado(mes)
+                for mes in sorted(self.indice())
+                if desde is None or mes >= _mes(desde)
+            ]
+            partes.append(self.caliente())
+            df = pd.concat([p for p in partes if p is not None and not p.empty] or [pesos_vacio()], ignore_index=True)
+            # Si una fecha está en los dos niveles manda el caliente, que es el más reciente
+            df = df.drop_duplicates('Fecha', keep='last').sort_values('Fecha')
+            return df.reset_index(drop=True)
+
+    def version(self):
+        """Valor que cambia con cualquier escritura en el nivel caliente o en el archivo."""
+        return firma_archivo(self.ruta_csv), firma_archivo(self.ruta_indice)
+
+    def existe(self, fecha):
+        with self.lock:
+            if (self.caliente()['Fecha'] == fecha).any():
+                return True
+            if _mes(fecha) in self.indice():
+                return bool((self._mes_archivado(_mes(fecha))['Fecha'] == fecha).any())
+            return False
+
+    # ---------- ESCRITURA ----------
+    def fecha_corte(self):
+        limite = pd.Timestamp.today().normalize() - pd.Timedelta(days=self.dias_calientes)
+        return limite.replace(day=1)
+
+    def bloqueo(self):
+        return bloqueo_archivo(self.ruta_csv)
+
+    def guardar(self, df):
+        """Escribe el nivel caliente y archiva las filas anteriores a la fecha de corte."""
+        with self.lock, self.bloqueo():
+            corte = self.fecha_corte()
+            viejas = df[df['Fecha'] < corte]
+            if not viejas.empty:
+                self._archivar(viejas)
+                df = df[df['Fecha'] >= corte]
+            escribir_atomico(self.ruta_csv, lambda f: df.to_csv(f, index=False))
+
+    def registrar(self, fecha, peso, kcal):
+        """Guarda (o sobrescribe) el registro de ``fecha`` sobre lo último que haya en disco.
+
+        Devuelve (``version()`` justo antes, ``version()`` justo después), tomadas dentro del
+        bloqueo: quien mantiene un estado derivado sabe así si lo único nuevo es este pesaje.
+        """
+        fecha = pd.Timestamp(fecha)
+        with self.lock, self.bloqueo():
+            antes = self.version()
+            df = self.caliente()
+            df = df[df['Fecha'] != fecha]
+            nueva = pd.DataFrame({'Fecha': [fecha], 'Peso': [float(peso)], 'Kcal': [float(kcal)]})
+            df = pd.concat([df, nueva], ignore_index=True).sort_values('Fecha')
+            self.guardar(df)
+            return antes, self.version()
+
+    def archivar_antiguos(self):
+        """Pasa al archivo lo que se haya quedado viejo en datos_peso.csv (p. ej. al migrar)."""
+        with self.lock, self.bloqueo():
+            df = self.caliente()
+            if not df.empty and df['Fecha'].min() < self.fecha_corte():
+                self.guardar(df)
+
+    def _archivar(self, viejas):
+        os.makedirs(self.carpeta, exist_ok=True)
+        indice = dict(self.indice())
+        for mes, filas in viejas.groupby(viejas['Fecha'].dt.strftime('%Y-%m')):
+            previas = self._mes_archivado(mes)
+            if previas is not None:
+                filas = pd.concat([previas, filas]).drop_duplicates('Fecha', keep='last')
+            filas = filas.sort_values('Fecha')
+            escribir_atomico(
+                self._ruta_mes(mes), lambda f: filas.to_parquet(f, index=False, compression='zstd'), binario=True
+            )
+            indice[mes] = {
+                'desde': filas['Fecha'].min().strftime('%Y-%m-%d'),
+                'hasta': filas['Fecha'].max().strftime('%Y-%m-%d'),
+                'filas': len(filas)
+            }
+        escribir_atomico(self.ruta_indice, lambda f: json.dump(indice, f, indent=1, sort_keys=True))
@@ -0,0 +1,151 @@
+"""Importación del historial exportado desde otras apps de registro de comidas.
+
+Acepta CSV (también comprimidos) como los que exportan MyFitnessPal y
+similares: una fila por alimento o por comida con fecha, nombre, cantidad y
+kcal/macros. Las columnas se reconocen por su nombre en español o en inglés,
+sin importar mayúsculas, tildes ni unidades entre paréntesis ('Fat (g)' ->
+Grasas). Si el archivo trae los valores por 100 g en lugar de los totales
+('Kcal_100g', 'Protein per 100g'...) se multiplican por los gramos.
+
+El archivo se lee por bloques de ``TAM_BLOQUE`` filas, cada bloque se
+convierte con operaciones de columna y el almacén lo escribe todo en una
+sola transacción, así que la memoria no depende del tamaño del archivo y una
+importación a medias no deja comidas sueltas.
+
+    python -m pocket_diet.importador export_myfitnesspal.csv
+"""
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+from .buscador import normalizar
+from .catalogo import VALORES_100G
+from .esquema import COLUMNAS_COMIDAS
+from .totales import MACROS
+
+TAM_BLOQUE = 50000
+
+# nombre de columna normalizado -> columna de comidas.csv
+ALIAS = {
+    'Fecha': ['fecha', 'date', 'dia', 'day'],
+    'Tipo': ['tipo', 'meal', 'meal type', 'comida del dia', 'momento'],
+    'Comida': ['comida', 'alimento', 'nombre', 'food', 'food name', 'name', 'item', 'description', 'descripcion'],
+    'Marca': ['marca', 'brand', 'brand name'],
+    'Gramos': ['gramos', 'grams', 'g', 'cantidad', 'quantity', 'amount', 'peso', 'weight'],
+    'Kcal': ['kcal', 'calorias', 'calories', 'energia', 'energy', 'cal'],
+    'Proteínas': ['proteinas', 'proteina', 'protein', 'proteins', 'prot'],
+    'Carbs': ['carbs', 'carbohidratos', 'hidratos', 'carbohydrates', 'carbohydrate', 'hc'],
+    'Grasas': ['grasas', 'grasa', 'fat', 'fats', 'total fat', 'lipidos']
+}
+# nombre de la comida del día normalizado -> Tipo
+TIPOS = {
+    'desayuno': 'Desayuno', 'breakfast': 'Desayuno',
+    'comida': 'Comida', 'almuerzo': 'Comida', 'lunch': 'Comida',
+    'cena': 'Cena', 'dinner': 'Cena', 'supper': 'Cena',
+    'snack': 'Snack', 'snacks': 'Snack', 'merienda': 'Snack', 'tentempie': 'Snack'
+}
+_POR_100G = {'100g', '100', 'por', 'per'}
+
+
+def _clave_columna(cabecera):
+    """(nombre normalizado sin unidades, si es por 100 g) de una cabecera del archivo."""
+    texto = normalizar(cabecera)
+    por_100g = bool(re.search(r'100\s*g', texto))
+    texto = re.sub(r'\(.*?\)', ' ', texto)
+    tokens = [t for t in re.findall(r'[a-z0-9]+', texto) if t not in _POR_100G]
+    return ' '.join(tokens), por_100g
+
+
+def mapear_columnas(cabeceras):
+    """{columna del archivo: columna destino}; los valores por 100 g van a 'Kcal_100g', 'Proteínas_100g'..."""
+    destinos = {alias: destino for destino, alias_destino in ALIAS.items() for alias in alias_destino}
+    por_100g = dict(zip(MACROS, VALORES_100G))
+    mapa = {}
+    for cabecera in cabeceras:
+        clave, es_100g = _clave_columna(cabecera)
+        destino = destinos.get(clave)
+        if destino is None:
+            continue
+        if es_100g:
+            destino = por_100g.get(destino)
+        if destino and destino not in mapa.values():
+            mapa[cabecera] = destino
+    return mapa
+
+
+def _numeros(serie):
+    if serie.dtype == object or pd.api.types.is_string_dtype(serie):
+        # Exportaciones con coma decimal ('12,5')
+        serie = serie.astype('string').str.replace(',', '.', regex=False)
+    return pd.to_numeric(serie, errors='coerce')
+
+
+def convertir_bloque(bloque, mapa):
+    """Pasa un bloque del archivo al esquema de comidas.csv. Las filas sin fecha válida se descartan."""
+    df = bloque[list(mapa)].rename(columns=mapa)
+    fechas = pd.to_datetime(df['Fecha'], errors='coerce', format='mixed')
+    salida = pd.DataFrame({'Fecha': fechas.dt.strftime('%Y-%m-%d')}, index=df.index)
+
+    tipos_originales = df['Tipo'].astype('string') if 'Tipo' in df else pd.Series(pd.NA, index=df.index, dtype='string')
+    tipos = {t: TIPOS.get(normalizar(t).strip(), '') for t in tipos_originales.dropna().unique()}
+    salida['Tipo'] = tipos_originales.map(tipos).fillna('')
+    # Las exportaciones por comida (sin alimentos) usan el nombre de la comida del día
+    nombres = df['Comida'].astype('string') if 'Comida' in df else tipos_originales
+    salida['Comida'] = nombres.fillna('Importado').str.strip()
+    salida['Marca'] = df['Marca'].astype('string').fillna('').str.strip() if 'Marca' in df else ''
+
+    gramos = _numeros(df['Gramos']) if 'Gramos' in df else pd.Series(np.nan, index=df.index)
+    salida['Gramos'] = gramos
+    for macro, por_100g in zip(MACROS, VALORES_100G):
+        if macro in df:
+            salida[macro] = _numeros(df[macro])
+        elif por_100g in df:
+            salida[macro] = (_numeros(df[por_100g]) * gramos / 100).round(1)
+        else:
+            salida[macro] = 0.0
+    salida[MACROS] = salida[MACROS].fillna(0.0)
+    return salida[salida['Fecha'].notna()][COLUMNAS_COMIDAS]
+
+
+def leer_exportacion(ruta, tam_bloque=TAM_BLOQUE, separador=None):
+    """Genera bloques ya convertidos al esquema de comidas. ``separador`` None lo detecta (',' o ';')."""
+    cabecera = pd.read_csv(ruta, nrows=0, sep=separador or ',')
+    if separador is None and len(cabecera.columns) == 1 and ';' in cabecera.columns[0]:
+        separador = ';'
+        cabecera = pd.read_csv(ruta, nrows=0, sep=separador)
+    mapa = mapear_columnas(cabecera.columns)
+    if 'Fecha' not in mapa.values():
+        raise ValueError(f'{ruta}: no se encuentra la columna de fecha (columnas: {", ".join(cabecera.columns)})')
+    for bloque in pd.read_csv(ruta, sep=separador or ',', usecols=list(mapa), chunksize=tam_bloque):
+        yield convertir_bloque(bloque, mapa)
+
+
+def importar_exportacion(almacen, ruta, tam_bloque=TAM_BLOQUE, progreso=None):
+    """Añade al registro todas las comidas del archivo en una sola escritura. Devuelve cuántas se importaron."""
+    def bloques():
+        leidas = 0
+        for bloque in leer_exportacion(ruta, tam_bloque):
+            yield bloque
+            leidas += len(bloque)
+            if progreso:
+                progreso(leidas)
+    return almacen.importar_comidas(bloques())
+
+
+if __name__ == '__main__':
+    from .almacen import DB_FILE, abrir_almacen
+
+    parser = argparse.ArgumentParser(description='Importa el historial exportado de otra app (CSV) a comidas.')
+    parser.add_argument('archivo')
+    parser.add_argument('--comidas', default='comidas.csv')
+    parser.add_argument('--catalogo', default='catalogo_comidas.csv')
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--bloque', type=int, default=TAM_BLOQUE)
+    args = parser.parse_args()
+    almacen = abrir_almacen(args.comidas, args.catalogo, args.db)
+    total = importar_exportacion(
+        almacen, args.archivo, args.bloque, progreso=lambda n: print(f'\r{n} comidas', end='', flush=True)
+    )
+    print(f'\nImportadas {total} comidas')
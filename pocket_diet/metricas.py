@@ -0,0 +1,259 @@
+"""Tramos de tiempo de cada ejecución de una página y métricas en formato Prometheus.
+
+Las vistas marcan sus secciones con ``with tramo(categoria, nombre):``. Las
+categorías son carga de datos, filtrado, agregados, red (Open Food Facts) y
+render. Solo se mide si la ejecución en curso lo pidió al empezar (el panel
+de depuración de esa sesión, ver ``vista_depuracion``) o si el proceso
+exporta métricas; si no, ``tramo`` devuelve un contexto vacío compartido y
+el coste es leer una variable del hilo.
+
+Cada tramo medido suma una observación al histograma de su categoría y
+nombre, y cada ejecución al de su página. Con POCKET_DIET_METRICAS_ARCHIVO
+el texto en formato Prometheus se escribe en ese archivo al terminar una
+ejecución, como mucho cada ``INTERVALO_ARCHIVO`` segundos (sirve para el
+textfile collector de node_exporter). Con POCKET_DIET_METRICAS_PUERTO se
+sirve en http://127.0.0.1:PUERTO/metrics. Con cualquiera de las dos, o con
+POCKET_DIET_METRICAS=1, se miden todas las ejecuciones de todas las sesiones.
+"""
+import atexit
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from .archivos import escribir_atomico
+
+CATEGORIAS = ['carga', 'filtro', 'agregado', 'red', 'render']
+# Límites superiores de los histogramas, en segundos
+LIMITES = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INTERVALO_ARCHIVO = 5.0
+AYUDA = {
+    'pocket_diet_tramo_segundos': ('histogram', 'Duración de cada sección medida de una página'),
+    'pocket_diet_ejecucion_segundos': ('histogram', 'Duración de cada ejecución completa de una página'),
+    'pocket_diet_ejecuciones_total': ('counter', 'Ejecuciones medidas de cada página'),
+    'pocket_diet_off_peticiones_total': ('counter', 'Peticiones HTTP a Open Food Facts por resultado'),
+}
+
+ARCHIVO = os.environ.get('POCKET_DIET_METRICAS_ARCHIVO')
+PUERTO = os.environ.get('POCKET_DIET_METRICAS_PUERTO')
+EXPORTAR = bool(ARCHIVO or PUERTO or os.environ.get('POCKET_DIET_METRICAS') == '1')
+
+
+def _etiquetas(etiquetas):
+    """Texto {a="1",b="2"} con los valores escapados como pide el formato de Prometheus."""
+    if not etiquetas:
+        return ''
+    partes = []
+    for nombre, valor in etiquetas:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{nombre}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+
+class Registro:
+    """Contadores e histogramas acumulados en el proceso."""
+
+    def __init__(self, limites=LIMITES):
+        self.limites = limites
+        self.lock = threading.Lock()
+        # (métrica, etiquetas) -> valor
+        self.contadores = {}
+        # (métrica, etiquetas) -> [observaciones por cubo (no acumuladas), suma, total]
+        self.histogramas = {}
+
+    def contar(self, metrica, valor=1, **etiquetas):
+        clave = (metrica, tuple(sorted(etiquetas.items())))
+        with self.lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + valor
+
+    def observar(self, metrica, segundos, **etiquetas):
+        clave = (metrica, tuple(sorted(etiquetas.items())))
+        with self.lock:
+            histograma = self.histogramas.get(clave)
+            if histograma is None:
+                histograma = self.histogramas[clave] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            histograma[0][bisect_left(self.limites, segundos)] += 1
+            histograma[1] += segundos
+            histograma[2] += 1
+
+    def texto(self):
+        """Todo el registro en el formato de texto de Prometheus (versión 0.0.4)."""
+        with self.lock:
+            contadores = sorted(self.contadores.items())
+            histogramas = sorted((clave, [list(h[0]), h[1], h[2]]) for clave, h in self.histogramas.items())
+        lineas = []
+        vistas = set()
+
+        def cabecera(metrica):
+            if metrica not in vistas:
+                vistas.add(metrica)
+                tipo, ayuda = AYUDA.get(metrica, ('untyped', ''))
+                lineas.append(f'# HELP {metrica} {ayuda}')
+                lineas.append(f'# TYPE {metrica} {tipo}')
+
+        for (metrica, etiquetas), valor in contadores:
+            cabecera(metrica)
+            lineas.append(f'{metrica}{_etiquetas(etiquetas)} {valor}')
+        for (metrica, etiquetas), (cubos, suma, total) in histogramas:
+            cabecera(metrica)
+            acumulado = 0
+            for limite, cuantas in zip(self.limites + ('+Inf',), cubos):
+                acumulado += cuantas
+                lineas.append(f'{metrica}_bucket{_etiquetas(etiquetas + (("le", limite),))} {acumulado}')
+            lineas.append(f'{metrica}_sum{_etiquetas(etiquetas)} {suma:.6f}')
+            lineas.append(f'{metrica}_count{_etiquetas(etiquetas)} {total}')
+        return '\n'.join(lineas) + '\n'
+
+
+registro = Registro()
+_hilo = threading.local()
+
+
+# ---------- TRAMOS ----------
+class Ejecucion:
+    """Los tramos medidos en una ejecución de una página, en orden de llegada."""
+
+    def __init__(self, pagina):
+        self.pagina = pagina
+        self.inicio = time.perf_counter()
+        self.segundos = None
+        # (categoría, nombre, segundos, profundidad); profundidad 0 = tramo exterior
+        self.tramos = []
+        self.profundidad = 0
+
+    def por_categoria(self):
+        """Segundos de cada categoría contando solo los tramos exteriores (los anidados ya están dentro)."""
+        totales = dict.fromkeys(CATEGORIAS, 0.0)
+        for categoria, _, segundos, profundidad in self.tramos:
+            if profundidad == 0:
+                totales[categoria] = totales.get(categoria, 0.0) + segundos
+        return totales
+
+
+class _Tramo:
+    __slots__ = ('ejecucion', 'categoria', 'nombre', 'inicio')
+
+    def __init__(self, ejecucion, categoria, nombre):
+        self.ejecucion = ejecucion
+        self.categoria = categoria
+        self.nombre = nombre
+
+    def __enter__(self):
+        if self.ejecucion is not None:
+            self.ejecucion.profundidad += 1
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        segundos = time.perf_counter() - self.inicio
+        if self.ejecucion is not None:
+            self.ejecucion.profundidad -= 1
+            self.ejecucion.tramos.append((self.categoria, self.nombre, segundos, self.ejecucion.profundidad))
+        registro.observar('pocket_diet_tramo_segundos', segundos, categoria=self.categoria, tramo=self.nombre)
+        return False
+
+
+class _SinMedir:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+_SIN_MEDIR = _SinMedir()
+
+
+def tramo(categoria, nombre):
+    """Contexto que mide la sección si la ejecución en curso se está midiendo."""
+    ejecucion = getattr(_hilo, 'ejecucion', None)
+    if ejecucion is None and not EXPORTAR:
+        return _SIN_MEDIR
+    return _Tramo(ejecucion, categoria, nombre)
+
+
+def contar(metrica, **etiquetas):
+    """Suma uno al contador si se está midiendo (en este hilo o en todo el proceso)."""
+    if EXPORTAR or getattr(_hilo, 'ejecucion', None) is not None:
+        registro.contar(metrica, **etiquetas)
+
+
+# ---------- EJECUCIONES ----------
+_ultimo_archivo = 0.0
+_lock_exportar = threading.Lock()
+_servidor = None
+
+
+def iniciar_ejecucion(pagina, medir=False):
+    """Al principio del script: empieza a medir esta ejecución si se pide o si el proceso exporta."""
+    if EXPORTAR or medir:
+        _hilo.ejecucion = Ejecucion(pagina)
+        if PUERTO:
+            servir(int(PUERTO))
+    else:
+        _hilo.ejecucion = None
+
+
+def terminar_ejecucion():
+    """Al final del script: cierra la ejecución en curso y la devuelve (None si no se medía)."""
+    ejecucion = getattr(_hilo, 'ejecucion', None)
+    _hilo.ejecucion = None
+    if ejecucion is None:
+        return None
+    ejecucion.segundos = time.perf_counter() - ejecucion.inicio
+    registro.observar('pocket_diet_ejecucion_segundos', ejecucion.segundos, pagina=ejecucion.pagina)
+    registro.contar('pocket_diet_ejecuciones_total', pagina=ejecucion.pagina)
+    if ARCHIVO:
+        escribir_archivo(ARCHIVO)
+    return ejecucion
+
+
+def escribir_archivo(ruta, intervalo=INTERVALO_ARCHIVO):
+    """Escribe el registro en ``ruta`` si han pasado ``intervalo`` segundos desde la última vez."""
+    global _ultimo_archivo
+    with _lock_exportar:
+        ahora = time.monotonic()
+        if ahora - _ultimo_archivo < intervalo:
+            return False
+        _ultimo_archivo = ahora
+    texto = registro.texto()
+    escribir_atomico(ruta, lambda f: f.write(texto))
+    return True
+
+
+def servir(puerto, host='127.0.0.1'):
+    """Sirve el registro en http://host:puerto/metrics desde un hilo aparte, una vez por proceso."""
+    global _servidor
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class ManejadorMetricas(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            cuerpo = registro.texto().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock_exportar:
+        if _servidor is not None:
+            return _servidor
+        try:
+            _servidor = ThreadingHTTPServer((host, puerto), ManejadorMetricas)
+        except OSError:
+            # Otro proceso (p. ej. otra app) ya tiene el puerto; este no exporta por HTTP
+            _servidor = False
+            return _servidor
+        threading.Thread(target=_servidor.serve_forever, name='metricas', daemon=True).start()
+        return _servidor
+
+
+if ARCHIVO:
+    # Lo medido desde la última escritura no se pierde al parar la app
+    atexit.register(lambda: escribir_archivo(ARCHIVO, intervalo=0))
@@ -0,0 +1,188 @@
+"""Cliente de Open Food Facts.
+
+Usa una ``requests.Session`` con un pool de conexiones reutilizables, tiempo
+máximo por petición y reintentos limitados con espera exponencial (los
+tiempos de lectura agotados no se reintentan), así que una API lenta o caída
+no bloquea la app más de unos segundos. Solo se piden
+los campos que usa la app (``fields=``) y de los nutrientes se guardan los
+cuatro que se registran. Varias páginas de resultados o varios códigos de
+barras se descargan en paralelo con un pool de hilos.
+
+requests se importa al crear el primer cliente, así que las vistas que no
+consultan OFF no lo cargan.
+
+La URL base se puede cambiar con la variable de entorno OFF_URL, por ejemplo
+para apuntar a un servidor local de pruebas.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .buscador import normalizar_codigo
+from .metricas import contar
+from .off_cache import normalizar_consulta
+
+URL_OFF = os.environ.get('OFF_URL', 'https://world.openfoodfacts.org')
+USER_AGENT = 'PocketDiet/1.0 (https://github.com/Arkus0/Macro-Tracker)'
+# (conexión, lectura) en segundos
+TIMEOUT = (3.05, 8)
+REINTENTOS = 2
+MAX_HILOS = 8
+CAMPOS = ['code', 'product_name', 'brands', 'nutriments']
+NUTRIENTES = ['energy-kcal_100g', 'proteins_100g', 'carbohydrates_100g', 'fat_100g']
+
+
+def _recortar(producto):
+    """Deja solo los campos pedidos y los cuatro nutrientes que usa la app."""
+    nutrientes = producto.get('nutriments') or {}
+    recortado = {campo: producto[campo] for campo in CAMPOS if campo in producto and campo != 'nutriments'}
+    recortado['nutriments'] = {n: nutrientes[n] for n in NUTRIENTES if n in nutrientes}
+    return recortado
+
+
+class ClienteOFF:
+    def __init__(self, url=URL_OFF, timeout=TIMEOUT, reintentos=REINTENTOS, max_hilos=MAX_HILOS):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.max_hilos = max_hilos
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        # Se reintentan los fallos de conexión y los 429/5xx, pero no un tiempo de lectura agotado:
+        # un servidor colgado costaría (reintentos + 1) veces el timeout de lectura más las esperas
+        reintentar = Retry(
+            total=reintentos,
+            connect=reintentos,
+            read=0,
+            status=reintentos,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=['GET'],
+            raise_on_status=False
+        )
+        adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=max_hilos, max_retries=reintentar)
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
+
+    def _get_json(self, ruta, params):
+        """JSON de la respuesta, o None si hay error de red, se agota el tiempo o el estado no es 200."""
+        import requests
+
+        try:
+            response = self.session.get(f'{self.url}{ruta}', params=params, timeout=self.timeout)
+        except requests.Timeout:
+            contar('pocket_diet_off_peticiones_total', resultado='tiempo_agotado')
+            return None
+        except requests.RequestException:
+            contar('pocket_diet_off_peticiones_total', resultado='error_red')
+            return None
+        if response.status_code != 200:
+            contar('pocket_diet_off_peticiones_total', resultado='estado_http')
+            return None
+        try:
+            datos = response.json()
+        except ValueError:
+            contar('pocket_diet_off_peticiones_total', resultado='json_invalido')
+            return None
+        contar('pocket_diet_off_peticiones_total', resultado='ok')
+        return datos
+
+    def buscar(self, termino, page_size=5, pagina=1):
+        datos = self._get_json('/cgi/search.pl', {
+            'search_terms': termino,
+            'search_simple': 1,
+            'action': 'process',
+            'json': 1,
+            'page_size': page_size,
+            'page': pagina,
+            'fields': ','.join(CAMPOS)
+        })
+        if datos is None:
+            return None
+        return [_recortar(p) for p in datos.get('products', [])]
+
+    def producto(self, codigo):
+        """Producto por código de barras, None si no existe o la API falla."""
+        datos = self._get_json(f'/api/v2/product/{codigo}.json', {'fields': ','.join(CAMPOS)})
+        if not datos or datos.get('status') != 1 or not datos.get('product'):
+            return None
+        producto = _recortar(datos['product'])
+        producto.setdefault('code', str(codigo))
+        return producto
+
+    def _en_paralelo(self, funcion, argumentos):
+        argumentos = list(argumentos)
+        if len(argumentos) <= 1:
+            return [funcion(a) for a in argumentos]
+        with ThreadPoolExecutor(max_workers=min(self.max_hilos, len(argumentos))) as pool:
+            return list(pool.map(funcion, argumentos))
+
+    def buscar_paginas(self, termino, paginas, page_size=5):
+        """Descarga las páginas 1..``paginas`` a la vez; una página que falla aparece como None."""
+        return self._en_paralelo(lambda p: self.buscar(termino, page_size, p), range(1, paginas + 1))
+
+    def productos(self, codigos):
+        """Varios códigos de barras en paralelo, en el mismo orden."""
+        return self._en_paralelo(self.producto, codigos)
+
+
+_cliente = None
+_lock_cliente = threading.Lock()
+
+
+def cliente_off():
+    """Cliente compartido por todo el proceso (y por tanto su pool de conexiones)."""
+    global _cliente
+    with _lock_cliente:
+        if _cliente is None:
+            _cliente = ClienteOFF()
+        return _cliente
+
+
+def buscar_productos(termino, page_size=5, cache=None, espejo=None):
+    """Productos que encuentra Open Food Facts, o None si la API responde con error.
+
+    Si hay copia local (``espejo``) se busca primero en ella y solo se va a la
+    API cuando no encuentra nada.
+    """
+    termino = normalizar_consulta(termino)
+    if espejo is not None:
+        locales = espejo.buscar(termino, page_size)
+        if locales:
+            return locales
+    cliente = cliente_off()
+    if cache is None:
+        return cliente.buscar(termino, page_size)
+    return cache.obtener(f'buscar:{termino}:{page_size}', lambda: cliente.buscar(termino, page_size))
+
+
+def buscar_codigo(codigo, cache=None, espejo=None):
+    """Producto con ese código de barras: primero la copia local, luego la caché y solo si no está, la API."""
+    codigo = normalizar_codigo(codigo)
+    if not codigo:
+        return None
+    if espejo is not None:
+        producto = espejo.producto(codigo)
+        if producto is not None:
+            return producto
+    cliente = cliente_off()
+    if cache is None:
+        return cliente.producto(codigo)
+    return cache.obtener(f'producto:{codigo}', lambda: cliente.producto(codigo))
+
+
+def a_catalogo(producto):
+    """Producto de OFF con las columnas del catálogo (Comida, Marca, Kcal_100g...)."""
+    nutrientes = producto.get('nutriments') or {}
+    return {
+        'Comida': producto.get('product_name') or 'Desconocido',
+        'Marca': (producto.get('brands') or '').split(',')[0].strip(),
+        'Kcal_100g': nutrientes.get('energy-kcal_100g', 0),
+        'Proteínas_100g': nutrientes.get('proteins_100g', 0),
+        'Carbs_100g': nutrientes.get('carbohydrates_100g', 0),
+        'Grasas_100g': nutrientes.get('fat_100g', 0),
+        'Codigo': producto.get('code')
+    }
@@ -0,0 +1,100 @@
+"""Caché persistente de respuestas de Open Food Facts.
+
+Las respuestas se guardan en SQLite (off_cache.db) con la hora en que se
+descargaron y la última vez que se usaron: caducan a los ``TTL_SEGUNDOS`` y,
+si hay más de ``MAX_ENTRADAS``, se borran las menos usadas recientemente.
+Una misma instancia se comparte entre sesiones; si varias piden a la vez la
+misma clave solo una llega a la red y el resto espera su resultado.
+"""
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+CACHE_FILE = 'off_cache.db'
+TTL_SEGUNDOS = 7 * 24 * 3600
+MAX_ENTRADAS = 5000
+
+
+def normalizar_consulta(texto):
+    return ' '.join(str(texto).lower().split())
+
+
+class CacheOFF:
+    def __init__(self, ruta=CACHE_FILE, ttl=TTL_SEGUNDOS, max_entradas=MAX_ENTRADAS):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(ruta, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                datos TEXT NOT NULL,
+                creado REAL NOT NULL,
+                usado REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_respuestas_usado ON respuestas (usado);
+        """)
+        self.en_vuelo = {}
+        self.lock_vuelo = threading.Lock()
+
+    def leer(self, clave):
+        """Datos guardados para la clave, o None si no están o han caducado."""
+        ahora = time.time()
+        with self.lock, self.conn:
+            fila = self.conn.execute(
+                'SELECT datos FROM respuestas WHERE clave = ? AND creado > ?', (clave, ahora - self.ttl)
+            ).fetchone()
+            if fila is None:
+                return None
+            self.conn.execute('UPDATE respuestas SET usado = ? WHERE clave = ?', (ahora, clave))
+        return json.loads(fila[0])
+
+    def guardar(self, clave, datos):
+        ahora = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?)',
+                (clave, json.dumps(datos, ensure_ascii=False), ahora, ahora),
+            )
+            self.conn.execute('DELETE FROM respuestas WHERE creado <= ?', (ahora - self.ttl,))
+            sobrantes = self.conn.execute('SELECT COUNT(*) FROM respuestas').fetchone()[0] - self.max_entradas
+            if sobrantes > 0:
+                self.conn.execute(
+                    'DELETE FROM respuestas WHERE clave IN (SELECT clave FROM respuestas ORDER BY usado LIMIT ?)',
+                    (sobrantes,),
+                )
+
+    def obtener(self, clave, descargar):
+        """Devuelve la clave desde la caché o llama a ``descargar()`` una sola vez aunque haya peticiones simultáneas.
+
+        Si ``descargar`` devuelve None (p. ej. un error de la API) no se guarda nada.
+        """
+        datos = self.leer(clave)
+        if datos is not None:
+            return datos
+        with self.lock_vuelo:
+            futuro = self.en_vuelo.get(clave)
+            lider = futuro is None
+            if lider:
+                futuro = self.en_vuelo[clave] = Future()
+        if not lider:
+            return futuro.result()
+        try:
+            # Otro líder pudo guardar la clave y salir de ``en_vuelo`` entre la primera lectura y
+            # tomar el relevo: se vuelve a mirar la caché antes de descargar otra vez
+            datos = self.leer(clave)
+            if datos is None:
+                datos = descargar()
+                if datos is not None:
+                    self.guardar(clave, datos)
+            futuro.set_result(datos)
+            return datos
+        except BaseException as error:
+            futuro.set_exception(error)
+            raise
+        finally:
+            with self.lock_vuelo:
+                del self.en_vuelo[clave]
@@ -0,0 +1,243 @@
+"""Copia local de Open Food Facts para buscar sin conexión.
+
+El importador lee un volcado de OFF (JSONL o CSV, también comprimidos con
+gzip) por bloques de ``TAM_BLOQUE`` productos, así que la memoria no depende
+del tamaño del volcado, y guarda en off_local.db solo nombre, marca, código
+de barras (normalizado como en las búsquedas: un UPC de 12 cifras pasa a
+EAN-13) y kcal/macros por 100 g, con NULL en los nutrientes que faltan para
+no confundirlos con un cero. Las búsquedas van contra un índice FTS5
+que ignora tildes y acepta prefijos, y devuelven los productos con la misma
+forma que la API para que la app los trate igual.
+
+    python -m pocket_diet.off_local openfoodfacts-products.jsonl.gz
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+
+import pandas as pd
+
+from .buscador import normalizar_codigo
+
+ESPEJO_FILE = 'off_local.db'
+TAM_BLOQUE = 20000
+CANDIDATOS = 2000
+# columna en la tabla -> nutriente en OFF
+NUTRIENTES = {
+    'kcal': 'energy-kcal_100g',
+    'proteinas': 'proteins_100g',
+    'carbs': 'carbohydrates_100g',
+    'grasas': 'fat_100g'
+}
+COLUMNAS_CSV = ['code', 'product_name', 'brands'] + list(NUTRIENTES.values())
+
+
+def _abrir(ruta):
+    if ruta.endswith('.gz'):
+        return gzip.open(ruta, 'rt', encoding='utf-8', errors='replace')
+    return open(ruta, encoding='utf-8', errors='replace')
+
+
+def _numero(valor):
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return None
+    return None if numero != numero else numero
+
+
+def _fila(codigo, nombre, marca, nutrientes):
+    """Tupla para la tabla, o None si al producto le falta código, nombre o kcal."""
+    codigo = normalizar_codigo(str(codigo or ''))
+    nombre = str(nombre or '').strip()
+    kcal = _numero(nutrientes.get(NUTRIENTES['kcal']))
+    if not codigo or not nombre or kcal is None:
+        return None
+    marca = str(marca or '').split(',')[0].strip()
+    return (codigo, nombre, marca, kcal) + tuple(
+        _numero(nutrientes.get(NUTRIENTES[c])) for c in ['proteinas', 'carbs', 'grasas']
+    )
+
+
+def _bloques_jsonl(ruta, tam_bloque):
+    bloque = []
+    with _abrir(ruta) as f:
+        for linea in f:
+            try:
+                producto = json.loads(linea)
+            except ValueError:
+                continue
+            if not isinstance(producto, dict):
+                continue
+            fila = _fila(
+                producto.get('code'), producto.get('product_name'),
+                producto.get('brands'), producto.get('nutriments') or {}
+            )
+            if fila:
+                bloque.append(fila)
+            if len(bloque) >= tam_bloque:
+                yield bloque
+                bloque = []
+    if bloque:
+        yield bloque
+
+
+def _bloques_csv(ruta, tam_bloque):
+    # El volcado CSV oficial va separado por tabuladores y sin comillas
+    with _abrir(ruta) as f:
+        cabecera = f.readline()
+    sep = '\t' if '\t' in cabecera else ','
+    trozos = pd.read_csv(
+        ruta, sep=sep, usecols=lambda c: c in COLUMNAS_CSV, dtype=str, chunksize=tam_bloque,
+        quoting=csv.QUOTE_NONE if sep == '\t' else csv.QUOTE_MINIMAL,
+        on_bad_lines='skip', encoding_errors='replace', keep_default_na=False
+    )
+    for trozo in trozos:
+        bloque = [
+            _fila(p.get('code'), p.get('product_name'), p.get('brands'), p)
+            for p in trozo.to_dict('records')
+        ]
+        yield [f for f in bloque if f]
+
+
+def _consulta_fts(texto):
+    """'leche sem' -> '"leche"* "sem"*' (todas las palabras, cada una como prefijo)."""
+    palabras = re.findall(r'\w+', str(texto).lower())
+    return ' '.join(f'"{p}"*' for p in palabras)
+
+
+class EspejoOFF:
+    def __init__(self, ruta=ESPEJO_FILE):
+        self.ruta = ruta
+        self.lock = threading.Lock()
+        self.conn = None
+
+    def _conexion(self):
+        """Conexión de solo lectura, abierta la primera vez que existe la base."""
+        if self.conn is None and os.path.exists(self.ruta):
+            self.conn = sqlite3.connect(f'file:{os.path.abspath(self.ruta)}?mode=ro', uri=True, check_same_thread=False)
+        return self.conn
+
+    def _consultar(self, sql, params):
+        with self.lock:
+            conn = self._conexion()
+            if conn is None:
+                return []
+            try:
+                return conn.execute(sql, params).fetchall()
+            except sqlite3.OperationalError:
+                # base a medio crear o sin importar todavía
+                return []
+
+    @staticmethod
+    def _a_producto(fila):
+        codigo, nombre, marca, *valores = fila
+        return {
+            'code': codigo,
+            'product_name': nombre,
+            'brands': marca,
+            # Como la API: un nutriente desconocido no aparece
+            'nutriments': {n: v for n, v in zip(NUTRIENTES.values(), valores) if v is not None}
+        }
+
+    def buscar(self, texto, limite=5):
+        """Productos cuyo nombre o marca contienen todas las palabras (como prefijo), los más relevantes primero."""
+        consulta = _consulta_fts(texto)
+        if not consulta:
+            return []
+        # Con palabras muy comunes ordenar todas las coincidencias tardaría demasiado:
+        # se puntúan como mucho CANDIDATOS y de ellos se devuelven los mejores
+        filas = self._consultar("""
+            SELECT p.codigo, p.nombre, p.marca, p.kcal, p.proteinas, p.carbs, p.grasas
+            FROM (
+                SELECT rowid, bm25(productos_fts, 2.0, 1.0) AS puntos
+                FROM productos_fts WHERE productos_fts MATCH ? LIMIT ?
+            ) c JOIN productos p ON p.id = c.rowid
+            ORDER BY c.puntos
+            LIMIT ?
+        """, (consulta, CANDIDATOS, limite))
+        return [self._a_producto(f) for f in filas]
+
+    def producto(self, codigo):
+        filas = self._consultar(
+            'SELECT codigo, nombre, marca, kcal, proteinas, carbs, grasas FROM productos WHERE codigo = ?',
+            (normalizar_codigo(str(codigo)),)
+        )
+        return self._a_producto(filas[0]) if filas else None
+
+    def total(self):
+        filas = self._consultar('SELECT COUNT(*) FROM productos', ())
+        return filas[0][0] if filas else 0
+
+    # ---------- IMPORTACIÓN ----------
+    def importar(self, ruta_volcado, tam_bloque=TAM_BLOQUE, progreso=None):
+        """Añade o actualiza (por código de barras) los productos del volcado; devuelve cuántos se leyeron."""
+        if re.search(r'\.jsonl?(\.gz)?$', ruta_volcado):
+            bloques = _bloques_jsonl(ruta_volcado, tam_bloque)
+        else:
+            bloques = _bloques_csv(ruta_volcado, tam_bloque)
+        conn = sqlite3.connect(self.ruta)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS productos (
+                    id INTEGER PRIMARY KEY,
+                    codigo TEXT NOT NULL UNIQUE,
+                    nombre TEXT NOT NULL,
+                    marca TEXT,
+                    kcal REAL,
+                    proteinas REAL,
+                    carbs REAL,
+                    grasas REAL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+                    nombre, marca, content='productos', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                );
+            """)
+            # Copias importadas antes de normalizar los códigos: los UPC de 12 cifras pasan a EAN-13
+            # (si ya estaba también la versión de 13 cifras, sobra la antigua)
+            with conn:
+                conn.execute("""
+                    UPDATE OR IGNORE productos SET codigo = '0' || codigo
+                    WHERE length(codigo) = 12 AND codigo NOT GLOB '*[^0-9]*'
+                """)
+                conn.execute("DELETE FROM productos WHERE length(codigo) = 12 AND codigo NOT GLOB '*[^0-9]*'")
+            leidos = 0
+            for bloque in bloques:
+                with conn:
+                    conn.executemany("""
+                        INSERT INTO productos (codigo, nombre, marca, kcal, proteinas, carbs, grasas)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (codigo) DO UPDATE SET
+                            nombre = excluded.nombre, marca = excluded.marca, kcal = excluded.kcal,
+                            proteinas = excluded.proteinas, carbs = excluded.carbs, grasas = excluded.grasas
+                    """, bloque)
+                leidos += len(bloque)
+                if progreso:
+                    progreso(leidos)
+            # Reconstruir el índice una vez al final es mucho más rápido que mantenerlo fila a fila
+            with conn:
+                conn.execute("INSERT INTO productos_fts (productos_fts) VALUES ('rebuild')")
+            conn.execute('PRAGMA optimize')
+            return leidos
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Importa un volcado de Open Food Facts (JSONL o CSV) a la copia local.')
+    parser.add_argument('volcado')
+    parser.add_argument('--db', default=ESPEJO_FILE)
+    parser.add_argument('--bloque', type=int, default=TAM_BLOQUE)
+    args = parser.parse_args()
+    total = EspejoOFF(args.db).importar(
+        args.volcado, args.bloque, progreso=lambda n: print(f'\r{n} productos', end='', flush=True)
+    )
+    print(f'\nImportados {total} productos en {args.db}')
@@ -0,0 +1,155 @@
+"""Resúmenes semanales y mensuales del histórico de peso, guardados en disco.
+
+Por cada semana (desde el lunes) y cada mes se guardan el peso medio,
+mínimo y máximo, las kcal medias y el número de registros en
+``datos_peso_resumenes.json``. Al guardar un peso solo se recalculan la
+semana y el mes de esa fecha (unas decenas de filas), así que la
+comparativa de cualquier rango es leer unas pocas filas ya hechas. Si el
+histórico cambió por otro lado (la versión guardada no coincide) se
+recalcula todo de una vez con un groupby.
+"""
+import json
+import os
+import threading
+
+import pandas as pd
+
+from .archivos import escribir_atomico
+
+NIVELES = {'semanal': 'W', 'mensual': 'M'}
+COLUMNAS = ['Peso', 'Peso_min', 'Peso_max', 'Kcal', 'Registros']
+
+
+def _inicio_periodo(fechas, nivel):
+    """Primer día de la semana o el mes de cada fecha."""
+    return fechas.dt.to_period(NIVELES[nivel]).dt.start_time
+
+
+def agregar(df, nivel):
+    """Resumen por periodo de las filas de ``df``; índice = inicio del periodo en texto 'AAAA-MM-DD'."""
+    df = df.dropna(subset=['Fecha'])
+    grupos = df.groupby(_inicio_periodo(df['Fecha'], nivel).dt.strftime('%Y-%m-%d'))
+    tabla = grupos.agg(
+        Peso=('Peso', 'mean'), Peso_min=('Peso', 'min'), Peso_max=('Peso', 'max'),
+        Kcal=('Kcal', 'mean'), Registros=('Fecha', 'size')
+    )
+    return tabla[COLUMNAS]
+
+
+def _resumen_periodo(df):
+    """La fila de ``agregar`` para filas de un único periodo, sin el coste fijo de un groupby."""
+    valores = [df['Peso'].mean(), df['Peso'].min(), df['Peso'].max(), df['Kcal'].mean(), len(df)]
+    return [None if pd.isna(v) else float(v) for v in valores]
+
+
+def _a_json(tabla):
+    return {periodo: [None if pd.isna(v) else float(v) for v in fila] for periodo, fila in zip(tabla.index, tabla.to_numpy())}
+
+
+class ResumenesPeso:
+    def __init__(self, historico, ruta=None):
+        self.historico = historico
+        self.ruta = ruta or os.path.splitext(historico.ruta_csv)[0] + '_resumenes.json'
+        self.lock = threading.RLock()
+        self.estado = None
+
+    def _leer(self):
+        if self.estado is None:
+            try:
+                with open(self.ruta, encoding='utf-8') as f:
+                    self.estado = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self.estado = {}
+        return self.estado
+
+    def _guardar(self, estado):
+        escribir_atomico(self.ruta, lambda f: json.dump(estado, f))
+        self.estado = estado
+
+    def _version(self, version=None):
+        return json.loads(json.dumps(self.historico.version() if version is None else version))
+
+    def _al_dia(self):
+        estado = self._leer()
+        if estado.get('version') != self._version():
+            estado = self.recalcular()
+        return estado
+
+    # ---------- LECTURA ----------
+    def tabla(self, nivel, desde=None, hasta=None):
+        """Resúmenes de los periodos que tocan [desde, hasta], indexados por la fecha de inicio del periodo."""
+        with self.lock:
+            filas = self._al_dia().get(nivel, {})
+        tabla = pd.DataFrame.from_dict(filas, orient='index', columns=COLUMNAS, dtype='float')
+        tabla.index = pd.DatetimeIndex(tabla.index, name='Inicio')
+        tabla = tabla.sort_index()
+        if desde is not None:
+            # El periodo que contiene ``desde`` empieza antes que él
+            tabla = tabla[tabla.index >= _inicio_periodo(pd.Series([pd.Timestamp(desde)]), nivel)[0]]
+        if hasta is not None:
+            tabla = tabla[tabla.index <= pd.Timestamp(hasta)]
+        return tabla
+
+    # ---------- ESCRITURA ----------
+    def recalcular(self):
+        """Rehace todos los resúmenes con el histórico completo."""
+        with self.lock:
+            # Antes de leer: si alguien escribe mientras, la versión guardada ya no coincidirá
+            version = self._version()
+            df = self.historico.cargar()
+            estado = {nivel: _a_json(agregar(df, nivel)) for nivel in NIVELES}
+            estado['version'] = version
+            self._guardar(estado)
+            return estado
+
+    def registrar(self, fecha, versiones=None):
+        """Actualiza solo la semana y el mes de ``fecha`` tras guardarla (o recalcula todo si el estado no servía).
+
+        ``versiones`` es lo que devolvió ``historico.registrar``; si los resúmenes no estaban al día con
+        la versión de antes de guardar (p. ej. el CSV se editó a mano) no basta con rehacer un periodo.
+        """
+        with self.lock:
+            estado = self._leer()
+            if versiones is None:
+                return self.recalcular()
+            antes, version = (self._version(v) for v in versiones)
+            if not estado or estado.get('version') != antes:
+                return self.recalcular()
+            fecha = pd.Timestamp(fecha)
+            inicio_mes = fecha.replace(day=1)
+            inicio_semana = fecha - pd.Timedelta(days=fecha.dayofweek)
+            # Solo las filas que pueden caer en esa semana o ese mes
+            df = self.historico.cargar(desde=min(inicio_mes, inicio_semana))
+            nuevo = dict(estado)
+            for nivel, inicio, fin in [
+                ('mensual', inicio_mes, inicio_mes + pd.offsets.MonthBegin(1)),
+                ('semanal', inicio_semana, inicio_semana + pd.Timedelta(days=7))
+            ]:
+                clave = inicio.strftime('%Y-%m-%d')
+                periodo = df[(df['Fecha'] >= inicio) & (df['Fecha'] < fin)]
+                filas = dict(nuevo.get(nivel, {}))
+                filas.pop(clave, None)
+                if not periodo.empty:
+                    filas[clave] = _resumen_periodo(periodo)
+                nuevo[nivel] = filas
+            nuevo['version'] = version
+            self._guardar(nuevo)
+            return nuevo
+
+
+def comparativa(tabla, nivel):
+    """Tabla para mostrar: una fila por periodo con los cambios respecto al anterior."""
+    if nivel == 'mensual':
+        periodos = tabla.index.strftime('%B %Y')
+    else:
+        periodos = 'Semana del ' + tabla.index.strftime('%d-%m-%Y')
+    return pd.DataFrame({
+        'Periodo': periodos,
+        'Peso medio (kg)': tabla['Peso'].round(1),
+        'Mín (kg)': tabla['Peso_min'].round(1),
+        'Máx (kg)': tabla['Peso_max'].round(1),
+        'Δ Peso (kg)': tabla['Peso'].diff().round(1),
+        'Kcal medias': tabla['Kcal'].round(0),
+        'Δ Kcal': tabla['Kcal'].diff().round(0),
+        'Registros': tabla['Registros'].astype(int)
+    }).reset_index(drop=True)
@@ -0,0 +1,179 @@
+"""Peso tendencia y TDEE dinámico que se actualizan en O(1) con cada pesaje.
+
+La tendencia es una media exponencial del peso con vida media de
+``VIDA_MEDIA_PESO`` días, ponderada por tiempo: un hueco de varios días sin
+pesarse pesa lo que dura, no como un solo día. Cada pesaje da además una
+estimación del gasto de ese día por balance energético,
+
+    kcal del día - 7700 * (cambio de la tendencia) / días desde el anterior
+
+y el TDEE es la media exponencial de esas estimaciones (vida media
+``VIDA_MEDIA_TDEE``). Es la misma media que ``ewm(halflife, times).mean()``
+de pandas: se guarda como numerador y denominador, así que añadir un pesaje
+posterior al último solo multiplica por el decaimiento y suma. El estado va
+a ``datos_peso_tendencia.json`` con la ``version()`` del histórico (firmas de
+los archivos); si el histórico cambia por otro lado (una fecha sobrescrita,
+el CSV editado a mano) se recalcula entero, vectorizado.
+"""
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .archivos import escribir_atomico
+
+VIDA_MEDIA_PESO = 7
+VIDA_MEDIA_TDEE = 14
+KCAL_POR_KG = 7700
+VENTANA_TDEE = 28
+
+
+def _decaimiento(dias, vida_media):
+    return 0.5 ** (np.asarray(dias, dtype='float') / vida_media)
+
+
+def _media_final(dias_hasta_el_final, valores, vida_media):
+    """(numerador, denominador) de la media exponencial en la última fecha."""
+    pesos = _decaimiento(dias_hasta_el_final, vida_media)
+    return [float((pesos * valores).sum()), float(pesos.sum())]
+
+
+def series_tendencia(df):
+    """Por fecha: 'Tendencia' (peso suavizado), 'Gasto' (balance energético del día) y 'TDEE' (gasto suavizado)."""
+    df = df.dropna(subset=['Fecha', 'Peso']).sort_values('Fecha')
+    fechas = pd.DatetimeIndex(df['Fecha'])
+    tendencia = df['Peso'].ewm(halflife=pd.Timedelta(days=VIDA_MEDIA_PESO), times=fechas).mean().to_numpy()
+    dias = np.maximum(np.diff(fechas.to_numpy()) / np.timedelta64(1, 'D'), 1)
+    # El primer pesaje no tiene cambio con el que comparar
+    cambio = np.r_[0.0, np.diff(tendencia) / dias] if len(df) else np.empty(0)
+    gasto = pd.Series(df['Kcal'].to_numpy(dtype='float') - KCAL_POR_KG * cambio)
+    tdee = gasto.ewm(halflife=pd.Timedelta(days=VIDA_MEDIA_TDEE), times=fechas).mean().to_numpy()
+    return pd.DataFrame({'Tendencia': tendencia, 'Gasto': gasto.to_numpy(), 'TDEE': tdee}, index=fechas)
+
+
+def tdee_movil(df, ventana=VENTANA_TDEE):
+    """TDEE de cada día del histórico por balance energético en los ``ventana`` días que acaban en él.
+
+    Media de kcal de los días registrados de la ventana menos 7700 por el
+    cambio diario de la tendencia entre el primer y el último día. Las sumas
+    salen de sumas acumuladas, O(n) para todo el histórico; los días sin
+    registro no cuentan para la media de kcal y la tendencia se interpola
+    entre pesajes. NaN donde la ventana no tiene ningún día con kcal.
+    """
+    series = series_tendencia(df)
+    if series.empty:
+        return pd.Series(dtype='float', index=pd.DatetimeIndex([], name='Fecha'), name='TDEE')
+    dias = pd.date_range(series.index[0], series.index[-1], name='Fecha')
+    kcal = df.dropna(subset=['Fecha']).groupby('Fecha')['Kcal'].mean()
+    kcal = kcal.set_axis(pd.DatetimeIndex(kcal.index)).reindex(dias)
+    tendencia = series['Tendencia'].groupby(level=0).last().reindex(dias).interpolate(method='time').to_numpy()
+
+    registrados = kcal.notna().to_numpy()
+    # Fila 0 a ceros para que la suma de (i - ventana, i] sea acumulado[i + 1] - acumulado[i + 1 - ventana]
+    suma_kcal = np.r_[0.0, np.cumsum(np.where(registrados, kcal.to_numpy(), 0.0))]
+    cuenta = np.r_[0, np.cumsum(registrados)]
+    fin = np.arange(1, len(dias) + 1)
+    inicio = np.maximum(fin - ventana, 0)
+    con_kcal = cuenta[fin] - cuenta[inicio]
+    media_kcal = np.divide(suma_kcal[fin] - suma_kcal[inicio], con_kcal,
+                           out=np.full(len(dias), np.nan), where=con_kcal > 0)
+    # Cambio de la tendencia desde el primer día de la ventana; al principio del histórico la ventana es más corta
+    transcurridos = fin - 1 - inicio
+    cambio = np.divide(tendencia - tendencia[inicio], transcurridos,
+                       out=np.zeros(len(dias)), where=transcurridos > 0)
+    return pd.Series(media_kcal - KCAL_POR_KG * cambio, index=dias, name='TDEE')
+
+
+class TendenciaPeso:
+    def __init__(self, historico, ruta_estado=None):
+        self.historico = historico
+        self.ruta_estado = ruta_estado or os.path.splitext(historico.ruta_csv)[0] + '_tendencia.json'
+        self.lock = threading.RLock()
+        self.estado_actual = None
+
+    def _leer_estado(self):
+        if self.estado_actual is None:
+            try:
+                with open(self.ruta_estado, encoding='utf-8') as f:
+                    self.estado_actual = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self.estado_actual = {}
+        return self.estado_actual
+
+    def _guardar_estado(self, estado):
+        escribir_atomico(self.ruta_estado, lambda f: json.dump(estado, f))
+        self.estado_actual = estado
+
+    def _version(self, version=None):
+        """``historico.version()`` (o ``version``) tal como queda guardada en el JSON."""
+        return json.loads(json.dumps(self.historico.version() if version is None else version))
+
+    # ---------- LECTURA ----------
+    def estado(self):
+        """{'Tendencia', 'TDEE', 'fecha', ...} al día con el histórico; sin 'Tendencia' si aún no hay pesos."""
+        with self.lock:
+            estado = self._leer_estado()
+            if estado.get('version') != self._version():
+                estado = self.recalcular()
+            return estado
+
+    # ---------- ESCRITURA ----------
+    def recalcular(self):
+        """Rehace el estado con todo el histórico en una pasada vectorizada."""
+        with self.lock:
+            version = self._version()
+            df = self.historico.cargar().dropna(subset=['Fecha', 'Peso']).sort_values('Fecha')
+            series = series_tendencia(df)
+            if series.empty:
+                estado = {'version': version}
+            else:
+                fechas = series.index
+                hasta_el_final = (fechas[-1] - fechas).days
+                gasto = series['Gasto'].to_numpy()
+                con_gasto = ~np.isnan(gasto)
+                estado = {
+                    'version': version,
+                    'fecha': fechas[-1].strftime('%Y-%m-%d'),
+                    'peso': _media_final(hasta_el_final, df['Peso'].to_numpy(dtype='float'), VIDA_MEDIA_PESO),
+                    'gasto': _media_final(hasta_el_final[con_gasto], gasto[con_gasto], VIDA_MEDIA_TDEE),
+                    'Tendencia': float(series['Tendencia'].iloc[-1]),
+                    'TDEE': float(series['TDEE'].iloc[-1])
+                }
+            self._guardar_estado(estado)
+            return estado
+
+    def registrar(self, fecha, peso, kcal, versiones=None):
+        """Incorpora un pesaje recién guardado: O(1) si es posterior al último, recálculo completo si no.
+
+        ``versiones`` es lo que devolvió ``historico.registrar`` para este pesaje. Sin ellas, o si el
+        estado no estaba al día con la versión de antes de guardarlo, se recalcula todo.
+        """
+        with self.lock:
+            estado = self._leer_estado()
+            fecha = pd.Timestamp(fecha)
+            # Solo se puede sumar al estado si lo único nuevo en el histórico es este pesaje
+            if versiones is None:
+                return self.recalcular()
+            antes, version = (self._version(v) for v in versiones)
+            if 'fecha' not in estado or fecha <= pd.Timestamp(estado['fecha']) or estado.get('version') != antes:
+                return self.recalcular()
+            dias = (fecha - pd.Timestamp(estado['fecha'])).days
+            numerador, denominador = estado['peso']
+            decaimiento = float(_decaimiento(dias, VIDA_MEDIA_PESO))
+            numerador, denominador = numerador * decaimiento + peso, denominador * decaimiento + 1
+            tendencia = numerador / denominador
+            nuevo = dict(estado, version=version, fecha=fecha.strftime('%Y-%m-%d'),
+                         peso=[numerador, denominador], Tendencia=tendencia)
+            numerador, denominador = estado['gasto']
+            decaimiento = float(_decaimiento(dias, VIDA_MEDIA_TDEE))
+            numerador, denominador = numerador * decaimiento, denominador * decaimiento
+            if kcal is not None and not np.isnan(kcal):
+                numerador += kcal - KCAL_POR_KG * (tendencia - estado['Tendencia']) / dias
+                denominador += 1
+            nuevo.update(gasto=[numerador, denominador])
+            if denominador:
+                nuevo['TDEE'] = numerador / denominador
+            self._guardar_estado(nuevo)
+            return nuevo
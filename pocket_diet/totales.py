@@ -0,0 +1,39 @@
+"""Totales diarios materializados del registro de comidas.
+
+Una fila por día con kcal, macros, número de entradas y kcal por tipo de
+comida. Los almacenes la mantienen al día con cada alta, edición o borrado,
+así que los paneles del día y de la semana leen unas pocas filas ya sumadas
+en lugar de volver a agrupar las comidas.
+"""
+import pandas as pd
+
+from .esquema import MACROS, TIPOS_COMIDA
+
+COLUMNAS_TIPO = [f'Kcal_{t}' for t in TIPOS_COMIDA]
+COLUMNAS_TOTALES = MACROS + ['Entradas'] + COLUMNAS_TIPO
+
+
+def totales_vacios():
+    df = pd.DataFrame(columns=COLUMNAS_TOTALES, dtype='float')
+    df.index.name = 'Fecha'
+    return df
+
+
+def totales_por_dia(df_comidas):
+    """Agrupa comidas (Fecha, Tipo y macros) en la tabla de totales diarios."""
+    df = df_comidas[df_comidas['Fecha'].notnull()]
+    if df.empty:
+        return totales_vacios()
+    sumandos = df[MACROS].apply(pd.to_numeric, errors='coerce').fillna(0)
+    sumandos['Entradas'] = 1
+    for tipo, columna in zip(TIPOS_COMIDA, COLUMNAS_TIPO):
+        sumandos[columna] = sumandos['Kcal'].where(df['Tipo'] == tipo, 0)
+    totales = sumandos.groupby(df['Fecha']).sum().astype('float')
+    totales.index.name = 'Fecha'
+    return totales[COLUMNAS_TOTALES]
+
+
+def sumar_totales(totales, delta, signo=1):
+    """Aplica a ``totales`` la contribución de unas filas ya agrupadas (signo -1 para restarlas)."""
+    totales = totales.add(delta * signo, fill_value=0)
+    return totales[totales['Entradas'] > 0]
@@ -0,0 +1,247 @@
+"""Bloques de pantalla comunes a los food logs.
+
+Cada app compone su página con estas piezas (totales, edición de una comida,
+estadísticas, buscadores y formulario de alta) en lugar de repetirlas. El
+alimento elegido en un buscador se guarda en ``st.session_state`` con las
+columnas del catálogo (Comida, Marca, Kcal_100g...) y el formulario parte de
+él.
+
+Las secciones van marcadas con ``metricas.tramo`` para el panel de tiempos;
+el alta y la edición no, porque solo cuentan cuando se pulsa un botón.
+"""
+from datetime import timedelta
+
+import pandas as pd
+import streamlit as st
+
+from .cargador import cache_off_compartida, espejo_off_compartido
+from .esquema import TIPOS_COMIDA, macros_consumidas
+from .metricas import tramo
+from .off import a_catalogo, buscar_codigo, buscar_productos
+
+COLUMNAS_DIA = ['Comida', 'Marca', 'Gramos', 'Kcal', 'Proteínas', 'Carbs', 'Grasas']
+# Columna del catálogo -> clave en session_state
+_DEFAULTS = {
+    'Comida': 'nombre_default',
+    'Marca': 'marca_default',
+    'Codigo': 'codigo_default',
+    'Kcal_100g': 'kcal_default',
+    'Proteínas_100g': 'prote_default',
+    'Carbs_100g': 'carbs_default',
+    'Grasas_100g': 'grasas_default'
+}
+
+
+# ---------- TOTALES ----------
+def metricas_macros(valores, sufijo=''):
+    """Kcal y macros de ``valores`` en cuatro columnas."""
+    with tramo('render', 'metricas_macros'):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric(f"Kcal{sufijo}", f"{valores['Kcal']:.0f}")
+        col2.metric(f"Proteínas{sufijo}", f"{valores['Proteínas']:.0f} g")
+        col3.metric(f"Carbs{sufijo}", f"{valores['Carbs']:.0f} g")
+        col4.metric(f"Grasas{sufijo}", f"{valores['Grasas']:.0f} g")
+
+
+def totales_dia(almacen, fecha):
+    st.subheader("Totales del día")
+    with tramo('agregado', 'total_dia'):
+        total = almacen.total_dia(fecha)
+    metricas_macros(total)
+
+
+def tablas_por_tipo(df_dia):
+    """Una tabla por tipo de comida (desayuno, comida...)."""
+    with tramo('render', 'tablas_por_tipo'):
+        for t in TIPOS_COMIDA:
+            st.subheader(t)
+            df_tipo = df_dia[df_dia['Tipo'] == t]
+            if not df_tipo.empty:
+                st.dataframe(df_tipo[COLUMNAS_DIA], use_container_width=True)
+            else:
+                st.write("Sin registros.")
+
+
+def totales_semana(almacen, fecha):
+    st.subheader("Totales últimos 7 días")
+    semana_inicio = fecha - timedelta(days=6)
+    with tramo('agregado', 'totales_semana'):
+        df_semana = almacen.totales(semana_inicio, fecha)
+    if not df_semana.empty:
+        with tramo('render', 'totales_semana'):
+            st.write(f"Del {semana_inicio.strftime('%d-%m-%Y')} al {fecha.strftime('%d-%m-%Y')}")
+            st.metric("Kcal promedio/día", f"{df_semana['Kcal'].mean():.0f}")
+            st.metric("Proteínas promedio/día", f"{df_semana['Proteínas'].mean():.0f} g")
+            st.metric("Carbs promedio/día", f"{df_semana['Carbs'].mean():.0f} g")
+            st.metric("Grasas promedio/día", f"{df_semana['Grasas'].mean():.0f} g")
+    else:
+        st.info("No hay datos suficientes para mostrar totales semanales.")
+
+
+def estadisticas_rango(almacen, fecha):
+    st.subheader("Estadísticas por rango")
+    rango_stats = st.date_input("Rango para estadísticas", value=(fecha - timedelta(days=27), fecha), key='rango_stats')
+    if len(rango_stats) == 2:
+        with tramo('agregado', 'estadisticas_rango'):
+            estadisticas = almacen.estadisticas()
+            suma_rango = estadisticas.suma(*rango_stats)
+        if suma_rango['Dias'] > 0:
+            with tramo('agregado', 'medias_moviles'):
+                promedio = estadisticas.promedio(*rango_stats)
+                medias = estadisticas.medias_moviles()
+                medias = medias[(medias.index >= rango_stats[0]) & (medias.index <= rango_stats[1])]
+            st.write(f"{suma_rango['Dias']:.0f} días con registros · {suma_rango['Kcal']:.0f} kcal en total")
+            metricas_macros(promedio, ' promedio/día')
+            with tramo('render', 'grafica_kcal'):
+                st.line_chart(medias[['Kcal_7d', 'Kcal_14d', 'Kcal_28d']])
+        else:
+            st.info("No hay comidas registradas en ese rango.")
+
+
+# ---------- EDITAR Y ELIMINAR ----------
+def editar_comida(almacen, df_dia, con_tipo=True, con_gramos=True):
+    """Selector de una comida del día con sus campos editables y los botones de guardar y eliminar."""
+    # Una marca vacía vuelve del CSV como NaN y dejaría la etiqueta entera en NaN
+    etiquetas = df_dia['Comida'].fillna('') + " (" + df_dia['Marca'].fillna('') + ")"
+    # El selectbox recuerda la opción por el texto que muestra: dos comidas iguales en el día
+    # necesitan etiquetas distintas o se elegiría siempre la última
+    repetidas = etiquetas.duplicated(keep=False)
+    etiquetas = etiquetas.where(~repetidas, etiquetas + " · #" + etiquetas.index.astype(str)).to_dict()
+    idx = st.selectbox("Selecciona comida para editar/eliminar", [None] + list(etiquetas),
+                       format_func=lambda i: "" if i is None else etiquetas[i])
+    if idx is None:
+        return
+
+    st.write("Editar valores:")
+    cambios = {}
+    if con_tipo:
+        tipo = df_dia.loc[idx, 'Tipo'] if df_dia.loc[idx, 'Tipo'] in TIPOS_COMIDA else 'Desayuno'
+        cambios['Tipo'] = st.selectbox('Nuevo tipo', TIPOS_COMIDA, index=TIPOS_COMIDA.index(tipo))
+    cambios['Comida'] = st.text_input('Nuevo nombre', value=df_dia.loc[idx, 'Comida'], key='edit_nombre')
+    cambios['Marca'] = st.text_input('Nueva marca', value=df_dia.loc[idx, 'Marca'], key='edit_marca')
+    if con_gramos:
+        cambios['Gramos'] = st.number_input('Nuevos gramos', min_value=1, max_value=5000, step=10, value=int(df_dia.loc[idx, 'Gramos']), key='edit_gramos')
+    cambios['Kcal'] = st.number_input('Nuevas kcal', min_value=0, max_value=5000, step=10, value=int(df_dia.loc[idx, 'Kcal']), key='edit_kcal')
+    cambios['Proteínas'] = st.number_input('Nuevas proteínas', min_value=0, max_value=300, step=1, value=int(df_dia.loc[idx, 'Proteínas']), key='edit_prote')
+    cambios['Carbs'] = st.number_input('Nuevos carbs', min_value=0, max_value=500, step=1, value=int(df_dia.loc[idx, 'Carbs']), key='edit_carbs')
+    cambios['Grasas'] = st.number_input('Nuevas grasas', min_value=0, max_value=200, step=1, value=int(df_dia.loc[idx, 'Grasas']), key='edit_grasas')
+
+    if st.button("Guardar cambios"):
+        almacen.actualizar(idx, cambios)
+        st.success("¡Comida actualizada!")
+
+    if st.button("Eliminar comida"):
+        almacen.eliminar(idx)
+        st.success("¡Comida eliminada!")
+
+
+# ---------- BUSCADORES ----------
+def usar_alimento(alimento):
+    """Deja ``alimento`` (columnas del catálogo) como valores por defecto del formulario."""
+    for columna, clave in _DEFAULTS.items():
+        st.session_state[clave] = alimento.get(columna)
+
+
+def alimento_elegido():
+    """El último alimento pasado a ``usar_alimento``, con las columnas del catálogo."""
+    return {columna: st.session_state.get(clave) for columna, clave in _DEFAULTS.items()}
+
+
+def buscador_codigo_barras(almacen):
+    st.subheader("Código de barras")
+    codigo_barras = st.text_input("Escanea o escribe el código (EAN/UPC)")
+    if not codigo_barras:
+        return
+    with tramo('filtro', 'buscar_codigo'):
+        encontrado = almacen.buscar_codigo(codigo_barras)
+    if encontrado is not None:
+        encontrado, origen = encontrado.to_dict(), "tu catálogo"
+    else:
+        with tramo('red', 'off_codigo'):
+            producto = buscar_codigo(codigo_barras, cache=cache_off_compartida(), espejo=espejo_off_compartido())
+        encontrado, origen = (a_catalogo(producto) if producto else None), "Open Food Facts"
+    if encontrado is None:
+        st.warning("No hay ningún producto con ese código.")
+    elif st.button(f"Usar: {encontrado['Comida']} ({encontrado['Kcal_100g']} kcal) · {origen}"):
+        usar_alimento(encontrado)
+
+
+def buscador_off():
+    st.subheader("Buscador en Open Food Facts (opcional)")
+    busqueda = st.text_input("Buscar alimento")
+    if not busqueda:
+        return
+    with tramo('red', 'off_buscar'):
+        productos = buscar_productos(busqueda, cache=cache_off_compartida(), espejo=espejo_off_compartido())
+    for prod in productos or []:
+        alimento = a_catalogo(prod)
+        if st.button(f"Usar: {alimento['Comida']} ({alimento['Kcal_100g']} kcal)"):
+            usar_alimento(alimento)
+
+
+def buscador_catalogo(almacen, df_catalogo):
+    st.subheader("Buscar en tu catálogo")
+    texto_buscar = st.text_input("Filtrar catálogo", "")
+    with tramo('filtro', 'buscar_catalogo'):
+        if texto_buscar:
+            df_filtrado = almacen.buscar_catalogo(texto_buscar)
+        else:
+            df_filtrado = df_catalogo.copy()
+
+    if not df_filtrado.empty:
+        with tramo('render', 'selector_catalogo'):
+            df_filtrado['Etiqueta'] = df_filtrado['Comida'] + " (" + df_filtrado['Marca'] + ")"
+            seleccion_catalogo = st.selectbox("Selecciona alimento del catálogo", [""] + list(df_filtrado['Etiqueta']))
+        if seleccion_catalogo:
+            usar_alimento(df_filtrado[df_filtrado['Etiqueta'] == seleccion_catalogo].iloc[0].to_dict())
+
+
+# ---------- AÑADIR ----------
+def formulario_comida(almacen, fecha, alimento, tipo=None):
+    """Campos de una comida nueva partiendo de ``alimento`` (por 100 g) y botón de añadirla.
+
+    Sin ``tipo`` la comida se guarda sin tipo, como en las apps de una sola lista.
+    """
+    def por_defecto(columna, vacio=0):
+        valor = alimento.get(columna)
+        return vacio if valor is None or (not isinstance(valor, str) and pd.isna(valor)) else valor
+
+    nombre = st.text_input('Nombre de la comida', value=por_defecto('Comida', ""))
+    marca = st.text_input('Marca', value=por_defecto('Marca', ""))
+    gramos = st.number_input('Gramos consumidos', min_value=1, max_value=5000, step=10)
+    kcal_100g = st.number_input('Kcal por 100g', min_value=0, max_value=900, step=1, value=int(por_defecto('Kcal_100g')))
+    prote_100g = st.number_input('Proteínas por 100g', min_value=0, max_value=100, step=1, value=int(por_defecto('Proteínas_100g')))
+    carbs_100g = st.number_input('Carbs por 100g', min_value=0, max_value=200, step=1, value=int(por_defecto('Carbs_100g')))
+    grasas_100g = st.number_input('Grasas por 100g', min_value=0, max_value=100, step=1, value=int(por_defecto('Grasas_100g')))
+
+    totales = macros_consumidas({
+        'Kcal_100g': kcal_100g, 'Proteínas_100g': prote_100g, 'Carbs_100g': carbs_100g, 'Grasas_100g': grasas_100g
+    }, gramos)
+
+    st.info(f"Totales calculados: {totales['Kcal']:.0f} kcal, {totales['Proteínas']:.0f} g proteína, {totales['Carbs']:.0f} g carbs, {totales['Grasas']:.0f} g grasas.")
+
+    guardar_catalogo = st.checkbox("Guardar en catálogo de favoritos")
+
+    if st.button('Añadir comida'):
+        nueva = {'Fecha': [fecha]}
+        if tipo is not None:
+            nueva['Tipo'] = [tipo]
+        nueva.update({
+            'Comida': [nombre],
+            'Marca': [marca],
+            'Gramos': [gramos],
+            **{m: [valor] for m, valor in totales.items()}
+        })
+        almacen.insertar(pd.DataFrame(nueva))
+        if guardar_catalogo:
+            nuevo_catalogo = pd.DataFrame({
+                'Comida': [nombre],
+                'Marca': [marca],
+                'Kcal_100g': [kcal_100g],
+                'Proteínas_100g': [prote_100g],
+                'Carbs_100g': [carbs_100g],
+                'Grasas_100g': [grasas_100g],
+                'Codigo': [alimento.get('Codigo')]
+            })
+            almacen.guardar_en_catalogo(nuevo_catalogo)
+        st.success("¡Comida añadida!")
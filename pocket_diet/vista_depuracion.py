@@ -0,0 +1,42 @@
+"""Panel de depuración con los tiempos de la última ejecución de la página.
+
+Cada app llama a ``empezar`` antes de dibujar nada y a ``panel`` al final. El
+interruptor de la barra lateral se guarda en ``st.session_state``: al
+activarlo, la siguiente ejecución de esa sesión mide sus tramos (ver
+``metricas``) y el panel los muestra por categoría y uno a uno. Apagado, las
+vistas no miden nada salvo que el proceso exporte métricas.
+"""
+import streamlit as st
+
+from .metricas import CATEGORIAS, iniciar_ejecucion, terminar_ejecucion
+
+CLAVE = 'depuracion_tiempos'
+
+
+def empezar(pagina):
+    """Al principio del script, antes del primer tramo."""
+    iniciar_ejecucion(pagina, st.session_state.get(CLAVE, False))
+
+
+def panel():
+    """Al final del script: cierra la ejecución y, si el interruptor está activo, muestra sus tiempos."""
+    ejecucion = terminar_ejecucion()
+    activo = st.sidebar.toggle("Tiempos de la página", key=CLAVE)
+    if not activo:
+        return
+    if ejecucion is None:
+        # Recién activado: esta ejecución ya había empezado sin medir
+        st.sidebar.caption("Se mostrarán a partir de la próxima interacción.")
+        return
+
+    st.sidebar.metric("Ejecución completa", f"{ejecucion.segundos * 1000:.1f} ms")
+    por_categoria = ejecucion.por_categoria()
+    medido = sum(por_categoria.values())
+    filas = [{'Categoría': c, 'ms': round(por_categoria[c] * 1000, 1)} for c in CATEGORIAS]
+    filas.append({'Categoría': 'sin medir', 'ms': round(max(0.0, ejecucion.segundos - medido) * 1000, 1)})
+    st.sidebar.dataframe(filas, hide_index=True, use_container_width=True)
+    with st.sidebar.expander("Tramos"):
+        st.dataframe([
+            {'Tramo': '  ' * profundidad + nombre, 'Categoría': categoria, 'ms': round(segundos * 1000, 2)}
+            for categoria, nombre, segundos, profundidad in ejecucion.tramos
+        ], hide_index=True, use_container_width=True)
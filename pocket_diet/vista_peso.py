@@ -0,0 +1,181 @@
+"""Pantalla del registro de peso, común a app_mejorado.py y las dos v3.
+
+Las pestañas van con ``on_change='rerun'``: solo se ejecuta la que está
+abierta, así que la de introducir datos no lee el rango, ni calcula el TDEE,
+ni importa Altair. Altair se importa al dibujar las gráficas y openpyxl solo
+cuando se genera un Excel.
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from .cargador import (
+    datos_grafica_cacheados, exportador_excel_compartido, historico_compartido, resumenes_compartidos,
+    tendencia_compartida
+)
+from .exportar import MIME_EXCEL
+from .metricas import tramo
+from .resumenes import comparativa
+from .tendencia import VENTANA_TDEE, tdee_movil
+
+
+def mostrar(csv_file, excel_file, mostrar_rango=True):
+    """Pestañas de introducir datos y de resumen del histórico de ``csv_file``."""
+    with tramo('carga', 'objetos_peso'):
+        # Solo el nivel caliente (últimos meses); lo archivado se lee bajo demanda
+        historico = historico_compartido(csv_file)
+        # El Excel se regenera en segundo plano; guardar solo escribe el CSV
+        exportador = exportador_excel_compartido(csv_file, excel_file)
+        # Peso tendencia y TDEE se actualizan con cada pesaje en lugar de recalcularse en cada rerun
+        tendencia = tendencia_compartida(csv_file)
+        resumenes = resumenes_compartidos(csv_file)
+
+    tab1, tab2 = st.tabs(["Introducir datos", "Resumen y progreso"], on_change='rerun', key='pestana_peso')
+    if tab1.open:
+        with tab1:
+            _introducir(historico, exportador, tendencia, resumenes, excel_file)
+    if tab2.open:
+        with tab2:
+            _resumen(historico, tendencia, resumenes, mostrar_rango)
+
+
+# ---------- PESTAÑA 1: INPUT ----------
+def _introducir(historico, exportador, tendencia, resumenes, excel_file):
+    fecha = st.date_input('Fecha para registrar', value=date.today())
+    fecha_ts = pd.Timestamp(fecha)
+
+    peso = st.number_input('Peso (kg)', min_value=0.0, max_value=300.0, step=0.1, value=None, placeholder="Introduce tu peso")
+    kcal = st.number_input('Kcal consumidas', min_value=0, max_value=10000, step=10, value=None, placeholder="Introduce tus kcal")
+
+    with tramo('filtro', 'existe_fecha'):
+        existe = historico.existe(fecha_ts)
+    if existe:
+        st.warning('Ya existe un registro para esta fecha. Al guardar, se sobrescribirá.')
+
+    if st.button('Guardar'):
+        # Se añade sobre lo que haya en disco en ese momento, no sobre lo leído al cargar la página
+        versiones = historico.registrar(fecha_ts, float(peso), float(kcal))
+        tendencia.registrar(fecha_ts, float(peso), float(kcal), versiones)
+        resumenes.registrar(fecha_ts, versiones)
+        exportador.programar()
+        st.success('Datos guardados correctamente. Recarga la página para ver las actualizaciones.')
+
+    if isinstance(exportador.error, PermissionError):
+        st.warning("⚠️ No se pudo guardar el archivo Excel porque está abierto. Ciérralo y vuelve a guardar.")
+    elif exportador.error:
+        st.warning(f"⚠️ No se pudo guardar el archivo Excel: {exportador.error}")
+    st.download_button('Descargar Excel', exportador.contenido, file_name=excel_file, mime=MIME_EXCEL)
+
+
+# ---------- PESTAÑA 2: RESUMEN ----------
+def _resumen(historico, tendencia, resumenes, mostrar_rango):
+    objetivo_peso = st.number_input('Peso objetivo final (kg)', min_value=30.0, max_value=300.0, step=0.1, value=70.0)
+    meta_1 = st.number_input('Meta intermedia (kg)', min_value=30.0, max_value=300.0, step=0.1, value=80.0)
+
+    with tramo('carga', 'limites'):
+        fecha_min, fecha_max, registros = historico.limites()
+    if registros <= 1:
+        st.info('Agrega al menos dos registros para mostrar resúmenes y gráficas.')
+        return
+
+    st.subheader("Análisis por rango de fechas")
+    fecha_min = fecha_min.date()
+    fecha_max = fecha_max.date()
+    # Por defecto solo los últimos meses, que están en el nivel caliente
+    inicio_defecto = max(fecha_min, fecha_max - timedelta(days=historico.dias_calientes))
+    rango = st.slider("Selecciona el rango", min_value=fecha_min, max_value=fecha_max, value=(inicio_defecto, fecha_max))
+    if mostrar_rango:
+        st.write(f"Has seleccionado: {rango[0].strftime('%d-%m-%Y')} → {rango[1].strftime('%d-%m-%Y')}")
+    # Con el mes anterior para que el TDEE de los primeros días tenga su ventana completa
+    with tramo('carga', 'historico'):
+        df = historico.cargar(desde=pd.Timestamp(rango[0]) - pd.Timedelta(days=VENTANA_TDEE))
+    with tramo('filtro', 'rango'):
+        df_rango = df[df['Fecha'].between(pd.Timestamp(rango[0]), pd.Timestamp(rango[1]))]
+
+    if df_rango.empty:
+        st.warning("No hay datos en el rango seleccionado.")
+        return
+
+    with tramo('agregado', 'ultimas_4_semanas'):
+        estado_tendencia = tendencia.estado()
+        fecha_max_rango = df_rango['Fecha'].max()
+        fecha_min_4w = fecha_max_rango - pd.Timedelta(days=27)
+        df_4w = df_rango[df_rango['Fecha'].between(fecha_min_4w, fecha_max_rango)]
+        if df_4w.empty:
+            df_4w = df_rango.copy()
+        peso_inicio = df_4w.iloc[0]['Peso']
+        peso_actual = df_4w.iloc[-1]['Peso']
+        total_kcal = df_4w['Kcal'].sum()
+        kcal_diarias_prom = total_kcal / len(df_4w)
+        tdee_dinamico = estado_tendencia.get('TDEE', kcal_diarias_prom)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Peso tendencia", f"{estado_tendencia.get('Tendencia', peso_actual):.1f} kg")
+    col2.metric("TDEE dinámico", f"{tdee_dinamico:.0f} kcal")
+    col3.metric("Kcal promedio 4w", f"{kcal_diarias_prom:.0f} kcal")
+
+    st.subheader("Comparativa mensual")
+    # Resúmenes guardados por semana y mes: no se recalcula nada al mover el rango
+    nivel = st.radio("Agrupar por", ['mensual', 'semanal'], format_func=str.capitalize, horizontal=True)
+    with tramo('agregado', 'comparativa'):
+        resumen = resumenes.tabla(nivel, rango[0], rango[1])
+        tabla = comparativa(resumen, nivel) if len(resumen) > 1 else None
+
+    if tabla is not None:
+        with tramo('render', 'comparativa'):
+            st.dataframe(tabla, hide_index=True, use_container_width=True)
+    else:
+        st.info("No hay datos suficientes para comparación mensual.")
+
+    st.subheader('Progreso hacia metas')
+    for meta, label in zip([meta_1, objetivo_peso], ["Meta intermedia", "Meta final"]):
+        if peso_actual != meta:
+            if peso_inicio != meta:
+                porcentaje_meta = max(0, min(1, (peso_inicio - peso_actual) / (peso_inicio - meta)))
+            else:
+                porcentaje_meta = 1
+        else:
+            porcentaje_meta = 1
+
+        st.write(f"{label}: {meta:.1f} kg")
+        st.progress(porcentaje_meta)
+
+    _graficas(historico, df, df_rango, rango)
+
+
+def _graficas(historico, df, df_rango, rango):
+    with tramo('carga', 'altair'):
+        import altair as alt
+
+    st.subheader('Gráfica de peso')
+    with tramo('agregado', 'datos_grafica_peso'):
+        df_graf = df_rango.copy()
+        df_graf['Media_movil'] = df_graf['Peso'].rolling(window=7, min_periods=1).mean()
+        y_min = df_graf['Peso'].min() - 2
+        y_max = df_graf['Peso'].max() + 2
+        # Ya plegados y reducidos a un máximo de puntos, cacheados por rango y versión de los datos
+        clave_grafica = (rango, historico.version())
+        datos_peso = datos_grafica_cacheados(('peso',) + clave_grafica, df_graf, ['Peso', 'Media_movil'])
+    with tramo('render', 'grafica_peso'):
+        chart_peso = alt.Chart(datos_peso).mark_line().encode(
+            x='Fecha:T',
+            y=alt.Y('Valor:Q', scale=alt.Scale(domain=[y_min, y_max])),
+            color='Variable:N'
+        ).properties(width=700, height=400)
+        st.altair_chart(chart_peso, use_container_width=True)
+
+    st.subheader('Gráfica de kcal vs TDEE')
+    with tramo('agregado', 'datos_grafica_kcal'):
+        # TDEE de cada día por balance energético en los 28 días anteriores
+        df_graf['TDEE'] = tdee_movil(df).reindex(df_graf['Fecha']).round(0).to_numpy()
+        datos_kcal = datos_grafica_cacheados(
+            ('kcal',) + clave_grafica, df_graf, ['Kcal', 'TDEE'], metodo={'Kcal': 'minmax'}
+        )
+    with tramo('render', 'grafica_kcal'):
+        chart_kcal = alt.Chart(datos_kcal).mark_line().encode(
+            x='Fecha:T',
+            y='Valor:Q',
+            color='Variable:N'
+        ).properties(width=700, height=300)
+        st.altair_chart(chart_kcal, use_container_width=True)
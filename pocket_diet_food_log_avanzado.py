@@ -3,32 +3,36 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 
+from pocket_diet.archivos import bloqueo_archivo, escribir_atomico
+from pocket_diet.cargador import abrir_almacen_compartido, cargar_csv, invalidar
+from pocket_diet.metricas import tramo
+from pocket_diet.vista_comidas import editar_comida, totales_dia
+from pocket_diet.vista_depuracion import empezar, panel
+
+empezar('food_log_avanzado')
+
 st.title("Pocket Diet - Food Log Avanzado 🍽️")
 st.caption("by Jotacorp · Lightweight baby! 🏋️‍♂️🔥")
 st.markdown("---")
 
 CSV_FILE = 'comidas.csv'
 CATALOGO_FILE = 'catalogo_comidas.csv'
+DB_FILE = 'pocket_diet.db'
 
-# ---------- CARGAR COMIDAS EXISTENTES ----------
-try:
-    df_comidas = pd.read_csv(CSV_FILE)
-    df_comidas['Fecha'] = pd.to_datetime(df_comidas['Fecha'], errors='coerce').dt.date
-except FileNotFoundError:
-    df_comidas = pd.DataFrame(columns=['Fecha', 'Comida', 'Marca', 'Kcal', 'Proteínas', 'Carbs', 'Grasas'])
+# ---------- ABRIR ALMACÉN DE COMIDAS ----------
+with tramo('carga', 'almacen'):
+    almacen = abrir_almacen_compartido(CSV_FILE, ruta_db=DB_FILE)
 
 # ---------- CARGAR CATÁLOGO ----------
-try:
-    df_catalogo = pd.read_csv(CATALOGO_FILE)
-except FileNotFoundError:
-    df_catalogo = pd.DataFrame(columns=['Comida', 'Marca', 'Kcal', 'Proteínas', 'Carbs', 'Grasas'])
+with tramo('carga', 'catalogo'):
+    df_catalogo = cargar_csv(CATALOGO_FILE, ['Comida', 'Marca', 'Kcal', 'Proteínas', 'Carbs', 'Grasas'])
 
 # ---------- SELECCIONAR FECHA ----------
 fecha = st.date_input('Fecha', value=date.today())
 
 # ---------- SELECCIONAR COMIDA DEL CATÁLOGO ----------
 if not df_catalogo.empty:
-    seleccion_catalogo = st.selectbox("Selecciona alimento del catálogo (opcional)", [""] + df_catalogo['Comida'] + " (" + df_catalogo['Marca'] + ")")
+    seleccion_catalogo = st.selectbox("Selecciona alimento del catálogo (opcional)", [""] + list(df_catalogo['Comida'] + " (" + df_catalogo['Marca'] + ")"))
     if seleccion_catalogo and seleccion_catalogo != "":
         idx = df_catalogo[df_catalogo['Comida'] + " (" + df_catalogo['Marca'] + ")" == seleccion_catalogo].index[0]
         alimento_seleccionado = df_catalogo.loc[idx]
@@ -73,53 +77,32 @@ if st.button('Añadir comida'):
         'Carbs': [carbs],
         'Grasas': [grasas]
     })
-    df_comidas = pd.concat([df_comidas, nueva], ignore_index=True)
-    df_comidas.to_csv(CSV_FILE, index=False)
-    if guardar_catalogo and not df_catalogo[(df_catalogo['Comida'] == nombre) & (df_catalogo['Marca'] == marca)].any().any():
-        df_catalogo = pd.concat([df_catalogo, nueva.drop(columns=['Fecha'])], ignore_index=True)
-        df_catalogo.to_csv(CATALOGO_FILE, index=False)
+    almacen.insertar(nueva)
+    if guardar_catalogo:
+        # Se relee con el archivo bloqueado por si otra sesión lo cambió desde que se cargó la página
+        with bloqueo_archivo(CATALOGO_FILE):
+            invalidar(CATALOGO_FILE)
+            df_catalogo = cargar_csv(CATALOGO_FILE, ['Comida', 'Marca', 'Kcal', 'Proteínas', 'Carbs', 'Grasas'])
+            if df_catalogo[(df_catalogo['Comida'] == nombre) & (df_catalogo['Marca'] == marca)].empty:
+                df_catalogo = pd.concat([df_catalogo, nueva.drop(columns=['Fecha'])], ignore_index=True)
+                escribir_atomico(CATALOGO_FILE, lambda f: df_catalogo.to_csv(f, index=False))
+                invalidar(CATALOGO_FILE)
     st.success("¡Comida añadida!")
 
 # ---------- FILTRAR COMIDAS DEL DÍA ----------
-df_dia = df_comidas[df_comidas['Fecha'] == fecha]
+with tramo('filtro', 'comidas_dia'):
+    df_dia = almacen.dia(fecha)
 
 st.subheader("Comidas del día")
 if not df_dia.empty:
-    seleccion_editar = st.selectbox("Selecciona comida para editar/eliminar", [""] + list(df_dia['Comida'] + " (" + df_dia['Marca'] + ")"))
-
-    if seleccion_editar and seleccion_editar != "":
-        idx = df_dia[df_dia['Comida'] + " (" + df_dia['Marca'] + ")" == seleccion_editar].index[0]
-        st.write("Editar valores:")
-
-        nuevo_nombre = st.text_input('Nuevo nombre', value=df_dia.loc[idx, 'Comida'], key='edit_nombre')
-        nueva_marca = st.text_input('Nueva marca', value=df_dia.loc[idx, 'Marca'], key='edit_marca')
-        nueva_kcal = st.number_input('Nuevas kcal', min_value=0, max_value=5000, step=10, value=int(df_dia.loc[idx, 'Kcal']), key='edit_kcal')
-        nueva_prote = st.number_input('Nuevas proteínas', min_value=0, max_value=300, step=1, value=int(df_dia.loc[idx, 'Proteínas']), key='edit_prote')
-        nueva_carbs = st.number_input('Nuevos carbs', min_value=0, max_value=500, step=1, value=int(df_dia.loc[idx, 'Carbs']), key='edit_carbs')
-        nueva_grasas = st.number_input('Nuevas grasas', min_value=0, max_value=200, step=1, value=int(df_dia.loc[idx, 'Grasas']), key='edit_grasas')
-
-        if st.button("Guardar cambios"):
-            df_comidas.loc[idx, 'Comida'] = nuevo_nombre
-            df_comidas.loc[idx, 'Marca'] = nueva_marca
-            df_comidas.loc[idx, 'Kcal'] = nueva_kcal
-            df_comidas.loc[idx, 'Proteínas'] = nueva_prote
-            df_comidas.loc[idx, 'Carbs'] = nueva_carbs
-            df_comidas.loc[idx, 'Grasas'] = nueva_grasas
-            df_comidas.to_csv(CSV_FILE, index=False)
-            st.success("¡Comida actualizada!")
-
-        if st.button("Eliminar comida"):
-            df_comidas = df_comidas.drop(idx)
-            df_comidas.to_csv(CSV_FILE, index=False)
-            st.success("¡Comida eliminada!")
-
-    st.dataframe(df_dia[['Comida', 'Marca', 'Kcal', 'Proteínas', 'Carbs', 'Grasas']], use_container_width=True)
-
-    st.subheader("Totales del día")
-    col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Kcal", f"{df_dia['Kcal'].sum():.0f}")
-    col2.metric("Proteínas", f"{df_dia['Proteínas'].sum():.0f} g")
-    col3.metric("Carbs", f"{df_dia['Carbs'].sum():.0f} g")
-    col4.metric("Grasas", f"{df_dia['Grasas'].sum():.0f} g")
+    editar_comida(almacen, df_dia, con_tipo=False, con_gramos=False)
+
+    with tramo('render', 'tabla_dia'):
+        st.dataframe(df_dia[['Comida', 'Marca', 'Kcal', 'Proteínas', 'Carbs', 'Grasas']], use_container_width=True)
+
+    totales_dia(almacen, fecha)
 else:
     st.info("No hay comidas registradas para este día.")
+
+# ---------- TIEMPOS DE LA PÁGINA ----------
+panel()